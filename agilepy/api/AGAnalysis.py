@@ -28,11 +28,17 @@
 
 import os
 import re
+import json
+import hashlib
 import numpy as np
+from copy import copy
 
 from astropy.table import Table  
-from tqdm.notebook import trange, tqdm
+from tqdm.notebook import tqdm
 from time import time
+from queue import Queue
+from threading import Event
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from shutil import rmtree
 from ntpath import basename
@@ -44,6 +50,9 @@ pattern = re.compile('e([+\-]\d+)')
 from agilepy.core.AGBaseAnalysis import AGBaseAnalysis
 from agilepy.core.SourcesLibrary import SourcesLibrary
 from agilepy.core.ScienceTools import CtsMapGenerator, ExpMapGenerator, GasMapGenerator, IntMapGenerator, Multi, AP
+from agilepy.core.ToolScheduler import ToolScheduler
+from agilepy.core.MapCubeStore import MapCubeStore
+from agilepy.core.LightCurveManifest import LightCurveManifest
 from agilepy.config.AgilepyConfig import AgilepyConfig
 from agilepy.utils.AstroUtils import AstroUtils
 from agilepy.core.Parameters import Parameters
@@ -55,7 +64,8 @@ from agilepy.core.CustomExceptions import   AGILENotFoundError, \
                                             MaplistIsNone, SelectionParamNotSupported, \
                                             SourceNotFound, \
                                             SourcesLibraryIsEmpty, \
-                                            ValueOutOfRange
+                                            ValueOutOfRange, \
+                                            FileSourceParsingError
                                             
 class AGAnalysis(AGBaseAnalysis):
     """This class contains the high-level API to run scientific analysis, data visualization and some utility methods.
@@ -64,6 +74,21 @@ class AGAnalysis(AGBaseAnalysis):
 
     """
 
+    # The columns of the light curve data output file
+    LC_MLE_COLUMNS = ("time_start_mjd time_end_mjd sqrt(ts) flux flux_err flux_ul gal gal_error iso iso_error l_peak b_peak dist_peak " \
+        "l b r ell_dist a b phi exposure ExpRatio counts counts_err Index Index_Err Par2 Par2_Err Par3 Par3_Err Erglog Erglog_Err " \
+        "Erglog_UL time_start_utc time_end_utc time_start_tt time_end_tt Fix index ULConfidenceLevel SrcLocConfLevel start_l start_b start_flux " \
+        "typefun par2 par3 galmode2 galmode2fit isomode2 isomode2fit edpcor fluxcor integratortype expratioEval expratio_minthr expratio_maxthr " \
+        "expratio_size Emin emax fovmin fovmax albedo binsize expstep phasecode fit_cts fit_fitstatus0 fit_fcn0 fit_edm0 fit_nvpar0 fit_nparx0 fit_iter0 " \
+        "fit_fitstatus1 fit_fcn1 fit_edm1 fit_nvpar1 fit_nparx1 fit_iter1 fit_Likelihood1").split()
+
+    # The keys of the data extracted from the .source files, when different from the column names
+    LC_MLE_KEYS = {"exposure": "exp", "Emin": "emin"}
+
+    # Sanity bounds of the fitted values used as starting values of the next temporal bin (warm start)
+    LC_WARM_START_MAX_FLUX_RATIO = 100
+    LC_WARM_START_MAX_DISTANCE = 1.0
+
     def __init__(self, configurationFilePath, sourcesFilePath = None):
         """AGAnalysis constructor.
 
@@ -106,8 +131,12 @@ class AGAnalysis(AGBaseAnalysis):
             "mle" : None,
             "ap" : None
         }
+        self.lightCurveStats = None
 
         self.multiTool = Multi("AG_multi", self.logger)
+        self.multiTool.runLog = self.runLog
+
+        self.mapCubeStore = None
 
         if self.config.getOptionValue("userestapi"):
             self.logger.info("Using REST API")
@@ -527,7 +556,65 @@ plotting:
     # analysis                                                                 #
     ############################################################################
 
-    def generateMaps(self, config = None, maplistObj = None, tqdmOff = False):
+    def enableMapCubeStore(self, storeDir = None, chunkSize = 86400):
+        """It enables the stacking of the counts and exposure maps from fixed time chunks. The time axis is divided into \
+        chunks of ``chunkSize`` seconds whose maps are generated once and summed to obtain the maps of any interval \
+        containing them: overlapping intervals (e.g. the light curve bins and the calcBkg time windows) share the chunks.
+
+        Note:
+            The stacked maps can slightly differ from the maps generated over the whole interval, because of the events \
+            lying on the chunk boundaries and of the exposure sampling (timestep).
+
+        Args:
+            storeDir (str, optional): the directory of the chunks. It can be shared by several analyses. It defaults to None: \
+                the 'map_cube_store' directory inside the output directory will be used.
+            chunkSize (int, optional): the duration (TT seconds) of the chunks. It defaults to 86400.
+
+        Returns:
+            The MapCubeStore object.
+        """
+        if chunkSize <= 0:
+            raise ValueOutOfRange(f"chunkSize must be greater than 0 (got {chunkSize})")
+
+        if storeDir is None:
+            storeDir = Path(self.outdir).joinpath("map_cube_store")
+
+        self.mapCubeStore = MapCubeStore(Utils._expandEnvVar(str(storeDir)), chunkSize, self.logger, createTool=self._createTool)
+
+        self.logger.info(f"Map cube store enabled in {storeDir} (chunk size {chunkSize} s)")
+
+        return self.mapCubeStore
+
+    def disableMapCubeStore(self):
+        """It disables the stacking of the counts and exposure maps from fixed time chunks. The chunks are not removed.
+        """
+        self.mapCubeStore = None
+
+    def enableSourcesCache(self, cacheDir = None, maxSize = 256*1024**2):
+        """It enables an on-disk cache of the parsed sources files: loading the same catalog or sources file again \
+        skips the parsing of the whole file.
+
+        Args:
+            cacheDir (str, optional): the cache directory. It can be shared by several analyses. It defaults to None: \
+                $AGILEPY_CACHE_DIR/sources (or ~/.cache/agilepy/sources) will be used.
+            maxSize (int, optional): the maximum size (bytes) of the cache. The least recently used entries are evicted \
+                when the size is exceeded. It defaults to 256 MB.
+
+        Returns:
+            The SourcesCache object.
+        """
+        sourcesCache = self.sourcesLibrary.enableSourcesCache(cacheDir, maxSize)
+
+        self.logger.info(f"Sources cache enabled in {sourcesCache.cacheDir}")
+
+        return sourcesCache
+
+    def disableSourcesCache(self):
+        """It disables the cache of the parsed sources files. The cache directory is not removed.
+        """
+        self.sourcesLibrary.disableSourcesCache()
+
+    def generateMaps(self, config = None, maplistObj = None, tqdmOff = False, workers = 1):
         """It generates (one or more) counts, exposure, gas and int maps and a ``maplist file``.
 
         The method's behaviour varies according to several configuration options (see docs :ref:`configuration-file`).
@@ -535,6 +622,10 @@ plotting:
         Note:
             It resets the configuration options to their original values before exiting.
 
+        Args:
+            workers (int, optional): the number of (fov bin, energy bin) cells whose maps are generated concurrently. \
+                If greater than 1, each cell works on its own copy of the configuration. It defaults to 1.
+
         Returns:
             The absolute path to the generated ``maplist file``.
 
@@ -546,6 +637,10 @@ plotting:
             /home/rt/agilepy/output/testcase.maplist4
 
         """
+        if workers < 1:
+            self.logger.critical(f"The number of workers must be greater than 0, got {workers}")
+            raise ValueOutOfRange(f"The number of workers must be greater than 0, got {workers}")
+
         timeStart = time()
 
         if config:
@@ -599,8 +694,11 @@ plotting:
         maplistObjBKP.setFile(outputDir)
 
         self.logger.info(f"Generating maps {fovbinnumber*len(energybins)}..please wait.")
-    
-        for stepi in trange(0, fovbinnumber, desc=f"Fov bins loop", disable=tqdmOff, leave=tqdmOff):
+
+        # The (fov bin, energy bin) cells are listed in the same order of the serial loop,
+        # so that the maplist rows are always written in a deterministic order.
+        cells = []
+        for stepi in range(0, fovbinnumber):
 
             if fovbinnumber == 1:
                 bincenter = 30
@@ -609,66 +707,27 @@ plotting:
             else:
                 bincenter, fovmin, fovmax = AGAnalysis._updateFovMinMaxValues(fovbinnumber, initialFovmin, initialFovmax, stepi+1)
 
-
-            for bgCoeffIdx, stepe in tqdm(enumerate(energybins), desc=f"Energy bins loop", disable=tqdmOff, leave=tqdmOff):
+            for bgCoeffIdx, stepe in enumerate(energybins):
 
                 if not Parameters.checkEnergyBin(stepe):
                     self.logger.warning(f"Energy bin [{stepe[0]}, {stepe[1]}] is not supported. Map generation skipped.")
                     continue
-                
-                emin = stepe[0]
-                emax = stepe[1]
-
-                skymapL = Parameters.getSkyMap(emin, emax, configBKP.getOptionValue("filtercode"), configBKP.getOptionValue("irf"))
-                skymapH = Parameters.getSkyMap(emin, emax, configBKP.getOptionValue("filtercode"), configBKP.getOptionValue("irf"))
-                fileNamePrefix = Parameters.getMapNamePrefix(tmin, tmax, emin, emax, glon, glat, stepi+1)
-
-                self.logger.debug("Map generation => fovradmin %s fovradmax %s bincenter %s emin %s emax %s fileNamePrefix %s skymapL %s skymapH %s", \
-                                    fovmin,fovmax,bincenter,emin,emax,fileNamePrefix,skymapL,skymapH)
-
-
-                configBKP.setOptions(filenameprefix=initialFileNamePrefix+"_"+fileNamePrefix)
-                configBKP.setOptions(dq=0, fovradmin=int(fovmin), fovradmax=int(fovmax))
-                configBKP.setOptions(energybins=[[emin, emax]])
-
-                configBKP.addOptions("maps", skymapL=skymapL, skymapH=skymapH)
-
 
-                ctsMapGenerator = CtsMapGenerator("AG_ctsmapgen", self.logger)
-                expMapGenerator = ExpMapGenerator("AG_expmapgen", self.logger)
-                gasMapGenerator = GasMapGenerator("AG_gasmapgen", self.logger)
-                intMapGenerator = IntMapGenerator("AG_intmapgen", self.logger)
+                cells.append((stepi, bincenter, fovmin, fovmax, bgCoeffIdx, stepe))
 
-                ctsMapGenerator.configureTool(configBKP)
-                expMapGenerator.configureTool(configBKP)
-                gasMapGenerator.configureTool(configBKP, {"expMapGeneratorOutfilePath": next(iter(expMapGenerator.products.items()))[0]})
-                intMapGenerator.configureTool(configBKP, {"expMapGeneratorOutfilePath": next(iter(expMapGenerator.products.items()))[0], "ctsMapGeneratorOutfilePath" : next(iter(ctsMapGenerator.products.items()))[0]})
-
-                configBKP.addOptions("maps", expmap=next(iter(expMapGenerator.products.items()))[0], ctsmap=next(iter(ctsMapGenerator.products.items()))[0])
-
-                if not ctsMapGenerator.allRequiredOptionsSet(configBKP) or \
-                    not expMapGenerator.allRequiredOptionsSet(configBKP) or \
-                    not gasMapGenerator.allRequiredOptionsSet(configBKP) or \
-                    not intMapGenerator.allRequiredOptionsSet(configBKP):
-
-                    raise ScienceToolInputArgMissing("Some options have not been set.")
-
-                f1 = ctsMapGenerator.call()
-
-                f2 = expMapGenerator.call()
-
-                f3 = gasMapGenerator.call()
-
-                f4 = intMapGenerator.call()
-
-                maplistObjBKP.addRow(   next(iter(ctsMapGenerator.products.items()))[0], \
-                                        next(iter(expMapGenerator.products.items()))[0], \
-                                        next(iter(gasMapGenerator.products.items()))[0], \
-                                        str(bincenter), \
-                                        str(configBKP.getOptionValue("galcoeff")[bgCoeffIdx]), \
-                                        str(configBKP.getOptionValue("isocoeff")[bgCoeffIdx])
-                                    )
+        if workers > 1:
+            self.logger.info(f"Generating maps with {workers} workers")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # each worker gets its own snapshot of the configuration
+                futures = [executor.submit(self._generateMapsCell, AgilepyConfig.getCopy(configBKP), initialFileNamePrefix, *cell) for cell in cells]
+                for _ in tqdm(as_completed(futures), total=len(futures), desc="Maps loop", disable=tqdmOff, leave=tqdmOff):
+                    pass
+                maplistRows = [future.result() for future in futures]
+        else:
+            maplistRows = [self._generateMapsCell(configBKP, initialFileNamePrefix, *cell) for cell in tqdm(cells, desc="Maps loop", disable=tqdmOff, leave=tqdmOff)]
 
+        for maplistRow in maplistRows:
+            maplistObjBKP.addRow(*maplistRow)
 
         outdir = configBKP.getOptionValue("outdir")
 
@@ -877,6 +936,7 @@ plotting:
 
 
         self.multiTool.configureTool(configBKP)
+        self.multiTool.executor = self.executor
 
         try:
             products = self.multiTool.call()
@@ -904,7 +964,7 @@ plotting:
 
         return sourceFiles
 
-    def lightCurveMLE(self, sourceName, tmin = None, tmax = None, timetype = None, binsize = 86400, position="ellipse"):
+    def lightCurveMLE(self, sourceName, tmin = None, tmax = None, timetype = None, binsize = 86400, position="ellipse", workers = 1, resume = False, warmStart = False):
         """It generates a cvs file containing the data for a light curve plot.
 
         Args:
@@ -914,10 +974,64 @@ plotting:
             timetype (str, optional): the time format ('MJD' or 'TT'). It defaults to None. If None the 'timetype' value of the configuration file will be used.
             binsize (int, optional): temporal bin size. It defaults to 86400.
             position (str, optional): the position of the source: {"ellipse", "peak", "initial"}
+            workers (int, optional): the number of temporal bins analysed concurrently. Each worker analyses a contiguous \
+                group of bins with its own copy of the configuration and its own logger. It defaults to 1.
+            resume (bool, optional): if True, the last light curve analysis of the same source, interval and bin size is resumed: \
+                the bins with a valid .source file are kept and only the missing or failed bins are computed. If no such \
+                analysis exists a new one is started. It defaults to False.
+            warmStart (bool, optional): if True, the parameters fitted in a temporal bin are the starting values of the next \
+                bin (of the same worker), when they are within sanity bounds: converged fit, positive flux within a factor \
+                ``LC_WARM_START_MAX_FLUX_RATIO`` of the catalog flux, index within its limits and position within \
+                ``LC_WARM_START_MAX_DISTANCE`` degrees of the catalog position. The sources library is not modified. \
+                It defaults to False.
 
         Returns:
             The absolute path to the light curve data output file.
+
+        Raises:
+            ValueOutOfRange: if the number of workers is lower than 1.
+        """
+        for _ in self.iterLightCurveMLE(sourceName, tmin=tmin, tmax=tmax, timetype=timetype, binsize=binsize, position=position, workers=workers, resume=resume, warmStart=warmStart):
+            pass
+
+        return self.lightCurveData["mle"]
+
+    def iterLightCurveMLE(self, sourceName, tmin = None, tmax = None, timetype = None, binsize = 86400, position="ellipse", workers = 1, resume = False, warmStart = False):
+        """It computes the light curve like ``lightCurveMLE()``, yielding the light curve data of each temporal bin \
+        as soon as it is available. The rows are yielded (and appended to the light curve data output file) in temporal order.
+
+        Note:
+            When the iteration is completed, the path to the light curve data output file and the light curve table \
+            are available in the ``lightCurveData["mle"]`` and ``lightCurveTable["mle"]`` attributes. The ``lightCurveStats`` \
+            attribute is a table with the wall time, the AG_multi time and the minimizer iterations of each temporal bin.
+            If the iteration is stopped (e.g. with a ``break``), the temporal bins being computed are completed and \
+            the others are not started: they can be computed later with ``resume=True``.
+
+        Args:
+            sourceName (str): the name of the source under analysis.
+            tmin (float, optional): starting point of the light curve. It defaults to None. If None the 'tmin' value of the configuration file will be used.
+            tmax (float, optional): ending point of the light curve. It defaults to None. If None the 'tmax' value of the configuration file will be used.
+            timetype (str, optional): the time format ('MJD' or 'TT'). It defaults to None. If None the 'timetype' value of the configuration file will be used.
+            binsize (int, optional): temporal bin size. It defaults to 86400.
+            position (str, optional): the position of the source: {"ellipse", "peak", "initial"}
+            workers (int, optional): the number of temporal bins analysed concurrently. It defaults to 1.
+            resume (bool, optional): if True, the last light curve analysis of the same source, interval and bin size is resumed. It defaults to False.
+            warmStart (bool, optional): if True, the parameters fitted in a temporal bin are the starting values of the next bin. It defaults to False.
+
+        Yields:
+            A dictionary (column name -> value) with the light curve data of a temporal bin.
+
+        Raises:
+            ValueOutOfRange: if the number of workers is lower than 1.
+
+        Example:
+            >>> for row in aganalysis.iterLightCurveMLE("2AGLJ0835-4514", tmin=58884, tmax=58886, timetype="MJD"):
+            ...     print(row["time_start_mjd"], row["flux"])
         """
+        if workers < 1:
+            self.logger.critical(f"The number of workers must be greater than 0, got {workers}")
+            raise ValueOutOfRange(f"The number of workers must be greater than 0, got {workers}")
+
         self.logger.info("Computing light curve bins..please wait.")
 
         timeStart = time()
@@ -945,88 +1059,128 @@ plotting:
         self.logger.info(f"[LC] Using the tmin {tmin}, tmax {tmax}, number of temporal bins: {len(bins)}.")
 
 
-        processes = 1
-        binsForProcesses = AGAnalysis._chunkList(bins, processes)
-
         configBKP = AgilepyConfig.getCopy(self.config)
 
+        (_, last) = Utils._getFirstAndLastLineInFile(configBKP.getConf("input", "evtfile"))
+        idxTmax = float(Utils._extractTimes(last)[1])
+
+        lcBins = []
+        for idx, (t1, t2) in enumerate(bins):
+            if t2 > idxTmax:
+                newbinsize = idxTmax - t1
+                self.logger.warning( f"[LC] The last bin [{t1}, {t2}] of the light curve analysis falls outside the range of the available data [.. , {idxTmax}]. The binsize is reduced to {newbinsize} seconds, the new bin is [{t1}, {idxTmax}]")
+                t2 = idxTmax
+            lcBins.append((idx, t1, t2))
+
         # Creating the output directory if it does not exist
-        lcAnalysisDataDir = Path(configBKP.getConf("output","outdir")).joinpath("lc")
-        lcAnalysisDataDir.mkdir(exist_ok=True, parents=True)
-        lcAnalysisDataDir = Utils._createNextSubDir(lcAnalysisDataDir)
+        lcRootDir = Path(configBKP.getConf("output","outdir")).joinpath("lc")
+        lcRootDir.mkdir(exist_ok=True, parents=True)
+
+        fingerprint = self._getLightCurveFingerprint(configBKP, position)
+
+        manifest = None
+        if resume:
+            manifest = self._findLightCurveManifest(lcRootDir, sourceName, tmin, tmax, binsize, lcBins, fingerprint)
+
+        if manifest is None:
+            lcAnalysisDataDir = Utils._createNextSubDir(lcRootDir)
+            manifest = LightCurveManifest(lcAnalysisDataDir, sourceName, tmin, tmax, binsize, lcBins, fingerprint)
+            manifest.write()
+        else:
+            lcAnalysisDataDir = manifest.lcAnalysisDataDir
+            self._checkLightCurveBins(manifest, sourceName)
+            lcBins = manifest.getBins(LightCurveManifest.PENDING)
+            self.logger.info(f"[LC] Resuming the light curve analysis in {lcAnalysisDataDir}: {len(lcBins)} bins to be computed.")
+
         configBKP.setOptions(outdir=str(lcAnalysisDataDir))
 
-        (_, last) = Utils._getFirstAndLastLineInFile(configBKP.getConf("input", "evtfile"))
-        idxTmax = float(Utils._extractTimes(last)[1])
+        lcOutputFilePath = Path(lcAnalysisDataDir).joinpath(f"light_curve_{tstart}_{tstop}.txt")
 
-        # verboseLvl = configBKP.getConf("output","verboselvl")
+        columnNames = AGAnalysis._getUniqueColumnNames(AGAnalysis.LC_MLE_COLUMNS)
+        columns = [[] for _ in columnNames]
 
-        self.logger.info( f"[LC] Number of processes: {processes}, Number of bins per process {len(binsForProcesses[0])}")
+        workers = max(1, min(workers, len(lcBins)))
+        binsForWorkers = AGAnalysis._chunkList(lcBins, workers)
 
-        idx = 0
-        for bin in tqdm(bins, desc="Temporal bin loop"):
+        self.logger.info( f"[LC] Number of workers: {workers}, Number of bins per worker {len(binsForWorkers[0]) if binsForWorkers else 0}")
 
-            t1 = bin[0]
-            t2 = bin[1]
+        if workers > 1:
+            # The data of the whole light curve has already been downloaded: the workers only read it.
+            workersInputs = [(self._getLightCurveWorker(workerId), AgilepyConfig.getCopy(configBKP), workerBins) for workerId, workerBins in enumerate(binsForWorkers)]
+        else:
+            workersInputs = [(self, configBKP, workerBins) for workerBins in binsForWorkers]
 
-            if t2 > idxTmax:
-                newbinsize = idxTmax - t1
-                self.logger.warning( f"[LC] The last bin [{t1}, {t2}] of the light curve analysis falls outside the range of the available data [.. , {idxTmax}]. The binsize is reduced to {newbinsize} seconds, the new bin is [{t1}, {idxTmax}]")
-                t2 = idxTmax
+        initialSources = None
+        if warmStart:
+            # each worker updates the starting values of its own copy of the sources library
+            initialSources = {source.name: source for source in self.sourcesLibrary.sources}
+            workersInputs = [(self._getWarmStartWorker(analysis), config, workerBins) for analysis, config, workerBins in workersInputs]
 
-            self.logger.warning(f"[LC] Analysis of temporal bin: [{t1},{t2}] {idx+1}/{len(bins)}")
+        # the workers put the index of each completed bin and None when they exit
+        completedBinsQueue = Queue()
 
-            #binOutDir = str(lcAnalysisDataDir.joinpath(f"bin_{t1}_{t2}"))
+        # set when the caller stops iterating: the workers do not start other bins
+        stopEvent = Event()
 
-            binOutDir = str(lcAnalysisDataDir.joinpath(f"{idx}_bin_{t1}_{t2}"))
+        with open(lcOutputFilePath, "w") as lco, \
+             tqdm(total=len(lcBins), desc="Temporal bin loop") as progressBar, \
+             ThreadPoolExecutor(max_workers=workers) as executor:
 
+            lco.write(" ".join(AGAnalysis.LC_MLE_COLUMNS)+"\n")
 
-            configBKP.setOptions(filenameprefix="lc_analysis", outdir=binOutDir)
-            configBKP.setOptions(tmin = t1, tmax = t2, timetype = "TT")
-            
+            futures = [executor.submit(analysis._computeLcBins, workerBins, config, manifest, sourceName, position, progressBar, completedBinsQueue, initialSources, stopEvent) \
+                        for analysis, config, workerBins in workersInputs]
 
-            maplistObj = MapList(self.logger)
+            # e.g. a break in the caller loop closes the generator (GeneratorExit is raised at the yield):
+            # the bins already running are completed, the others are left pending in the manifest
+            try:
+                # the bins computed by a previous (resumed) analysis are already completed
+                completedBins = set(idx for idx, _, _ in manifest.getBins(LightCurveManifest.DONE))
+                allBins = manifest.getBins()
+                nextBin = 0
+                runningWorkers = len(futures)
 
-            maplistFilePath = self.generateMaps(config=configBKP, maplistObj=maplistObj, tqdmOff=False)
+                while True:
 
-            configBKP.setOptions(filenameprefix="lc_analysis", outdir = binOutDir)
-            configBKP.setOptions(tmin = t1, tmax = t2, timetype = "TT")
-            _ = self.mle(maplistFilePath = maplistFilePath, config = configBKP, updateSourceLibrary = False, position=position)
+                    # a bin is written as soon as all the previous bins have been completed
+                    while nextBin < len(allBins) and allBins[nextBin][0] in completedBins:
 
-            idx += 1
-        """
-        processes = []
-        for pID, pInputs in enumerate(binsForProcesses):
-            self.logger.info("generating process...(%d). Chunk size for process: %d"%(pID, len(pInputs)))
-            p = Process(target=self._computeLcBin, args=(pID, pInputs, configBKP, lcAnalysisDataDir, logsOutDir, verboseLvl))
-            processes.append((pID,p,len(pInputs)))
-
-        for pID, p, binsNumber in processes:
-            self.logger.info( "Starting process %d for %d bins", pID, binsNumber)
-            p.start()
-
-        for pID, p, binsNumber in processes:
-            p.join()
-        """
+                        for row in self._getLightCurveRows(sourceName, manifest.getProducts(allBins[nextBin][0])):
+                            lco.write(" ".join(map(str, row))+"\n")
+                            lco.flush()
+                            for column, value in zip(columns, row):
+                                column.append(value)
+                            yield dict(zip(columnNames, row))
 
-        lcData = self._getLightCurveData(sourceName, lcAnalysisDataDir, binsize)
+                        nextBin += 1
 
-        lcOutputFilePath = Path(lcAnalysisDataDir).joinpath(f"light_curve_{tstart}_{tstop}.txt")
+                    if runningWorkers == 0:
+                        break
+
+                    idx = completedBinsQueue.get()
+                    if idx is None:
+                        runningWorkers -= 1
+                    else:
+                        completedBins.add(idx)
 
-        with open(lcOutputFilePath, "w") as lco:
-            lco.write(lcData)
+            finally:
+                stopEvent.set()
+                for future in futures:
+                    future.cancel()
+
+            for future in futures:
+                future.result()
 
         self.logger.info( "Light curve created in %s", lcOutputFilePath)
 
         self.logger.info( "Took %f seconds.", time()-timeStart)
 
         self.lightCurveData["mle"] = str(lcOutputFilePath)
-        
+
         # Data Table
-        lc_table = Table.read(lcOutputFilePath, format='ascii')
-        self.lightCurveTable["mle"] = lc_table
+        self.lightCurveTable["mle"] = Table([AGAnalysis._toColumnArray(column) for column in columns], names=columnNames)
 
-        return str(lcOutputFilePath)
+        self.lightCurveStats = self._getLightCurveStats(manifest)
 
     def aperturePhotometry(self):
         """It generates a cvs file containing the data for a light curve plot.
@@ -1038,7 +1192,7 @@ plotting:
         Raises:
             ScienceToolInputArgMissing: if not all the required configuration options have been set.
         """
-        apTool = AP("AG_ap", self.logger)
+        apTool = self._createTool(AP, "AG_ap")
 
         apTool.configureTool(self.config)
 
@@ -1307,76 +1461,136 @@ plotting:
     # private methods                                                          #
     ############################################################################
 
-    def _getLightCurveData(self, sourceName, lcAnalysisDataDir, binsize):
+    def _getLightCurveRows(self, sourceName, sourceFiles):
+        """
+        It returns the light curve data (one list of values per row, see ``LC_MLE_COLUMNS``) extracted from the .source files of a temporal bin.
+        """
+        rows = []
 
-        binDirectories = sorted(os.listdir(lcAnalysisDataDir))
+        for sourceFile in sourceFiles:
 
-        lcData = "time_start_mjd time_end_mjd sqrt(ts) flux flux_err flux_ul gal gal_error iso iso_error l_peak b_peak dist_peak " \
-        "l b r ell_dist a b phi exposure ExpRatio counts counts_err Index Index_Err Par2 Par2_Err Par3 Par3_Err Erglog Erglog_Err " \
-        "Erglog_UL time_start_utc time_end_utc time_start_tt time_end_tt Fix index ULConfidenceLevel SrcLocConfLevel start_l start_b start_flux " \
-        "typefun par2 par3 galmode2 galmode2fit isomode2 isomode2fit edpcor fluxcor integratortype expratioEval expratio_minthr expratio_maxthr " \
-        "expratio_size Emin emax fovmin fovmax albedo binsize expstep phasecode fit_cts fit_fitstatus0 fit_fcn0 fit_edm0 fit_nvpar0 fit_nparx0 fit_iter0 " \
-        "fit_fitstatus1 fit_fcn1 fit_edm1 fit_nvpar1 fit_nparx1 fit_iter1 fit_Likelihood1\n"
-        
-        timecounter = 0
+            mleOutputFilename, mleOutputFileExtension = splitext(basename(sourceFile))
 
-        for bd in binDirectories:
+            if mleOutputFileExtension != ".source" or sourceName not in mleOutputFilename:
+                continue
 
-            mleOutputDirectories = Path(lcAnalysisDataDir).joinpath(bd,"mle","0")
+            lcDataDict = self._extractLightCurveDataFromSourceFile(str(sourceFile))
 
-            mleOutputFiles = os.listdir(mleOutputDirectories)
+            time_start_mjd = AstroUtils.time_agile_seconds_to_mjd(lcDataDict["time_start_tt"])
+            time_end_mjd   = AstroUtils.time_agile_seconds_to_mjd(lcDataDict["time_end_tt"])
 
-            for mleOutputFile in mleOutputFiles:
+            lcDataDict["time_start_mjd"] = time_start_mjd
+            lcDataDict["time_end_mjd"]   = time_end_mjd
+            lcDataDict["time_start_utc"] = AstroUtils.time_mjd_to_fits(time_start_mjd)
+            lcDataDict["time_end_utc"]   = AstroUtils.time_mjd_to_fits(time_end_mjd)
 
-                mleOutputFilename, mleOutputFileExtension = splitext(mleOutputFile)
+            if "nan" in lcDataDict['flux']:
+                lcDataDict['flux'] = 0
+                lcDataDict['flux_err'] = 0
+                lcDataDict['flux_ul'] = 0
 
-                if mleOutputFileExtension == ".source" and sourceName in mleOutputFilename:
+            rows.append([lcDataDict[AGAnalysis.LC_MLE_KEYS.get(column, column)] for column in AGAnalysis.LC_MLE_COLUMNS])
 
-                    mleOutputFilepath = mleOutputDirectories.joinpath(mleOutputFile)
+        return rows
 
-                    lcDataDict = self._extractLightCurveDataFromSourceFile(str(mleOutputFilepath))
+    @staticmethod
+    def _getUniqueColumnNames(columnNames):
+        """
+        It renames the repeated column names appending _1, _2, ... (as astropy does when reading a table).
+        """
+        uniqueNames = []
+        for name in columnNames:
+            uniqueName = name
+            counter = 0
+            while uniqueName in uniqueNames:
+                counter += 1
+                uniqueName = f"{name}_{counter}"
+            uniqueNames.append(uniqueName)
+        return uniqueNames
+
+    @staticmethod
+    def _toColumnArray(values):
+        """
+        It converts the values of a light curve column into an int, float or string array (as astropy does when reading a table).
+        """
+        values = np.array([str(value) for value in values])
+        for dtype in (np.int64, np.float64):
+            try:
+                return values.astype(dtype)
+            except ValueError:
+                pass
+        return values
+
+    def _generateMapsCell(self, config, initialFileNamePrefix, stepi, bincenter, fovmin, fovmax, bgCoeffIdx, stepe):
+        """
+        It runs the cts, exp, gas and int map generators for a single (fov bin, energy bin) cell
+        and it returns the corresponding maplist row.
+        """
+        emin = stepe[0]
+        emax = stepe[1]
+
+        tmin = config.getOptionValue("tmin")
+        tmax = config.getOptionValue("tmax")
+        glon = config.getOptionValue("glon")
+        glat = config.getOptionValue("glat")
 
-                    time_start_tt = lcDataDict["time_start_tt"] # + binsize * timecounter
-                    time_end_tt   = lcDataDict["time_end_tt"]   # + binsize * timecounter
+        skymapL = Parameters.getSkyMap(emin, emax, config.getOptionValue("filtercode"), config.getOptionValue("irf"))
+        skymapH = Parameters.getSkyMap(emin, emax, config.getOptionValue("filtercode"), config.getOptionValue("irf"))
+        fileNamePrefix = Parameters.getMapNamePrefix(tmin, tmax, emin, emax, glon, glat, stepi+1)
 
-                    time_start_mjd = AstroUtils.time_agile_seconds_to_mjd(time_start_tt)
-                    time_end_mjd   = AstroUtils.time_agile_seconds_to_mjd(time_end_tt)
+        self.logger.debug("Map generation => fovradmin %s fovradmax %s bincenter %s emin %s emax %s fileNamePrefix %s skymapL %s skymapH %s", \
+                            fovmin,fovmax,bincenter,emin,emax,fileNamePrefix,skymapL,skymapH)
 
-                    time_start_utc = AstroUtils.time_mjd_to_fits(time_start_mjd)
-                    time_end_utc   = AstroUtils.time_mjd_to_fits(time_end_mjd)
 
-                    # time_start_mjd time_end_mjd sqrt(ts) flux flux_err flux_ul gal gal_error iso iso_error l_peak b_peak dist
-                    # l b r ell_dist a b phi exposure ExpRatio counts counts_err Index Index_Err Par2 Par2_Err Par3 Par3_Err Erglog Erglog_Err
-                    # Erglog_UL time_start_utc time_end_utc time_start_tt time_end_tt Fix index ULConfidenceLevel SrcLocConfLevel start_l start_b start_flux
-                    # typefun par2 par3 galmode2 galmode2fit isomode2 isomode2fit edpcor fluxcor integratortype expratioEval expratio_minthr expratio_maxthr
-                    # expratio_size Emin emax fovmin fovmax albedo binsize expstep phasecode fit_cts fit_fitstatus0 fit_fcn0 fit_edm0 fit_nvpar0 fit_nparx0 fit_iter0
-                    # fit_fitstatus1 fit_fcn1 fit_edm1 fit_nvpar1 fit_nparx1 fit_iter1 fit_Likelihood1
+        config.setOptions(filenameprefix=initialFileNamePrefix+"_"+fileNamePrefix)
+        config.setOptions(dq=0, fovradmin=int(fovmin), fovradmax=int(fovmax))
+        config.setOptions(energybins=[[emin, emax]])
 
-                    if "nan" in lcDataDict['flux']:
-                        lcDataDict['flux'] = 0
-                        lcDataDict['flux_err'] = 0
-                        lcDataDict['flux_ul'] = 0
+        config.addOptions("maps", skymapL=skymapL, skymapH=skymapH)
 
-                    lcData += f"{time_start_mjd} {time_end_mjd} {lcDataDict['sqrt(ts)']} {lcDataDict['flux']} {lcDataDict['flux_err']} {lcDataDict['flux_ul']} " \
-                        f"{lcDataDict['gal']} {lcDataDict['gal_error']} {lcDataDict['iso']} {lcDataDict['iso_error']} "\
-                        f"{lcDataDict['l_peak']} {lcDataDict['b_peak']} {lcDataDict['dist_peak']} {lcDataDict['l']} {lcDataDict['b']} {lcDataDict['r']} "\
-                        f"{lcDataDict['ell_dist']} {lcDataDict['a']} {lcDataDict['b']} {lcDataDict['phi']} {lcDataDict['exp']} {lcDataDict['ExpRatio']} "\
-                        f"{lcDataDict['counts']} {lcDataDict['counts_err']} {lcDataDict['Index']} {lcDataDict['Index_Err']} {lcDataDict['Par2']} {lcDataDict['Par2_Err']} "\
-                        f"{lcDataDict['Par3']} {lcDataDict['Par3_Err']} {lcDataDict['Erglog']} {lcDataDict['Erglog_Err']} {lcDataDict['Erglog_UL']} "\
-                        f"{time_start_utc} {time_end_utc} {lcDataDict['time_start_tt']} {lcDataDict['time_end_tt']} "\
-                        f"{lcDataDict['Fix']} {lcDataDict['index']} {lcDataDict['ULConfidenceLevel']} {lcDataDict['SrcLocConfLevel']} {lcDataDict['start_l']} "\
-                        f"{lcDataDict['start_b']} {lcDataDict['start_flux']} {lcDataDict['typefun']} {lcDataDict['par2']} {lcDataDict['par3']} {lcDataDict['galmode2']} "\
-                        f"{lcDataDict['galmode2fit']} {lcDataDict['isomode2']} {lcDataDict['isomode2fit']} {lcDataDict['edpcor']} {lcDataDict['fluxcor']} {lcDataDict['integratortype']} "\
-                        f"{lcDataDict['expratioEval']} {lcDataDict['expratio_minthr']} {lcDataDict['expratio_maxthr']} {lcDataDict['expratio_size']} {lcDataDict['emin']} {lcDataDict['emax']} "\
-                        f"{lcDataDict['fovmin']} {lcDataDict['fovmax']} {lcDataDict['albedo']} {lcDataDict['binsize']} {lcDataDict['expstep']} {lcDataDict['phasecode']} " \
-                        f"{lcDataDict['fit_cts']} {lcDataDict['fit_fitstatus0']} {lcDataDict['fit_fcn0']} {lcDataDict['fit_edm0']} {lcDataDict['fit_nvpar0']} {lcDataDict['fit_nparx0']} " \
-                        f"{lcDataDict['fit_iter0']} {lcDataDict['fit_fitstatus1']} {lcDataDict['fit_fcn1']} {lcDataDict['fit_edm1']} {lcDataDict['fit_nvpar1']} {lcDataDict['fit_nparx1']} " \
-                        f"{lcDataDict['fit_iter1']} {lcDataDict['fit_Likelihood1']}\n"
 
-                    timecounter += 1
+        ctsMapGenerator = self._createTool(CtsMapGenerator, "AG_ctsmapgen")
+        expMapGenerator = self._createTool(ExpMapGenerator, "AG_expmapgen")
+        gasMapGenerator = self._createTool(GasMapGenerator, "AG_gasmapgen")
+        intMapGenerator = self._createTool(IntMapGenerator, "AG_intmapgen")
 
+        ctsMapGenerator.configureTool(config)
+        expMapGenerator.configureTool(config)
+        gasMapGenerator.configureTool(config, {"expMapGeneratorOutfilePath": next(iter(expMapGenerator.products.items()))[0]})
+        intMapGenerator.configureTool(config, {"expMapGeneratorOutfilePath": next(iter(expMapGenerator.products.items()))[0], "ctsMapGeneratorOutfilePath" : next(iter(ctsMapGenerator.products.items()))[0]})
 
-        return lcData
+        config.addOptions("maps", expmap=next(iter(expMapGenerator.products.items()))[0], ctsmap=next(iter(ctsMapGenerator.products.items()))[0])
+
+        if not ctsMapGenerator.allRequiredOptionsSet(config) or \
+            not expMapGenerator.allRequiredOptionsSet(config) or \
+            not gasMapGenerator.allRequiredOptionsSet(config) or \
+            not intMapGenerator.allRequiredOptionsSet(config):
+
+            raise ScienceToolInputArgMissing("Some options have not been set.")
+
+        ctsOutfilePath = next(iter(ctsMapGenerator.products.items()))[0]
+        expOutfilePath = next(iter(expMapGenerator.products.items()))[0]
+
+        # cts and exp maps are generated concurrently, gas and int maps as soon as their inputs exist
+        scheduler = ToolScheduler(self.logger)
+
+        if self.mapCubeStore is not None and self.mapCubeStore.canStack(tmin, tmax):
+            if not (os.path.isfile(ctsOutfilePath) and os.path.isfile(expOutfilePath)):
+                self.mapCubeStore.stackMaps(config, ctsOutfilePath, expOutfilePath)
+        else:
+            scheduler.addTool(ctsMapGenerator)
+            scheduler.addTool(expMapGenerator)
+
+        scheduler.addTool(gasMapGenerator)
+        scheduler.addTool(intMapGenerator)
+        scheduler.run()
+
+        return (next(iter(ctsMapGenerator.products.items()))[0], \
+                next(iter(expMapGenerator.products.items()))[0], \
+                next(iter(gasMapGenerator.products.items()))[0], \
+                str(bincenter), \
+                str(config.getOptionValue("galcoeff")[bgCoeffIdx]), \
+                str(config.getOptionValue("isocoeff")[bgCoeffIdx]))
 
     @staticmethod
     def _updateFovMinMaxValues(fovbinnumber, fovradmin, fovradmax, stepi):
@@ -1396,31 +1610,302 @@ plotting:
         return bincenter, fovmin, fovmax
 
 
-    """
-    The light curve data generation could be parallalezed..
-    def _computeLcBin(self, threadID, bins, configBKP, lcAnalysisDataDir, logsOutDir, verboseLvl):
+    def _getLightCurveWorker(self, workerId):
+        """
+        It returns a shallow copy of the analysis with its own logger, AG_multi tool and maplist, used
+        by a light curve worker. The sources library is shared: it is only read by the light curve bins.
+        """
+        worker = copy(self)
+        worker.logger = self.agilepyLogger.getLogger(__name__, f"AGAnalysis_lc{workerId}")
+        worker.multiTool = Multi("AG_multi", worker.logger)
+        worker.multiTool.runLog = self.runLog
+        worker.currentMapList = MapList(worker.logger)
+        return worker
+
+    def _getWarmStartWorker(self, analysis):
+        """
+        It returns a shallow copy of a light curve worker with its own copy of the sources library,
+        whose starting values are updated bin after bin.
+        """
+        worker = copy(analysis)
+        worker.sourcesLibrary = self.sourcesLibrary.getCopy()
+        return worker
 
-        logger = AgilepyLogger()
+    def _computeLcBins(self, lcBins, configBKP, manifest, sourceName, position, progressBar, completedBinsQueue, initialSources=None, stopEvent=None):
+        try:
+            self._computeLcBinsLoop(lcBins, configBKP, manifest, sourceName, position, progressBar, completedBinsQueue, initialSources, stopEvent)
+        finally:
+            completedBinsQueue.put(None)
 
-        logger.initialize(logsOutDir, verboseLvl)
+    def _computeLcBinsLoop(self, lcBins, configBKP, manifest, sourceName, position, progressBar, completedBinsQueue, initialSources=None, stopEvent=None):
 
-        # outputs = []
+        lcAnalysisDataDir = manifest.lcAnalysisDataDir
+        binsNumber = len(manifest.bins)
 
-        for t1,t2 in bins:
+        warmStart = initialSources is not None
+        if warmStart:
+            self.sourcesLibrary.backupSL()
 
-            binOutDir = f'{lcAnalysisDataDir}/bin_{t1}_{t2}'
+        previousIdx = None
+        warmStarted = False
 
-            configBKP.setOptions(filenameprefix = "lc_analysis", outdir = binOutDir)
-            configBKP.setOptions(tmin = t1, tmax = t2, timetype = "TT")
+        for idx, t1, t2 in lcBins:
 
-            maplistFilePath = self.generateMaps(configBKP)
+            if stopEvent is not None and stopEvent.is_set():
+                self.logger.info(f"[LC] The light curve analysis has been stopped: the temporal bin [{t1},{t2}] is not computed.")
+                break
 
-            configBKP.setOptions(filenameprefix = "lc_analysis", outdir = binOutDir)
-            configBKP.setOptions(tmin = t1, tmax = t2, timetype = "TT")
+            self.logger.warning(f"[LC] Analysis of temporal bin: [{t1},{t2}] {idx+1}/{binsNumber}")
+
+            # the fitted values are carried over to the next bin only (e.g. not across the bins kept by a resumed analysis)
+            if warmStarted and idx != previousIdx + 1:
+                self.sourcesLibrary.restoreSL()
+                self.sourcesLibrary.backupSL()
+                warmStarted = False
+
+            binOutDir = str(lcAnalysisDataDir.joinpath(f"{idx}_bin_{t1}_{t2}"))
+
+            manifest.setStatus(idx, LightCurveManifest.RUNNING)
+
+            binTimeStart = time()
+
+            try:
+                configBKP.setOptions(filenameprefix="lc_analysis", outdir=binOutDir)
+                configBKP.setOptions(tmin = t1, tmax = t2, timetype = "TT")
+
+                maplistObj = MapList(self.logger)
+
+                maplistFilePath = self.generateMaps(config=configBKP, maplistObj=maplistObj, tqdmOff=False)
+
+                configBKP.setOptions(filenameprefix="lc_analysis", outdir = binOutDir)
+                configBKP.setOptions(tmin = t1, tmax = t2, timetype = "TT")
+
+                mleTimeStart = time()
+                _ = self.mle(maplistFilePath = maplistFilePath, config = configBKP, updateSourceLibrary = False, position=position)
+                mleTime = time() - mleTimeStart
+
+            except Exception:
+                manifest.setStatus(idx, LightCurveManifest.FAILED)
+                raise
+
+            sourceFiles = self._getLightCurveBinSourceFiles(binOutDir, sourceName)
+
+            manifest.setStats(idx, self._getLightCurveBinStats(sourceFiles, warmStarted, time() - binTimeStart, mleTime))
+
+            if warmStart and sourceFiles:
+                updatedSources = self._warmStartSources(binOutDir, initialSources, configBKP)
+                self.logger.info(f"[LC] Starting values of the next temporal bin updated for {len(updatedSources)} sources: {updatedSources}")
+                warmStarted = warmStarted or len(updatedSources) > 0
+
+            previousIdx = idx
+
+            manifest.setStatus(idx, LightCurveManifest.DONE if sourceFiles else LightCurveManifest.FAILED, sourceFiles)
+
+            completedBinsQueue.put(idx)
+
+            progressBar.update(1)
+
+    def _getLightCurveBinStats(self, sourceFiles, warmStarted, binTime, mleTime):
+        """
+        It returns the statistics of a temporal bin: wall time of the bin and of AG_multi, minimizer iterations
+        of the source under analysis and whether the bin started from the values fitted in the previous bin.
+        """
+        stats = {"warm_start": warmStarted, "time": binTime, "mle_time": mleTime, "fit_iter0": None, "fit_iter1": None}
+
+        if sourceFiles:
+            multiAnalysisResult = self.sourcesLibrary.parseSourceFile(sourceFiles[0])
+            stats["fit_iter0"] = multiAnalysisResult.getVal("multiFitIter0")
+            stats["fit_iter1"] = multiAnalysisResult.getVal("multiFitIter1")
+
+        return stats
+
+    def _warmStartSources(self, binOutDir, initialSources, config):
+        """
+        It updates the sources library with the values fitted in a temporal bin, if they are within the
+        sanity bounds (see ``_isValidWarmStart()``).
+
+        Returns:
+            The names of the updated sources.
+        """
+        mleOutputDirectory = Path(binOutDir).joinpath("mle", "0")
+
+        mapCenterL = float(config.getOptionValue("glon"))
+        mapCenterB = float(config.getOptionValue("glat"))
+
+        sourcesByName = {source.name: source for source in self.sourcesLibrary.sources}
+
+        updatedSources = []
+
+        for sourceFile in sorted(mleOutputDirectory.glob("*.source")):
+
+            try:
+                multiAnalysisResult = self.sourcesLibrary.parseSourceFile(str(sourceFile))
+            except (FileSourceParsingError, IndexError, ValueError):
+                continue
+
+            sourceName = multiAnalysisResult.getVal("multiName")
+
+            if sourceName not in sourcesByName or sourceName not in initialSources:
+                continue
+
+            if not AGAnalysis._isValidWarmStart(initialSources[sourceName], multiAnalysisResult):
+                self.logger.debug(f"[LC] The values fitted for {sourceName} are out of the warm start bounds.")
+                continue
+
+            sourcesByName[sourceName].updateMultiAnalysis(multiAnalysisResult, mapCenterL, mapCenterB)
+            updatedSources.append(sourceName)
+
+        return updatedSources
+
+    @staticmethod
+    def _isValidWarmStart(initialSource, multiAnalysisResult):
+        """
+        It returns True if the values fitted by AG_multi can be the starting values of the next temporal bin:
+        the fit converged, the flux is positive and within a factor LC_WARM_START_MAX_FLUX_RATIO of the initial
+        flux, the index is within its limits and the peak position is within LC_WARM_START_MAX_DISTANCE degrees
+        of the initial position.
+        """
+        # -1 means that the minimizer step has been skipped
+        fitStatus = multiAnalysisResult.getVal("multiFitFitstatus1")
+        if fitStatus is None or fitStatus == -1:
+            fitStatus = multiAnalysisResult.getVal("multiFitFitstatus0")
+        if fitStatus != 0:
+            return False
+
+        flux = multiAnalysisResult.getVal("multiFlux")
+        if not isinstance(flux, (int, float)) or not np.isfinite(flux) or flux <= 0:
+            return False
+
+        initialFlux = initialSource.getVal("flux")
+        if initialFlux and not initialFlux / AGAnalysis.LC_WARM_START_MAX_FLUX_RATIO <= flux <= initialFlux * AGAnalysis.LC_WARM_START_MAX_FLUX_RATIO:
+            return False
+
+        index = multiAnalysisResult.getVal("multiIndex")
+        indexParameter = initialSource.get("index1") if initialSource.spectrum.getType() == "PLSuperExpCutoff" else initialSource.get("index")
+        if not isinstance(index, (int, float)) or not indexParameter["min"] <= index <= indexParameter["max"]:
+            return False
+
+        lPeak = multiAnalysisResult.getVal("multiLPeak")
+        bPeak = multiAnalysisResult.getVal("multiBPeak")
+        if lPeak is None or bPeak is None or lPeak == -1 or bPeak == -1:
+            return False
+
+        initialL, initialB = initialSource.getVal("pos")
+        if AstroUtils.distance_array(lPeak, bPeak, initialL, initialB) > AGAnalysis.LC_WARM_START_MAX_DISTANCE:
+            return False
+
+        return True
+
+    def _getLightCurveStats(self, manifest):
+        """
+        It returns a table with the statistics of the temporal bins (see ``_getLightCurveBinStats()``) and it logs a summary.
+        """
+        rows = []
+        for idx, t1, t2 in manifest.getBins():
+            stats = manifest.getStats(idx)
+            if stats is not None:
+                rows.append((idx, t1, t2, stats["warm_start"], stats["time"], stats["mle_time"], \
+                             np.nan if stats["fit_iter0"] is None else stats["fit_iter0"], \
+                             np.nan if stats["fit_iter1"] is None else stats["fit_iter1"]))
+
+        names = ("bin", "tmin_tt", "tmax_tt", "warm_start", "time", "mle_time", "fit_iter0", "fit_iter1")
+        statsTable = Table(rows=rows, names=names, dtype=(int, float, float, bool, float, float, float, float))
+
+        for warmStart in (False, True):
+            binsStats = statsTable[statsTable["warm_start"] == warmStart]
+            if len(binsStats) > 0:
+                iterations = [np.mean(binsStats[column][np.isfinite(binsStats[column])]) if np.isfinite(binsStats[column]).any() else np.nan \
+                              for column in ("fit_iter0", "fit_iter1")]
+                self.logger.info(f"[LC] {'Warm' if warmStart else 'Cold'} started bins: {len(binsStats)}, " \
+                                 f"mean time: {np.mean(binsStats['time']):.2f} s, mean AG_multi time: {np.mean(binsStats['mle_time']):.2f} s, " \
+                                 f"mean iterations: {iterations[0]:.1f} (step 0), {iterations[1]:.1f} (step 1)")
+
+        return statsTable
+
+    def _getLightCurveFingerprint(self, config, position):
+        """
+        It returns a digest of the options used by the temporal bins (the time interval excluded)
+        and of the sources library as it is written for AG_multi.
+        """
+        options = {section: config.getConf(section) for section in ("input", "selection", "maps", "model", "mle")}
+        options["selection"] = {option: value for option, value in options["selection"].items() \
+                                if option not in ("tmin", "tmax", "timetype")}
+
+        digest = hashlib.sha256()
+        digest.update(json.dumps(options, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(self.sourcesLibrary._convertToAgileFormat(self.sourcesLibrary.sources, position=position).encode("utf-8"))
+
+        return digest.hexdigest()
+
+    def _findLightCurveManifest(self, lcRootDir, sourceName, tmin, tmax, binsize, lcBins, fingerprint):
+        """
+        It returns the manifest of the most recent light curve analysis with the same source, interval, bins,
+        analysis options and sources library, or None.
+        """
+        lcDirs = sorted([int(name) for name in os.listdir(lcRootDir) if name.isdigit()], reverse=True)
+
+        skippedDirs = []
+
+        for lcDir in lcDirs:
+            manifest = LightCurveManifest.load(lcRootDir.joinpath(str(lcDir)))
+            if manifest is None or not manifest.matches(sourceName, tmin, tmax, binsize) or manifest.getBins() != lcBins:
+                continue
+            if manifest.matches(sourceName, tmin, tmax, binsize, fingerprint):
+                return manifest
+            skippedDirs.append(str(manifest.lcAnalysisDataDir))
+
+        if skippedDirs:
+            self.logger.warning(f"[LC] The light curve analyses in {skippedDirs} were computed with different options or sources: a new analysis is started.")
+
+        return None
+
+    def _checkLightCurveBins(self, manifest, sourceName):
+        """
+        It marks as done the bins having a valid .source file. The output directories of the other bins are removed.
+        """
+        for idx, t1, t2 in manifest.getBins():
+
+            binOutDir = manifest.lcAnalysisDataDir.joinpath(f"{idx}_bin_{t1}_{t2}")
+
+            sourceFiles = self._getLightCurveBinSourceFiles(binOutDir, sourceName)
+
+            if sourceFiles:
+                manifest.setStatus(idx, LightCurveManifest.DONE, sourceFiles)
+            else:
+                if manifest.getStatus(idx) != LightCurveManifest.PENDING:
+                    self.logger.warning(f"[LC] The temporal bin [{t1},{t2}] ({manifest.getStatus(idx)}) will be computed again.")
+                rmtree(binOutDir, ignore_errors=True)
+                manifest.setStatus(idx, LightCurveManifest.PENDING, [])
+
+    def _getLightCurveBinSourceFiles(self, binOutDir, sourceName):
+        """
+        It returns the valid .source files of sourceName produced by AG_multi for a temporal bin.
+        """
+        mleOutputDirectory = Path(binOutDir).joinpath("mle", "0")
+
+        if not mleOutputDirectory.is_dir():
+            return []
+
+        sourceFiles = []
+
+        for mleOutputFile in sorted(os.listdir(mleOutputDirectory)):
+
+            mleOutputFilename, mleOutputFileExtension = splitext(mleOutputFile)
+
+            if mleOutputFileExtension == ".source" and sourceName in mleOutputFilename:
+
+                mleOutputFilepath = str(mleOutputDirectory.joinpath(mleOutputFile))
+
+                try:
+                    self.sourcesLibrary.parseSourceFile(mleOutputFilepath)
+                except (FileSourceParsingError, IndexError, ValueError):
+                    self.logger.warning(f"[LC] The file {mleOutputFilepath} is not valid.")
+                    return []
+
+                sourceFiles.append(mleOutputFilepath)
+
+        return sourceFiles
 
-            _ = self.mle(maplistFilePath = maplistFilePath, config = configBKP, updateSourceLibrary = False)
-    """
-    
     @staticmethod
     def _chunkList(lst, num):
         avg = len(lst) / float(num)
@@ -35,6 +35,7 @@ import matplotlib.pyplot as plt
 
 from agilepy.utils.Utils import Utils
 from agilepy.core.ScienceTools import Cwt2, Met, Ccl
+from agilepy.core.ToolScheduler import ToolScheduler
 from agilepy.core.AGBaseAnalysis import AGBaseAnalysis
 
 
@@ -131,25 +132,25 @@ wavelet:
     """
 
       ####-------CWT2------------------
-      self.logger.info("Running CWT2..")
-      cwt2 = Cwt2("python3 $AGILE/scripts/PYWTOOLS/cwt2d.py", self.logger)
+      cwt2 = self._createTool(Cwt2, "python3 $AGILE/scripts/PYWTOOLS/cwt2d.py")
       cwt2.configureTool(self.config)
-      f1 = cwt2.call()
 
       ####-------MET--------------
-      self.logger.info("Running MET..")
-      met = Met("python3 $AGILE/scripts/PYWTOOLS/met2d.py", self.logger)
-      extraParams = {"Cwt2OutfilePath":f1}
+      met = self._createTool(Met, "python3 $AGILE/scripts/PYWTOOLS/met2d.py")
+      extraParams = {"Cwt2OutfilePath":list(cwt2.products)}
       met.configureTool(self.config, extraParams=extraParams)
-      f2 = met.call()
-
 
       ####------CCL----------
-      self.logger.info("Running CCL..")        
-      ccl = Ccl("python3 $AGILE/scripts/PYWTOOLS/ccl2d.py", self.logger)
-      extraParams = {"MetOutfilePath":f2}
+      ccl = self._createTool(Ccl, "python3 $AGILE/scripts/PYWTOOLS/ccl2d.py")
+      extraParams = {"MetOutfilePath":list(met.products)}
       ccl.configureTool(self.config, extraParams=extraParams)
-      f3 = ccl.call()
+
+      self.logger.info("Running CWT2, MET and CCL..")
+      scheduler = ToolScheduler(self.logger)
+      scheduler.addTool(cwt2)
+      scheduler.addTool(met)
+      scheduler.addTool(ccl)
+      f1, f2, f3 = scheduler.run()
 
       return f1[0], f2[0], f3[0]
 
@@ -31,6 +31,8 @@ from shutil import rmtree
 
 from agilepy.config.AgilepyConfig import AgilepyConfig
 from agilepy.utils.Utils import Utils
+from agilepy.utils.ProductCache import ProductCache
+from agilepy.utils.RunLog import RunLog
 from agilepy.core.AgilepyLogger import AgilepyLogger
 from agilepy.utils.PlottingUtils import PlottingUtils
 from agilepy.config.ValidationStrategies import ValidationStrategies
@@ -60,6 +62,14 @@ class AGBaseAnalysis:
 
         self.plottingUtils = PlottingUtils(self.config, self.agilepyLogger.getLogger(__name__, "PlottingUtils"))
 
+        self.productCache = None
+
+        # the science tools invocations are recorded in the run log
+        self.runLog = RunLog(Path(self.outdir).joinpath(RunLog.FILENAME))
+
+        # None: the science tools are executed in the calling thread
+        self.executor = None
+
         if "AGILE" not in os.environ:
             raise AGILENotFoundError("$AGILE is not set.")
 
@@ -105,6 +115,88 @@ class AGBaseAnalysis:
 
 
 
+    def enableProductCache(self, cacheDir=None, maxSize=10*1024**3):
+        """It enables a cache of the science tools products. If a science tool is called again with the same
+        arguments and input files, its products are restored from the cache instead of running the tool again.
+
+        Args:
+            cacheDir (str, optional): the cache directory. It can be shared by several analyses. It defaults to None: \
+                the 'product_cache' directory inside the output directory will be used.
+            maxSize (int, optional): the maximum size (bytes) of the cache. The least recently used products are evicted \
+                when the size is exceeded. It defaults to 10 GB.
+
+        Returns:
+            The ProductCache object.
+        """
+        if cacheDir is None:
+            cacheDir = Path(self.outdir).joinpath("product_cache")
+
+        self.productCache = ProductCache(Utils._expandEnvVar(str(cacheDir)), maxSize, self.logger)
+
+        self.logger.info(f"Product cache enabled in {cacheDir}")
+
+        return self.productCache
+
+    def disableProductCache(self):
+        """It disables the cache of the science tools products. The cache directory is not removed.
+        """
+        self.productCache = None
+
+    def getProductCacheStatistics(self):
+        """It returns the statistics of the product cache.
+
+        Returns:
+            A dictionary with the number of hits, misses, stores, evictions, entries and the size (bytes) of the cache, or None if the cache is not enabled.
+        """
+        if self.productCache is None:
+            return None
+
+        return self.productCache.getStatistics()
+
+    def setExecutor(self, executor=None):
+        """It sets the executor of the science tools used by the analysis methods (e.g. generateMaps, mle, calcBkg, lightCurveMLE).
+
+        Args:
+            executor (Executor, optional): a SerialExecutor, LocalPoolExecutor or JobQueueExecutor (see agilepy.utils.Executors). \
+                It defaults to None: the science tools are executed in the calling thread.
+
+        Example:
+            >>> from agilepy.utils.Executors import JobQueueExecutor
+            >>> aganalysis.setExecutor(JobQueueExecutor("/shared/agilepy_queue"))
+        """
+        self.executor = executor
+
+    def getSlowestToolCalls(self, topN=10):
+        """It returns the science tools calls with the longest wall time, read from the run log of the analysis.
+
+        Args:
+            topN (int, optional): the number of calls. It defaults to 10.
+
+        Returns:
+            A list of dictionaries with the tool name, status, wall time, user and system CPU time, peak RSS (kB), \
+            exit code, arguments hash and products sizes of each call.
+        """
+        return self.runLog.getSlowest(topN)
+
+    def getToolCallsSummary(self, topN=None):
+        """It returns the science tools sorted by total wall time, aggregating the calls recorded in the run log of the analysis.
+
+        Args:
+            topN (int, optional): the number of tools. It defaults to None (all the tools).
+
+        Returns:
+            A list of dictionaries with the tool name, the number of calls (failed and cached), the total, mean and max \
+            wall time, the total CPU time and the max peak RSS (kB).
+        """
+        return self.runLog.getSummary(topN)
+
+    def _createTool(self, toolClass, exeName):
+        tool = toolClass(exeName, self.logger)
+        tool.productCache = self.productCache
+        tool.runLog = self.runLog
+        tool.executor = self.executor
+        return tool
+
     def setOptions(self, **kwargs):
         """It updates configuration options specifying one or more key=value pairs at once.
 
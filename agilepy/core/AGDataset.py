@@ -1,18 +1,23 @@
 import os
 import shutil
 import tarfile
+import tempfile
 import calendar
 import datetime
 from time import time
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from agilepy.core.CustomExceptions import SSDCRestErrorDownload, NoCoverageDataError
 from agilepy.utils.AGRest import AGRest
 from agilepy.core.ScienceTools import Indexgen
+from agilepy.core.CoverageIndex import CoverageIndex
 from agilepy.utils.AstroUtils import AstroUtils
 
+import numpy as np
 import pandas as pd
 from enum import Enum
+from astropy.io import fits
 
 class DataStatus(Enum):
     OK = 0
@@ -24,9 +29,17 @@ class AGDataset:
     to download AGILE EVT and LOG data and it creates query files in order to keep the data requests updated.
     """
 
-    def __init__(self, logger, datacoveragepath=Path(__file__).parent.resolve().joinpath("../utils/AGILE_datacoverage").resolve()):
+    def __init__(self, logger, datacoveragepath=Path(__file__).parent.resolve().joinpath("../utils/AGILE_datacoverage").resolve(), downloadWorkers=4, agrest=None):
+        """
+        Args:
+            logger: the logger.
+            datacoveragepath (str): the path of the file storing the AGILE data coverage.
+            downloadWorkers (int): the maximum number of SSDC slots downloaded concurrently.
+            agrest (AGRest): the client of the SSDC rest service. If None, a client of the SSDC servers is created.
+        """
         self.logger = logger
-        self.agrest = AGRest(self.logger)
+        self.downloadWorkers = max(1, int(downloadWorkers))
+        self.agrest = agrest if agrest is not None else AGRest(self.logger, poolSize=self.downloadWorkers)
         self.datacoveragepath = datacoveragepath
 
         with open(self.datacoveragepath, "r") as f:
@@ -61,7 +74,8 @@ class AGDataset:
         It downloads EVT and LOG data that the user requires to perform a scientific
         analysis from tmin to tmax (in MJD format).
 
-        If the data is already present on disk, the download will be skipped. 
+        If the data is already present on disk, the download will be skipped: only the intervals
+        missing from the query files are downloaded (see computeMissingIntervals()).
 
         The actual data being downloaded could correspond to a bigger interval than tmin and tmax:
         this is because the SSDC rest service.
@@ -78,51 +92,126 @@ class AGDataset:
 
         dataPath = Path(dataPath)
 
-        evtPath  = dataPath.joinpath("EVT")
-        logPath  = dataPath.joinpath("LOG")
-
         evtQfile =  dataPath.joinpath("EVT.qfile")
         logQfile = dataPath.joinpath("LOG.qfile")
 
-        evtDataMissing = False
-        logDataMissing = False
+        evtGaps = self.computeMissingIntervals(tmin, tmax, evtQfile)
+        logGaps = self.computeMissingIntervals(tmin, tmax, logQfile)
 
-        if self.dataIsMissing(tmin, tmax, evtQfile) == DataStatus.MISSING:
-            self.logger.info( f"EVT data in interval {tmin} {tmax} is missing!")
-            evtDataMissing = True
+        if evtGaps:
+            self.logger.info( f"EVT data in intervals {evtGaps} is missing!")
         else:
             self.logger.info( f"Local data for EVT already in dataset")
 
-        if self.dataIsMissing(tmin, tmax, logQfile) == DataStatus.MISSING:
-            self.logger.info( f"LOG data in interval {tmin} {tmax} is missing!")
-            logDataMissing = True
+        if logGaps:
+            self.logger.info( f"LOG data in intervals {logGaps} is missing!")
         else:
             self.logger.info( f"Local data for LOG already in dataset")
 
-        if evtDataMissing or logDataMissing:
-            self.logger.info( f"Downloading data from ssdc..")
-            _ = self.agrest.gridList(tmin, tmax)
-            tarFilePath = self.agrest.gridFiles(tmin, tmax)
+        # only the intervals missing from the EVT or LOG data are downloaded
+        gaps = CoverageIndex.mergeIntervals(evtGaps + logGaps)
+
+        if not gaps:
+            return False
+
+        self.logger.info( f"Downloading data from ssdc..")
+
+        chunks = []
+        for gapTmin, gapTmax in gaps:
+            _ = self.agrest.gridList(gapTmin, gapTmax)
+            chunks.extend(self.computeDownloadChunks(gapTmin, gapTmax))
+
+        self.logger.info( f"Downloading {len(chunks)} slots with {min(self.downloadWorkers, len(chunks))} workers..")
+
+        downloadDir = dataPath.joinpath(".downloads")
+        downloadDir.mkdir(exist_ok=True, parents=True)
+
+        with ThreadPoolExecutor(max_workers=self.downloadWorkers) as executor:
+
+            futures = {}
+            for chunk in chunks:
+                chunkTmin, chunkTmax, _, _ = chunk
+                outpath = downloadDir.joinpath(f"{AstroUtils.time_mjd_to_fits(chunkTmin)}_{AstroUtils.time_mjd_to_fits(chunkTmax)}.tar.gz")
+                futures[executor.submit(self.agrest.gridFiles, chunkTmin, chunkTmax, outpath)] = chunk
 
-        self.logger.info( f"Extracting data from the tarball..")
+            try:
+                # each slot is extracted and indexed as soon as it has been downloaded
+                for future in as_completed(futures):
+                    chunkTmin, chunkTmax, evtSlots, logSlots = futures[future]
+                    evtDataMissing = AGDataset.intersects(chunkTmin, chunkTmax, evtGaps)
+                    logDataMissing = AGDataset.intersects(chunkTmin, chunkTmax, logGaps)
+                    self.handleSlot(future.result(), evtSlots, logSlots, dataPath, evtIndex, logIndex, evtDataMissing, logDataMissing)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        return True
+
+
+    def handleSlot(self, tarFilePath, evtSlots, logSlots, dataPath, evtIndex, logIndex, evtDataMissing, logDataMissing):
+        """
+        It extracts the EVT and/or LOG data of a downloaded chunk (see computeDownloadChunks()), it adds
+        its slots to the query files, it updates the index files and it removes the tarball.
+        """
+        self.logger.info( f"Extracting data from the tarball {tarFilePath}..")
+
+        fileTypes = [fileType for fileType, missing in [("EVT", evtDataMissing), ("LOG", logDataMissing)] if missing]
+
+        extractedFiles = self.extractDataTypes(fileTypes, tarFilePath, dataPath)
+        self.logger.debug( f"Extracted files: {extractedFiles}")
 
         if evtDataMissing:
-            extractedFiles = self.extractData("EVT", tarFilePath, dataPath)
-            self.logger.debug( f"Extracted files: {extractedFiles}")
-            self.updateQFile(evtQfile, tmin, tmax, evtQfile)
-            self.generateIndex(evtPath, "EVT", evtIndex)
+            evtQfile = dataPath.joinpath("EVT.qfile")
+            self.updateQFile(evtQfile, None, None, evtQfile, slots=evtSlots)
+            self.generateIndex(dataPath.joinpath("EVT"), "EVT", evtIndex)
 
         if logDataMissing:
-            extractedFiles = self.extractData("LOG", tarFilePath, dataPath)
-            self.logger.debug( f"Extracted files: {extractedFiles}")
-            self.updateQFile(logQfile, tmin, tmax, logQfile)
-            self.generateIndex(logPath, "LOG", logIndex)
-        
-        if evtDataMissing or logDataMissing:
-            os.remove(tarFilePath)
+            logQfile = dataPath.joinpath("LOG.qfile")
+            self.updateQFile(logQfile, None, None, logQfile, slots=logSlots)
+            self.generateIndex(dataPath.joinpath("LOG"), "LOG", logIndex)
 
-        return evtDataMissing or logDataMissing
+        os.remove(tarFilePath)
 
+    def computeDownloadChunks(self, tmin, tmax):
+        """
+        It splits the interval [tmin, tmax] along the SSDC EVT slots (see computeEVT_SSDCslots()): each chunk
+        can be requested to the SSDC rest service independently of the others. The EVT and LOG slots of
+        [tmin, tmax] are assigned to the chunks, so that each chunk can update the query files as soon as
+        its data is on disk, and all the chunks together update them as a single request of [tmin, tmax].
+
+        @param tmin: mjd
+        @param tmax: mjd
+        @return: a list of (tmin, tmax, evtSlots, logSlots) tuples, tmin and tmax in mjd
+        """
+        evtSlots = self.computeEVT_SSDCslots(tmin, tmax)
+        logSlots = self.computeLOG_SSDCslots(tmin, tmax)
+
+        tminUtc = datetime.datetime.strptime(AstroUtils.time_mjd_to_fits(tmin), "%Y-%m-%dT%H:%M:%S.%f")
+        tmaxUtc = datetime.datetime.strptime(AstroUtils.time_mjd_to_fits(tmax), "%Y-%m-%dT%H:%M:%S.%f")
+
+        # the boundaries between the chunks, i.e. the EVT slot boundaries within (tmin, tmax)
+        edges = [tminUtc] + [t for t in evtSlots["tmax"] if tminUtc < t < tmaxUtc] + [tmaxUtc]
+
+        chunks = []
+        for chunkTmin, chunkTmax in zip(edges[:-1], edges[1:]):
+            chunks.append((
+                tmin if chunkTmin == tminUtc else float(AstroUtils.time_fits_to_mjd(chunkTmin.strftime("%Y-%m-%dT%H:%M:%S.%f"))),
+                tmax if chunkTmax == tmaxUtc else float(AstroUtils.time_fits_to_mjd(chunkTmax.strftime("%Y-%m-%dT%H:%M:%S.%f"))),
+                evtSlots[(evtSlots["tmax"] > chunkTmin) & (evtSlots["tmin"] < chunkTmax)] if len(edges) > 2 else evtSlots,
+                logSlots[(logSlots["tmin"] >= chunkTmin) & (logSlots["tmin"] < chunkTmax)]
+            ))
+
+        # the slots starting at tmax belong to the last chunk
+        lastTmin, lastTmax, lastEvtSlots, lastLogSlots = chunks[-1]
+        chunks[-1] = (
+            lastTmin,
+            lastTmax,
+            pd.concat([lastEvtSlots, evtSlots[evtSlots["tmin"] >= tmaxUtc]]).drop_duplicates(),
+            pd.concat([lastLogSlots, logSlots[logSlots["tmin"] >= tmaxUtc]])
+        )
+
+        return chunks
 
     def computeEVT_SSDCslots(self, tmin, tmax):
         """
@@ -203,76 +292,72 @@ class AGDataset:
 
     def dataIsMissing(self, tmin, tmax, queryFilepath):
         """ 
-        This method can be extended to handle the case of partial missing data
+        It returns DataStatus.MISSING if any part of [tmin, tmax] (in MJD format) is not covered by the query file.
         """
-        if not queryFilepath.exists():
-            self.logger.warning( f"Query file {queryFilepath} does not exists")
+        if self.computeMissingIntervals(tmin, tmax, queryFilepath):
             return DataStatus.MISSING
 
-        tminUtc = AstroUtils.time_mjd_to_fits(tmin) # YYYY-MM-DDTHH:mm:ss
-        tmaxUtc = AstroUtils.time_mjd_to_fits(tmax)
+        return DataStatus.OK
+
+    def computeMissingIntervals(self, tmin, tmax, queryFilepath):
+        """
+        It returns the sub-intervals of [tmin, tmax] that are not covered by the intervals of the query file
+        (see CoverageIndex.gaps()). The query file is read only if it has changed since the last call.
+
+        @param tmin: mjd
+        @param tmax: mjd
+        @return: a sorted list of (tmin, tmax) tuples in mjd
+        """
+        if not Path(queryFilepath).exists():
+            self.logger.warning( f"Query file {queryFilepath} does not exists")
+            return [(tmin, tmax)]
 
-        tminUtc = datetime.datetime.strptime(tminUtc, "%Y-%m-%dT%H:%M:%S.%f")
-        tmaxUtc = datetime.datetime.strptime(tmaxUtc, "%Y-%m-%dT%H:%M:%S.%f")
+        tminUtc = datetime.datetime.strptime(AstroUtils.time_mjd_to_fits(tmin), "%Y-%m-%dT%H:%M:%S.%f")
+        tmaxUtc = datetime.datetime.strptime(AstroUtils.time_mjd_to_fits(tmax), "%Y-%m-%dT%H:%M:%S.%f")
 
         self.logger.debug( f"({tmin}, {tmax}) => ({tminUtc}, {tmaxUtc})")
 
-        datesDF = pd.read_csv(queryFilepath, header=None, sep=" ", names=["ssdctmin","ssdctmax"], parse_dates=["ssdctmin","ssdctmax"])
+        gaps = CoverageIndex.load(queryFilepath).gaps(tminUtc, tmaxUtc)
 
-        
-        
-        #self.logger.debug( str(datesDF))
-        self.logger.debug( f"{tminUtc}, {tmaxUtc}")
-
-        # check interval of tmin 
-        intervalIndexTmin = self.getInterval(datesDF, tminUtc)
-        # if tmin is not included in any interval:
-        if intervalIndexTmin == -1:
-            self.logger.debug( f"tminUtc {tminUtc} not present in any interval!")
-            return DataStatus.MISSING
-        
-        # check interval of tmax:
-        intervalIndexTmax = self.getInterval(datesDF, tmaxUtc)
-        # if tmax is not included in any interval:
-        if intervalIndexTmax == -1:
-            self.logger.debug( f"tmaxUtc {tmaxUtc} not present in any interval!")
-            return DataStatus.MISSING
+        toMjd = lambda t: tmin if t == tminUtc else tmax if t == tmaxUtc else float(AstroUtils.time_fits_to_mjd(t.strftime("%Y-%m-%dT%H:%M:%S.%f")))
 
-        self.logger.debug( f"intervalIndexTmin: {str(intervalIndexTmin)}")
-        self.logger.debug( f"intervalIndexTmax: {str(intervalIndexTmax)}")
+        return [(toMjd(gapTmin), toMjd(gapTmax)) for gapTmin, gapTmax in gaps]
 
-        # check if there's missing data between the 2 intervals
-        if self.gotHole(datesDF, intervalIndexTmin, intervalIndexTmax):
-            self.logger.debug( f"Missing data between the 2 intervals!")
-            return DataStatus.MISSING
-        
-        return DataStatus.OK
+    @staticmethod
+    def intersects(tmin, tmax, intervals):
+        """
+        It returns True if the closed interval [tmin, tmax] intersects any of the intervals.
+        """
+        return any(tmin <= intervalTmax and intervalTmin <= tmax for intervalTmin, intervalTmax in intervals)
 
 
     def getInterval(self, datesDF, t):
-        for index, block in datesDF.iterrows():
-            if t >= block['ssdctmin'] and t < block['ssdctmax']:
-                return index
-        return -1
+        """
+        It returns the index of the first row of datesDF covering t, -1 if t is not covered.
+        """
+        covering = np.flatnonzero((datesDF["ssdctmin"].to_numpy() <= t) & (datesDF["ssdctmax"].to_numpy() > t))
+        if len(covering) == 0:
+            return -1
+        return datesDF.index[covering[0]]
 
     def gotHole(self, datesDF, intervalIndexTmin, intervalIndexTmax):
-        
-        tstart = intervalIndexTmin
-        tstop = intervalIndexTmax
-
-        while tstart < tstop:
-            ssdcStartDate = datesDF.iloc[[tstart]]["ssdctmax"]
-            ssdcStopDate = datesDF.iloc[[tstart+1]]["ssdctmin"]
-            tstart = tstart+1
-            if ssdcStopDate.iloc[0] != ssdcStartDate.iloc[0]:
-                return True
-
-        return False
+        """
+        It returns True if any row between the two positions does not start where the previous one ends.
+        """
+        ssdcStartDates = datesDF["ssdctmax"].to_numpy()[intervalIndexTmin:intervalIndexTmax]
+        ssdcStopDates = datesDF["ssdctmin"].to_numpy()[intervalIndexTmin+1:intervalIndexTmax+1]
+        return bool(np.any(ssdcStopDates != ssdcStartDates))
     
 
     def extractData(self, fileType, targzPath, destDir):
         """ This method iterates on the tarball members. For any member of a given "fileType", 
-        if the member is not yet present in the dabatase of Agilepy, it will be added.   
+        if the member is not yet present in the dabatase of Agilepy, it will be added (see extractDataTypes()).
+        """
+        return self.extractDataTypes([fileType], targzPath, destDir)[fileType]
+
+    def extractDataTypes(self, fileTypes, targzPath, destDir):
+        """ This method iterates on the tarball members in a single pass. Any member of one of the "fileTypes"
+        is written into the directory of its type, if it is not yet present in the dabatase of Agilepy.
 
         Tarball tree:
             std/           
@@ -295,95 +380,185 @@ class AGDataset:
                 blabla2.LOG.gz
                 blabla3.LOG.gz
                 blabla4.LOG.gz              
+
+        Returns:
+            A dictionary with the list of the extracted members of each file type.
         """
         self.logger.debug( f"Extracting data from {targzPath} to {destDir}")
 
-        fileDest = destDir.joinpath(fileType)
-
-        fileDest.mkdir(exist_ok=True, parents=True)
+        fileDests = {fileType: Path(destDir).joinpath(fileType) for fileType in fileTypes}
 
-        tf = tarfile.open(f"{targzPath}")
-        members = tf.getmembers()
+        for fileDest in fileDests.values():
+            fileDest.mkdir(exist_ok=True, parents=True)
 
         start = time() 
 
-        extractedFiles = [] 
-        for tarInfo in tqdm(members):            
-            if fileType in tarInfo.name:
-                added = self.handleTarInfo(tf, tarInfo, fileType, fileDest)
+        extractedFiles = {fileType: [] for fileType in fileTypes}
+
+        # stream mode: the members are read sequentially, the tarball is not scanned upfront
+        with tarfile.open(f"{targzPath}", "r|*") as tf:
+            for tarInfo in tqdm(tf, disable=None):
+                if not tarInfo.isfile():
+                    continue
+                fileType = AGDataset.getFileType(tarInfo.name, fileTypes)
+                if fileType is None:
+                    continue
+                added = self.handleTarInfo(tf, tarInfo, fileType, fileDests[fileType])
                 if added:
-                    extractedFiles.append(tarInfo.name)
-        
-        self.logger.debug( f"Extracted {len(extractedFiles)} {fileType} files. Took {time()-start} seconds.")
-        
-        self.logger.debug( f"Removing {targzPath} file.")
-        
+                    extractedFiles[fileType].append(tarInfo.name)
+
+        for fileType in fileTypes:
+            self.logger.debug( f"Extracted {len(extractedFiles[fileType])} {fileType} files. Took {time()-start} seconds.")
 
         return extractedFiles                    
 
+    @staticmethod
+    def getFileType(memberName, fileTypes):
+        """
+        It returns the file type of a tarball member from its file name, None if it is not one of the fileTypes.
+        """
+        fileName = Path(memberName).name
+        for fileType in fileTypes:
+            if fileType in fileName:
+                return fileType
+        return None
+
 
-    def updateQFile(self, qfile, tmin, tmax, qfileOut):
+    def updateQFile(self, qfile, tmin, tmax, qfileOut, slots=None):
         """
         @param tmin: mjd
         @param tmax: mjd
+        @param slots: the slots to add to the query file. If None, they are computed from tmin and tmax.
         """
-        if Path(qfile).exists():
-            datesDF = pd.read_csv(qfile, header=None, sep=" ", names=["tmin","tmax"], parse_dates=["tmin","tmax"])
-        else:
-            datesDF = pd.DataFrame([])
+        index = CoverageIndex.load(qfile) if Path(qfile).exists() else CoverageIndex()
 
-        if "EVT" in qfile.stem:
+        if slots is None and "EVT" in qfile.stem:
             slots = self.computeEVT_SSDCslots(tmin, tmax)
         
-        if "LOG" in qfile.stem:
+        if slots is None and "LOG" in qfile.stem:
             slots = self.computeLOG_SSDCslots(tmin, tmax)
 
-        concatted = pd.concat([datesDF, slots], ignore_index=True)
-
-        concatted.sort_values(by='tmin', inplace=True)
-        concatted = concatted.drop_duplicates()
-        concatted.reset_index(drop=True, inplace=True)
-
-        concatted.to_csv(qfileOut, index=False, header=False, sep=" ", date_format="%Y-%m-%dT%H:%M:%S.%f")
+        # the slots are merged into the intervals of the query file
+        index.union(zip(slots["tmin"], slots["tmax"])).save(qfileOut)
 
 
     
     def handleTarInfo(self, tarFileHandle, tarInfo, fileType, destPath):
         """ This method extract a member of the tarball. If the member is not yet present in the dabatase of Agilepy, it will be added.   
 
+        The member is written into a temporary file of the destination directory, renamed when it is complete:
+        an interrupted extraction does not leave a truncated file in the dataset.
         """
-        tmpPath = Path("/tmp")
-
-        # /tmp/std/0909131200_0909161200-86594/ag0909131200_0909161200_STD0P_FM.EVT.gz
-        tmpFilePath = tmpPath.joinpath(tarInfo.name)
-
         # /WHATEVER/EVT/ag0909131200_0909161200_STD0P_FM.EVT.gz
-        outFile = Path(destPath).joinpath(tmpFilePath.name)
+        outFile = Path(destPath).joinpath(Path(tarInfo.name).name)
 
-        self.logger.debug( f"tmpFilePath.name is {tmpFilePath.name}")
-
-        # if file already exist, append a suffix to it
+        # the content of the skipped members is not read
         if outFile.exists():
             self.logger.debug( f"The '{fileType}' file '{outFile}' is already present. Skipping it.")
             return False
-            # /WHATEVER/EVT/ag0909131200_0909161200_STD0P_FM, .EVT.gz
-            #root, _ = str(outFile).split(f".{fileType}.gz")
-            # /WHATEVER/EVT/ag0909131200_0909161200_STD0P_FM_fb08e8c8-b879-4d5e-9924-07ed3a994075.EVT.gz
-            #outFile = Path(f"{root}_{str(uuid.uuid4())}").with_suffix(f".{fileType}.gz")
 
-        # /blabla../utils/tmp/std/0909161200_0909301200-186883/ag0909161200_0909301200_STD0P_FM.EVT.gz
+        fd, tmpPath = tempfile.mkstemp(dir=destPath, prefix=f".{outFile.name}", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(tarFileHandle.extractfile(tarInfo), f, 1024*1024)
+            os.chmod(tmpPath, 0o644)
+            os.utime(tmpPath, (tarInfo.mtime, tarInfo.mtime))
+            os.replace(tmpPath, outFile)
+        except BaseException:
+            Path(tmpPath).unlink(missing_ok=True)
+            raise
 
-        tarFileHandle.extract(tarInfo, path=tmpPath)
+        self.logger.debug( f"Extracted {tarInfo.name} to {outFile}.")
 
-        shutil.move(tmpFilePath, outFile)
-        
-        #tmpFilePath.rename(outFile)
+        return True
+
+    def generateIndex(self, dataPath, filetype, pathToIndex, incremental=True):
+        """
+        It updates the index file of the EVT or LOG data. If incremental is True and the index file exists, only
+        the headers of the files not yet indexed are read (see updateIndex()), otherwise or if the incremental
+        update is not possible the index is generated again by AG_indexgen from all the files (see regenerateIndex()).
+        """
+        if incremental and Path(pathToIndex).exists():
+            try:
+                if self.updateIndex(dataPath, filetype, pathToIndex):
+                    return
+            except (OSError, EOFError, KeyError, ValueError) as e:
+                self.logger.warning( f"The incremental update of the index file {pathToIndex} failed: {e}")
+
+        self.regenerateIndex(dataPath, filetype, pathToIndex)
 
-        self.logger.debug( f"Moving {tmpFilePath} to {outFile}.")
+    def updateIndex(self, dataPath, filetype, pathToIndex):
+        """
+        It adds to the index file the files of dataPath that are not indexed yet, reading their TSTART and TSTOP
+        header keywords, and it removes the files that are no longer in dataPath. The index file keeps the
+        format of AG_indexgen: one "path tstart tstop type" line for each file, sorted.
+
+        Returns:
+            False if the index file does not refer to dataPath and it must be generated again.
+        """
+        dataPath = Path(dataPath)
+        pathToIndex = Path(pathToIndex)
+
+        indexed = {}
+        with open(pathToIndex, "r") as fr:
+            for line in fr:
+                if not line.strip():
+                    continue
+                filePath, _, _, _ = line.split()
+                filePath = Path(filePath)
+                if filePath.parent != dataPath:
+                    self.logger.info( f"The index file {pathToIndex} does not refer to {dataPath}.")
+                    return False
+                indexed[filePath.name] = line.rstrip("\n") + "\n"
+
+        # the temporary files of an extraction in progress start with a dot
+        dataFiles = {f.name for f in dataPath.iterdir() if f.is_file() and not f.name.startswith(".")}
+
+        newFiles = sorted(dataFiles - indexed.keys())
+        removedFiles = indexed.keys() - dataFiles
+
+        for fileName in removedFiles:
+            del indexed[fileName]
+
+        for fileName in newFiles:
+            tstart, tstop = AGDataset.readTimeInterval(dataPath.joinpath(fileName))
+            indexed[fileName] = f"{dataPath.joinpath(fileName)} {tstart:.6f} {tstop:.6f} {filetype}\n"
+
+        fd, tmpPath = tempfile.mkstemp(dir=pathToIndex.parent, prefix=pathToIndex.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as fw:
+                fw.writelines(sorted(indexed.values()))
+            os.chmod(tmpPath, 0o644)
+            os.replace(tmpPath, pathToIndex)
+        except BaseException:
+            Path(tmpPath).unlink(missing_ok=True)
+            raise
+
+        self.logger.info( f"indexfile at {pathToIndex}: {len(newFiles)} files added, {len(removedFiles)} files removed.")
 
         return True
 
-    def generateIndex(self, dataPath, filetype, pathToIndex):
+    @staticmethod
+    def readTimeInterval(filePath):
+        """
+        It returns the TSTART and TSTOP header keywords of the first HDU of a FITS file that has both of them.
+        Only the headers are read.
+        """
+        with fits.open(filePath, memmap=False) as hdul:
+            for i in range(2):
+                try:
+                    header = hdul[i].header
+                except IndexError:
+                    break
+                if "TSTART" in header and "TSTOP" in header:
+                    return float(header["TSTART"]), float(header["TSTOP"])
+        raise KeyError(f"TSTART and TSTOP are not in the headers of {filePath}")
+
+    def regenerateIndex(self, dataPath, filetype, pathToIndex):
+        """
+        It generates the index file again with AG_indexgen, from all the files of dataPath.
+        """
+        pathToIndex = Path(pathToIndex)
 
         index_name = f"{filetype}.index"
 
@@ -0,0 +1,185 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import stat
+import tempfile
+import threading
+import pandas as pd
+from pathlib import Path
+from bisect import bisect_left, bisect_right
+
+class CoverageIndex:
+    """
+    The sorted and merged time intervals of a query file (EVT.qfile, LOG.qfile), answering point and range
+    coverage queries with a binary search instead of scanning the rows of the file.
+
+    An instant t is covered by an interval if tmin <= t < tmax.
+
+    The index of a query file is loaded once and cached (see load()): it is valid until the query file changes.
+    """
+
+    DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+    _cache = {}
+    _cacheLock = threading.Lock()
+
+    def __init__(self, intervals=()):
+        """
+        Args:
+            intervals (iterable): the (tmin, tmax) datetime tuples, in any order, overlapping or not.
+        """
+        merged = CoverageIndex.mergeIntervals(intervals)
+        self.starts = [tmin for tmin, _ in merged]
+        self.ends = [tmax for _, tmax in merged]
+        self.key = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    @staticmethod
+    def mergeIntervals(intervals):
+        """
+        It returns the union of the intervals as a sorted list of disjoint (tmin, tmax) tuples:
+        overlapping and contiguous intervals are merged.
+        """
+        merged = []
+        for tmin, tmax in sorted(intervals):
+            if merged and tmin <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], tmax))
+            else:
+                merged.append((tmin, tmax))
+        return merged
+
+    def getIntervals(self):
+        return list(zip(self.starts, self.ends))
+
+    def getInterval(self, t):
+        """
+        It returns the position of the interval covering t, -1 if t is not covered.
+        """
+        i = bisect_right(self.starts, t) - 1
+        if i >= 0 and t < self.ends[i]:
+            return i
+        return -1
+
+    def contains(self, t):
+        return self.getInterval(t) != -1
+
+    def covers(self, tmin, tmax):
+        """
+        It returns True if every instant of [tmin, tmax] is covered.
+        """
+        i = self.getInterval(tmin)
+        return i != -1 and tmax < self.ends[i]
+
+    def gaps(self, tmin, tmax):
+        """
+        It returns the sub-intervals of [tmin, tmax] that are not covered, as a sorted list of (tmin, tmax) tuples.
+        If tmax is not covered, the last sub-interval ends at tmax and it can be empty (tmax, tmax).
+        """
+        gaps = []
+        cursor = tmin
+        # the first interval ending after tmin
+        for i in range(bisect_right(self.ends, tmin), len(self.starts)):
+            if self.starts[i] > tmax:
+                break
+            if self.starts[i] > cursor:
+                gaps.append((cursor, self.starts[i]))
+            cursor = self.ends[i]
+
+        if cursor <= tmax:
+            gaps.append((cursor, tmax))
+
+        return gaps
+
+    def union(self, intervals):
+        """
+        It returns a new index covering the intervals of this index and the new ones.
+        """
+        # the new intervals are usually few: only the overlapping part of the index is merged again
+        intervals = CoverageIndex.mergeIntervals(intervals)
+        if not intervals:
+            return CoverageIndex(self.getIntervals())
+        lo = bisect_left(self.ends, intervals[0][0])
+        hi = bisect_right(self.starts, intervals[-1][1])
+        index = CoverageIndex(intervals + self.getIntervals()[lo:hi])
+        index.starts = self.starts[:lo] + index.starts + self.starts[hi:]
+        index.ends = self.ends[:lo] + index.ends + self.ends[hi:]
+        return index
+
+    @staticmethod
+    def fromQFile(qfile):
+        """
+        It reads the intervals of a query file: one "tmin tmax" line for each interval.
+        """
+        if os.stat(qfile).st_size == 0:
+            return CoverageIndex()
+        datesDF = pd.read_csv(qfile, header=None, sep=" ", names=["tmin","tmax"], parse_dates=["tmin","tmax"])
+        return CoverageIndex(zip(datesDF["tmin"].tolist(), datesDF["tmax"].tolist()))
+
+    @staticmethod
+    def getKey(qfile):
+        stat = os.stat(qfile)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def load(qfile):
+        """
+        It returns the index of the query file, reading it only if it has changed since the last call.
+        """
+        path = str(Path(qfile).resolve())
+        key = CoverageIndex.getKey(path)
+        with CoverageIndex._cacheLock:
+            index = CoverageIndex._cache.get(path)
+        if index is not None and index.key == key:
+            return index
+        index = CoverageIndex.fromQFile(path)
+        index.key = key
+        with CoverageIndex._cacheLock:
+            CoverageIndex._cache[path] = index
+        return index
+
+    def save(self, qfile):
+        """
+        It writes the merged intervals into the query file, replacing it, and it caches the index.
+        """
+        qfile = Path(qfile).resolve()
+        mode = stat.S_IMODE(os.stat(qfile).st_mode) if qfile.exists() else 0o644
+        fd, tmpPath = tempfile.mkstemp(dir=qfile.parent, prefix=qfile.name, suffix=".tmp")
+        try:
+            os.chmod(tmpPath, mode)
+            with os.fdopen(fd, "w") as f:
+                for tmin, tmax in zip(self.starts, self.ends):
+                    f.write(f"{tmin.strftime(CoverageIndex.DATE_FORMAT)} {tmax.strftime(CoverageIndex.DATE_FORMAT)}\n")
+            os.replace(tmpPath, qfile)
+        except BaseException:
+            Path(tmpPath).unlink(missing_ok=True)
+            raise
+        self.key = CoverageIndex.getKey(qfile)
+        with CoverageIndex._cacheLock:
+            CoverageIndex._cache[str(qfile)] = self
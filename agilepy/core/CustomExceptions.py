@@ -34,6 +34,14 @@ class ScienceToolErrorCodeReturned(Exception):
     def __init__(self, message):
         super().__init__(message)
 
+class ScienceToolDependencyCycle(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+class ScienceToolExecutionTimeout(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
 class SelectionStringToLambdaConversioFailed(Exception):
     def __init__(self, message):
         super().__init__(message)
@@ -0,0 +1,168 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import json
+import tempfile
+import threading
+from pathlib import Path
+
+class LightCurveManifest:
+    """
+    The list of the temporal bins of a light curve analysis, with their status and products.
+
+    The manifest is written into the light curve output directory every time the status of a bin changes,
+    so that an interrupted analysis can be resumed computing only the bins that are not completed.
+    """
+
+    FILENAME = "lc_manifest.json"
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, lcAnalysisDataDir, sourceName, tmin, tmax, binsize, bins, fingerprint=None):
+        """
+        Args:
+            lcAnalysisDataDir (str): the light curve output directory.
+            sourceName (str): the name of the source under analysis.
+            tmin (float): starting point (TT) of the light curve.
+            tmax (float): ending point (TT) of the light curve.
+            binsize (float): temporal bin size.
+            bins (List): the (index, t1, t2) temporal bins.
+            fingerprint (str): a digest of the analysis options and of the sources library used by the bins.
+        """
+        self.lcAnalysisDataDir = Path(lcAnalysisDataDir)
+        self.sourceName = sourceName
+        self.tmin = float(tmin)
+        self.tmax = float(tmax)
+        self.binsize = float(binsize)
+        self.fingerprint = fingerprint
+        self.bins = {
+            int(idx) : {"tmin": float(t1), "tmax": float(t2), "status": LightCurveManifest.PENDING, "products": []}
+            for idx, t1, t2 in bins
+        }
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def load(lcAnalysisDataDir):
+        """
+        It reads the manifest of a light curve output directory.
+
+        Returns:
+            The LightCurveManifest object or None if the directory does not contain a valid manifest.
+        """
+        manifestPath = Path(lcAnalysisDataDir).joinpath(LightCurveManifest.FILENAME)
+
+        if not manifestPath.is_file():
+            return None
+
+        try:
+            with open(manifestPath) as mf:
+                content = json.load(mf)
+            manifest = LightCurveManifest(lcAnalysisDataDir, content["sourceName"], content["tmin"], content["tmax"], content["binsize"], [], content.get("fingerprint"))
+            manifest.bins = {int(idx): binData for idx, binData in content["bins"].items()}
+        except (ValueError, KeyError, TypeError):
+            return None
+
+        return manifest
+
+    def matches(self, sourceName, tmin, tmax, binsize, fingerprint=None):
+        """
+        It returns True if the manifest describes the light curve of sourceName in [tmin, tmax] with the given bin size.
+        If fingerprint is given, the manifest must have been written with the same fingerprint.
+        """
+        return self.sourceName == sourceName and \
+               self.tmin == float(tmin) and \
+               self.tmax == float(tmax) and \
+               self.binsize == float(binsize) and \
+               (fingerprint is None or self.fingerprint == fingerprint)
+
+    def getBins(self, status=None):
+        """
+        It returns the (index, t1, t2) bins, sorted by index, optionally filtered by status.
+        """
+        return [(idx, binData["tmin"], binData["tmax"]) for idx, binData in sorted(self.bins.items()) \
+                if status is None or binData["status"] == status]
+
+    def getStatus(self, idx):
+        return self.bins[idx]["status"]
+
+    def getProducts(self, idx):
+        return self.bins[idx]["products"]
+
+    def getStats(self, idx):
+        return self.bins[idx].get("stats")
+
+    def setStats(self, idx, stats):
+        """
+        It stores the statistics (e.g. times and minimizer iterations) of a bin and it writes the manifest on disk.
+        """
+        with self.lock:
+            self.bins[idx]["stats"] = stats
+            self._write()
+
+    def setStatus(self, idx, status, products=None):
+        """
+        It updates the status (and the products) of a bin and it writes the manifest on disk.
+        """
+        with self.lock:
+            self.bins[idx]["status"] = status
+            if products is not None:
+                self.bins[idx]["products"] = [str(product) for product in products]
+            self._write()
+
+    def write(self):
+        """
+        It writes the manifest on disk.
+
+        Returns:
+            The path to the manifest.
+        """
+        with self.lock:
+            return self._write()
+
+    def _write(self):
+        content = {
+            "sourceName": self.sourceName,
+            "tmin": self.tmin,
+            "tmax": self.tmax,
+            "binsize": self.binsize,
+            "fingerprint": self.fingerprint,
+            "bins": {str(idx): binData for idx, binData in sorted(self.bins.items())}
+        }
+
+        manifestPath = self.lcAnalysisDataDir.joinpath(LightCurveManifest.FILENAME)
+
+        # a killed analysis must not leave a truncated manifest
+        fd, tmpPath = tempfile.mkstemp(dir=self.lcAnalysisDataDir, prefix=".lc_manifest_")
+        with os.fdopen(fd, "w") as mf:
+            json.dump(content, mf, indent=2)
+        os.replace(tmpPath, manifestPath)
+
+        return str(manifestPath)
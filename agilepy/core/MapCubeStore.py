@@ -0,0 +1,272 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import json
+import fcntl
+import shutil
+import hashlib
+import threading
+import numpy as np
+from math import ceil, floor
+from contextlib import contextmanager
+from pathlib import Path
+from astropy.io import fits
+
+from agilepy.config.AgilepyConfig import AgilepyConfig
+from agilepy.core.ScienceTools import CtsMapGenerator, ExpMapGenerator
+from agilepy.core.ToolScheduler import ToolScheduler
+from agilepy.utils.Utils import Utils
+
+class MapCubeStore:
+    """
+    A store of counts and exposure maps computed once per fixed time chunk.
+
+    The time axis (TT) is divided into chunks of ``chunkSize`` seconds, starting from 0. The counts and exposure maps
+    of an interval [tmin, tmax] are obtained by summing the maps of the chunks it contains, plus the maps of
+    the (shorter) pieces at its edges when tmin and tmax are not aligned to the chunk boundaries. The maps of each
+    chunk are generated once for each combination of region, energy bin, fov bin and filter, and reused by every
+    interval covering the chunk (e.g. sliding light curve bins or the calcBkg past time window).
+
+    Counts and exposure are additive in time, but the sum can differ from a direct generation over [tmin, tmax]
+    for the events lying exactly on a chunk boundary and for the sampling of the exposure (timestep).
+
+    The store can be shared by several threads and processes (e.g. two notebooks using the same storeDir): the maps
+    of a region are generated holding an exclusive lock (flock) on a lock file of its directory, so the other users
+    of the region wait for the maps to be completely written. The storeDir must be on a filesystem supporting flock.
+
+    The maps are reused only while the evtfile and logfile indexes do not change: when they are updated (e.g. by
+    downloadData()) the chunks are generated again into a new directory. The old directories can be removed with clear().
+    """
+
+    LOCK_FILENAME = ".lock"
+
+    # The configuration options that select the content of a counts or exposure map, apart from tmin and tmax.
+    # The content of the evtfile and logfile indexes is part of the signature too (see getIndexKey).
+    SIGNATURE_OPTIONS = ["evtfile", "logfile", "mapsize", "binsize", "glon", "glat", "lonpole", "albedorad", "phasecode",
+                         "filtercode", "proj", "energybins", "fovradmin", "fovradmax", "irf", "useEDPmatrixforEXP",
+                         "expstep", "timestep", "spectralindex", "timelist", "maplistgen"]
+
+    def __init__(self, storeDir, chunkSize=86400, agilepyLogger=None, workers=None, createTool=None):
+        self.storeDir = Path(storeDir)
+        self.storeDir.mkdir(parents=True, exist_ok=True)
+        self.chunkSize = chunkSize
+        self.logger = agilepyLogger
+        self.workers = workers
+        # a function (toolClass, exeName) -> tool, e.g. to attach the product cache and the run log of an analysis
+        self.createTool = createTool if createTool is not None else lambda toolClass, exeName: toolClass(exeName, self.logger)
+        self.locks = {}
+        self.locksGuard = threading.Lock()
+
+    def getPieces(self, tmin, tmax):
+        """
+        It splits [tmin, tmax] into a list of (t1, t2, isChunk) pieces: the whole chunks contained in the interval
+        and the partial pieces at its edges.
+        """
+        firstChunk = ceil(tmin / self.chunkSize)
+        lastChunk = floor(tmax / self.chunkSize)
+
+        if firstChunk >= lastChunk:
+            return [(tmin, tmax, False)]
+
+        pieces = []
+
+        if tmin < firstChunk * self.chunkSize:
+            pieces.append((tmin, firstChunk * self.chunkSize, False))
+
+        for chunk in range(firstChunk, lastChunk):
+            pieces.append((chunk * self.chunkSize, (chunk + 1) * self.chunkSize, True))
+
+        if lastChunk * self.chunkSize < tmax:
+            pieces.append((lastChunk * self.chunkSize, tmax, False))
+
+        return pieces
+
+    def canStack(self, tmin, tmax):
+        """
+        It returns True if [tmin, tmax] contains at least one whole chunk.
+        """
+        return any(isChunk for _, _, isChunk in self.getPieces(tmin, tmax))
+
+    @staticmethod
+    def getIndexKey(indexPath):
+        """
+        It returns the [size, mtime_ns] of an index file (None if it does not exist): the maps built before the index
+        is updated (e.g. by downloadData()) are not reused.
+        """
+        try:
+            stat = os.stat(Utils._expandEnvVar(str(indexPath)))
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def getSignatureDir(self, config):
+        """
+        It returns the directory holding the maps of the chunks for the region, energy bin, fov bin and filter of the configuration
+        and for the current content of the evtfile and logfile indexes.
+        """
+        signature = {option: str(config.getOptionValue(option)) for option in MapCubeStore.SIGNATURE_OPTIONS}
+        signature["chunksize"] = self.chunkSize
+        signature["evtindex"] = MapCubeStore.getIndexKey(config.getOptionValue("evtfile"))
+        signature["logindex"] = MapCubeStore.getIndexKey(config.getOptionValue("logfile"))
+
+        key = hashlib.sha256(json.dumps(signature, sort_keys=True).encode("utf-8")).hexdigest()
+
+        signatureDir = self.storeDir.joinpath(key)
+        signatureDir.mkdir(parents=True, exist_ok=True)
+
+        signatureFile = signatureDir.joinpath("signature.json")
+        if not signatureFile.exists():
+            with open(signatureFile, "w") as sf:
+                json.dump(signature, sf, indent=2)
+
+        return signatureDir
+
+    def stackMaps(self, config, ctsOutfilePath, expOutfilePath):
+        """
+        It writes the counts and exposure maps of the [tmin, tmax] interval of the configuration into
+        ctsOutfilePath and expOutfilePath, summing the maps of the chunks. The missing chunks are generated.
+
+        Returns:
+            The paths to the counts and exposure maps.
+        """
+        tmin = config.getOptionValue("tmin")
+        tmax = config.getOptionValue("tmax")
+
+        pieces = self.getPieces(tmin, tmax)
+
+        signatureDir = self.getSignatureDir(config)
+
+        # two cells (or two processes) of the same region must not generate the same chunk at the same time
+        with self.locksGuard:
+            lock = self.locks.setdefault(str(signatureDir), threading.Lock())
+
+        with lock, self._lockSignatureDir(signatureDir):
+
+            scheduler = ToolScheduler(self.logger, self.workers)
+
+            ctsMaps = []
+            expMaps = []
+
+            for t1, t2, isChunk in pieces:
+
+                pieceConfig = AgilepyConfig.getCopy(config)
+                pieceDir = signatureDir if isChunk else signatureDir.joinpath("partial")
+                pieceConfig.setOptions(tmin=t1, tmax=t2, timetype="TT")
+                pieceConfig.setOptions(outdir=str(pieceDir), filenameprefix=f"T{t1}_{t2}")
+
+                ctsMapGenerator = self.createTool(CtsMapGenerator, "AG_ctsmapgen")
+                expMapGenerator = self.createTool(ExpMapGenerator, "AG_expmapgen")
+                ctsMapGenerator.configureTool(pieceConfig)
+                expMapGenerator.configureTool(pieceConfig)
+
+                ctsMaps.append(next(iter(ctsMapGenerator.products)))
+                expMaps.append(next(iter(expMapGenerator.products)))
+
+                # the tools do not run again if the maps of the piece already exist
+                scheduler.addTool(ctsMapGenerator)
+                scheduler.addTool(expMapGenerator)
+
+            self._log(f"Stacking {len(pieces)} pieces of [{tmin}, {tmax}] from {signatureDir}")
+
+            scheduler.run()
+
+        MapCubeStore.sumMaps(ctsMaps, ctsOutfilePath)
+        MapCubeStore.sumMaps(expMaps, expOutfilePath)
+
+        return ctsOutfilePath, expOutfilePath
+
+    @contextmanager
+    def _lockSignatureDir(self, signatureDir):
+        """
+        It holds an exclusive lock on the lock file of a signature directory, shared with the other processes.
+        """
+        with open(Path(signatureDir).joinpath(MapCubeStore.LOCK_FILENAME), "a") as lockFile:
+            fcntl.flock(lockFile.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockFile.fileno(), fcntl.LOCK_UN)
+
+    def clear(self):
+        """
+        It removes every map of the store.
+        """
+        for signatureDir in self.storeDir.iterdir():
+            if signatureDir.is_dir():
+                shutil.rmtree(signatureDir, ignore_errors=True)
+
+    @staticmethod
+    def sumMaps(mapPaths, outfilePath):
+        """
+        It sums the data of several FITS maps with the same geometry and writes the result into outfilePath.
+        The header of the first map is used, with the time keywords spanning all the maps.
+        """
+        with fits.open(mapPaths[0]) as hdul:
+            header = hdul[0].header.copy()
+            dtype = hdul[0].data.dtype
+            data = np.array(hdul[0].data, dtype=np.float64 if dtype.kind == "f" else np.int64)
+
+        tstart = header.get("TSTART")
+        tstop = header.get("TSTOP")
+        dateEnd = header.get("DATE-END")
+
+        for mapPath in mapPaths[1:]:
+            with fits.open(mapPath) as hdul:
+                if hdul[0].data.shape != data.shape:
+                    raise ValueError(f"The map {mapPath} has shape {hdul[0].data.shape}, expected {data.shape}")
+                data += hdul[0].data
+                mapHeader = hdul[0].header
+                if "TSTART" in mapHeader and tstart is not None:
+                    tstart = min(tstart, mapHeader["TSTART"])
+                if "TSTOP" in mapHeader and tstop is not None:
+                    tstop = max(tstop, mapHeader["TSTOP"])
+                    dateEnd = mapHeader.get("DATE-END", dateEnd)
+
+        if dtype.kind != "f":
+            # counts: keep the original integer type unless the sum overflows it
+            if data.max(initial=0) <= np.iinfo(dtype).max:
+                data = data.astype(dtype)
+            else:
+                data = data.astype(np.int32)
+
+        for keyword, value in (("TSTART", tstart), ("TSTOP", tstop), ("DATE-END", dateEnd)):
+            if value is not None:
+                header[keyword] = value
+
+        # BZERO and BSCALE are recomputed by astropy according to the data type
+        for keyword in ("BZERO", "BSCALE"):
+            header.remove(keyword, ignore_missing=True)
+
+        Path(outfilePath).parent.mkdir(parents=True, exist_ok=True)
+        fits.PrimaryHDU(data=data, header=header).writeto(outfilePath, overwrite=True)
+
+        return outfilePath
+
+    def _log(self, message):
+        if self.logger:
+            self.logger.debug(message)
@@ -51,6 +51,7 @@ class CtsMapGenerator(ProcessWrapper):
         self.products = {   
             outfilePath : ProcessWrapper.REQUIRED_PRODUCT
         }
+        self.inputs = [ config.getOptionValue("evtfile") ]
         self.args = [ outfilePath,  \
                       config.getOptionValue("evtfile"), # = indexfilter 
                       config.getOptionValue("timelist"), \
@@ -101,6 +102,10 @@ class ExpMapGenerator(ProcessWrapper):
             outfilePath : ProcessWrapper.REQUIRED_PRODUCT
         }
 
+        self.inputs = [ config.getOptionValue("logfile"), Parameters.getCalibrationMatrices(config.getOptionValue("filtercode"), config.getOptionValue("irf"))[0] ]
+        if edpmatrix != "None":
+            self.inputs.append(edpmatrix)
+
         self.args = [ outfilePath,  \
                       config.getOptionValue("logfile"), # = indexlog
                       Parameters.getCalibrationMatrices(config.getOptionValue("filtercode"), config.getOptionValue("irf"))[0], \
@@ -152,6 +157,8 @@ class GasMapGenerator(ProcessWrapper):
             outfilePath : ProcessWrapper.REQUIRED_PRODUCT
         }
 
+        self.inputs = [ extraParams["expMapGeneratorOutfilePath"], config.getOptionValue("skymapL"), config.getOptionValue("skymapH") ]
+
         self.args = [ extraParams["expMapGeneratorOutfilePath"], \
                       outfilePath,  \
                       config.getOptionValue("skymapL"), \
@@ -181,6 +188,8 @@ class IntMapGenerator(ProcessWrapper):
             outfilePath : ProcessWrapper.REQUIRED_PRODUCT
         }
 
+        self.inputs = [ extraParams["expMapGeneratorOutfilePath"], extraParams["ctsMapGeneratorOutfilePath"] ]
+
         self.args = [ extraParams["expMapGeneratorOutfilePath"], \
                       outfilePath,  \
                       extraParams["ctsMapGeneratorOutfilePath"], \
@@ -259,6 +268,8 @@ class Spotfinder(ProcessWrapper):
 
         outputFile = outputFile = str(Path(self.outputDir).joinpath(extraParams["output_files"]))
 
+        self.inputs = [extraParams["input_file"]]
+
         self.args = [extraParams["input_file"],
                      extraParams["input_binsize"],
                      extraParams["smoothing"],
@@ -330,6 +341,7 @@ class Multi(ProcessWrapper):
 
         calibMatrices = Parameters.getCalibrationMatrices(config.getOptionValue("filtercode"), config.getOptionValue("irf"))
 
+        self.inputs = [ config.getOptionValue("maplist"), config.getOptionValue("sourcelist"), *calibMatrices ]
 
         self.args = [
             config.getOptionValue("maplist"), \
@@ -390,6 +402,10 @@ class AP(ProcessWrapper):
         if config.getOptionValue("useEDPmatrixforEXP"):
             edpmatrix = Parameters.getCalibrationMatrices(config.getOptionValue("filtercode"), config.getOptionValue("irf"))[1]
 
+        self.inputs = [ config.getOptionValue("logfile"), config.getOptionValue("evtfile"), Parameters.getCalibrationMatrices(config.getOptionValue("filtercode"), config.getOptionValue("irf"))[0] ]
+        if edpmatrix != "None":
+            self.inputs.append(edpmatrix)
+
         self.args = [ outfilePath,  \
                       config.getOptionValue("logfile"), # = indexlog
                       config.getOptionValue("evtfile"), # = indexfiler
@@ -440,6 +456,8 @@ class Cwt2(ProcessWrapper):
             outfilePath : ProcessWrapper.REQUIRED_PRODUCT
         }
 
+        self.inputs = [ config.getOptionValue("ctsmap") ]
+
         self.args = [
             "-v -w log -s",
             str(config.getOptionValue("scaletype"))+":"+str(config.getOptionValue("scalenum"))+":"+str(config.getOptionValue("scalemin"))+":"+str(config.getOptionValue("scalemax")),
@@ -469,6 +487,8 @@ class Met(ProcessWrapper):
             outfilePath : ProcessWrapper.REQUIRED_PRODUCT
         }
 
+        self.inputs = [ extraParams["Cwt2OutfilePath"][0] ]
+
         self.args = [
             "-v -n",
             config.getOptionValue("methistsize"),
@@ -497,6 +517,8 @@ class Ccl(ProcessWrapper):
             outfilePath : ProcessWrapper.REQUIRED_PRODUCT
         }
 
+        self.inputs = [ extraParams["MetOutfilePath"][0] ]
+
         self.args = ["-v"]
 
         if (float(config.getOptionValue("cclsizemin")) != -1)  or (float(config.getOptionValue("cclsizemax")) != -1):
@@ -0,0 +1,264 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from pathlib import Path
+from astropy.table import Table
+from concurrent.futures import ProcessPoolExecutor
+
+from agilepy.core.CustomExceptions import FileSourceParsingError
+
+class SourceFileParser:
+    """
+    Parser of the .source files written by AG_multi.
+
+    The position of every value of interest is declared once in ``SCHEMA``: the body lines of a .source file
+    are split in a flat list of 128 values and each schema field picks its value by index. Values are converted
+    into python numbers without evaluating them.
+    """
+
+    BODY_LINES = 17
+    BODY_VALUES = 128
+
+    # (MultiAnalysis parameter name, index of the value, datatype)
+    SCHEMA = (
+        ("multiName", 0, "str"),
+        ("multiFix", 1, "float"),
+        ("multiindex", 2, "float"),
+        ("multiULConfidenceLevel", 3, "float"),
+        ("multiSrcLocConfLevel", 4, "float"),
+        ("multiStartL", 5, "float"),
+        ("multiStartB", 6, "float"),
+        ("multiStartFlux", 7, "float"),
+        ("multiTypefun", 12, "float"),
+        ("multipar2", 13, "float"),
+        ("multipar3", 14, "float"),
+        ("multiGalmode2", 15, "float"),
+        ("multiGalmode2fit", 16, "float"),
+        ("multiIsomode2", 17, "float"),
+        ("multiIsomode2fit", 18, "float"),
+        ("multiEdpcor", 19, "float"),
+        ("multiFluxcor", 20, "float"),
+        ("multiIntegratorType", 21, "float"),
+        ("multiExpratioEval", 22, "float"),
+        ("multiExpratioMinthr", 23, "float"),
+        ("multiExpratioMaxthr", 24, "float"),
+        ("multiExpratioSize", 25, "float"),
+        ("multiSqrtTS", 37, "float"),
+        ("multiLPeak", 38, "float"),
+        ("multiBPeak", 39, "float"),
+        ("multiDistFromStartPositionPeak", 40, "float"),
+        ("multiL", 41, "float"),
+        ("multiB", 42, "float"),
+        ("multiDistFromStartPosition", 43, "float"),
+        ("multir", 44, "float"),
+        ("multia", 45, "float"),
+        ("multib", 46, "float"),
+        ("multiphi", 47, "float"),
+        ("multiCounts", 48, "float"),
+        ("multiCountsErr", 49, "float"),
+        ("multiFlux", 53, "float"),
+        ("multiFluxErr", 54, "float"),
+        ("multiFluxPosErr", 55, "float"),
+        ("multiFluxNegErr", 56, "float"),
+        ("multiUL", 57, "float"),
+        ("multiExp", 59, "float"),
+        ("multiErgLog", 64, "float"),
+        ("multiErgLogErr", 65, "float"),
+        ("multiErgLogUL", 66, "float"),
+        ("multiIndex", 69, "float"),
+        ("multiIndexErr", 70, "float"),
+        ("multiPar2", 71, "float"),
+        ("multiPar2Err", 72, "float"),
+        ("multiPar3", 73, "float"),
+        ("multiPar3Err", 74, "float"),
+        ("multiFitCts", 75, "float"),
+        ("multiFitFitstatus0", 76, "float"),
+        ("multiFitFcn0", 77, "float"),
+        ("multiFitEdm0", 78, "float"),
+        ("multiFitNvpar0", 79, "float"),
+        ("multiFitNparx0", 80, "float"),
+        ("multiFitIter0", 81, "float"),
+        ("multiFitFitstatus1", 82, "float"),
+        ("multiFitFcn1", 83, "float"),
+        ("multiFitEdm1", 84, "float"),
+        ("multiFitNvpar1", 85, "float"),
+        ("multiFitNparx1", 86, "float"),
+        ("multiFitIter1", 87, "float"),
+        ("multiFitLikelihood1", 88, "float"),
+        ("multiGalCoeff", 89, "List<float>"),
+        ("multiGalErr", 90, "List<float>"),
+        ("multiIsoCoeff", 93, "List<float>"),
+        ("multiIsoErr", 94, "List<float>"),
+        ("startDataTT", 99, "float"),
+        ("endDataTT", 100, "float"),
+        ("multiEmin", 103, "List<float>"),
+        ("multiEmax", 104, "List<float>"),
+        ("multifovmin", 105, "List<float>"),
+        ("multifovmax", 106, "List<float>"),
+        ("multialbedo", 107, "float"),
+        ("multibinsize", 108, "float"),
+        ("multiexpstep", 109, "float"),
+        ("multiphasecode", 110, "float"),
+        ("multiExpRatio", 111, "float"),
+    )
+
+    @staticmethod
+    def toNumber(value):
+        """
+        It converts a token of a .source file into an int or a float. Tokens that are not numbers are returned unchanged.
+        """
+        if not isinstance(value, str):
+            return value
+        try:
+            return int(value)
+        except ValueError:
+            pass
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+    @staticmethod
+    def tokenize(lines, sourceFilePath=""):
+        """
+        It splits the body lines of a .source file into the flat list of its values.
+
+        Args:
+            lines (List[str]): the lines of the .source file, comments included.
+            sourceFilePath (str): the path of the file, used in the error messages.
+
+        Returns:
+            A list of 128 values: strings, or lists of strings for the multi-valued fields.
+        """
+        body = [line for line in lines if line[0] != "!"]
+
+        if len(body) != SourceFileParser.BODY_LINES:
+            raise FileSourceParsingError("The number of body lines of the %s source file is not 17."%(sourceFilePath))
+
+        allValues = []
+
+        for lin_num, line in enumerate(body):
+
+            values = [v.strip() for v in line.split(" ") if v != '']
+
+            if lin_num == 0:
+                values = [v for v in values if v != '[' and v != ']' and v != ',']
+
+            elif lin_num == 5:
+                fluxperchannel = values[-1].split(",")
+                values = [*values[:-1], fluxperchannel]
+                values = [-1 if (value == '-nan' or value == 'nan' or value == 'null') else value for value in values]
+
+            elif 8 <= lin_num <= 11:
+                # gal, gal zero, iso and iso zero coefficients with their errors
+                tokens = line.split(" ")
+                coeffs = tokens[0].split(",")
+                coeffsErr = [c.strip() for c in tokens[1].split(",")]
+                values = [coeffs, coeffsErr]
+
+            elif lin_num == 13:
+                tokens = line.split(" ")
+                energybins = tokens[0].split(",")
+                fovbins = tokens[1].split(",")
+                values = [
+                    [e.split("..")[0] for e in energybins],
+                    [e.split("..")[1] for e in energybins],
+                    [f.split("..")[0] for f in fovbins],
+                    [f.split("..")[1] for f in fovbins],
+                    *values[-5:]
+                ]
+
+            allValues += [v for v in values if v != '']
+
+        if len(allValues) != SourceFileParser.BODY_VALUES:
+            raise FileSourceParsingError("The values extracted from {} file are lesser then 128".format(sourceFilePath))
+
+        return allValues
+
+    @staticmethod
+    def parseFile(sourceFilePath):
+        """
+        It parses a single .source file.
+
+        Returns:
+            A dictionary with a value for each field of the schema.
+        """
+        with open(sourceFilePath, "r") as sf:
+            allValues = SourceFileParser.tokenize(sf.readlines(), sourceFilePath)
+
+        parsed = {}
+        for name, index, datatype in SourceFileParser.SCHEMA:
+            value = allValues[index]
+            if datatype == "List<float>":
+                parsed[name] = [SourceFileParser.toNumber(v) for v in value]
+            elif datatype == "float":
+                parsed[name] = SourceFileParser.toNumber(value)
+            else:
+                parsed[name] = value
+        return parsed
+
+    @staticmethod
+    def parseFiles(sourceFilesPaths, workers=1):
+        """
+        It parses many .source files into a single table, with one row for each file and one column for each field of the schema.
+
+        Args:
+            sourceFilesPaths (List[str]): the paths of the .source files.
+            workers (int): the number of processes parsing the files.
+
+        Returns:
+            An astropy Table. Scalar fields are float columns (nan when a value is not a number),
+            the multi-valued fields are object columns of float arrays. The ``sourceFile`` column holds the path of each file.
+        """
+        sourceFilesPaths = [str(Path(p)) for p in sourceFilesPaths]
+
+        if workers > 1 and len(sourceFilesPaths) > 1:
+            chunksize = max(1, len(sourceFilesPaths) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                rows = list(executor.map(SourceFileParser.parseFile, sourceFilesPaths, chunksize=chunksize))
+        else:
+            rows = [SourceFileParser.parseFile(p) for p in sourceFilesPaths]
+
+        columns = {"sourceFile": np.array(sourceFilesPaths, dtype=str)}
+
+        for name, _, datatype in SourceFileParser.SCHEMA:
+            values = [row[name] for row in rows]
+            if datatype == "List<float>":
+                column = np.empty(len(values), dtype=object)
+                column[:] = [SourceFileParser._toFloatArray(v) for v in values]
+            elif datatype == "float":
+                column = SourceFileParser._toFloatArray(values)
+            else:
+                column = np.array(values, dtype=str)
+            columns[name] = column
+
+        return Table(columns, names=list(columns.keys()))
+
+    @staticmethod
+    def _toFloatArray(values):
+        return np.array([v if isinstance(v, (int, float)) else np.nan for v in values], dtype=np.float64)
@@ -0,0 +1,198 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import numpy as np
+from pathlib import Path
+from xml.etree.ElementTree import fromstring, tostring
+
+from agilepy.core.source.Source import Source
+from agilepy.core.SourcesTable import SourcesTable
+from agilepy.core.SpatialIndex import SpatialIndex
+
+class SourcesCache:
+    """
+    An on-disk cache of parsed sources files (e.g. the 2AGL catalog).
+
+    The cache entry of a file is a numpy .npz file with the columns of its SourcesTable (names, positions,
+    fluxes and spectral indexes) and its raw rows (text lines or xml elements): loading the file again does not
+    parse the whole text/xml, and the Source objects are built lazily from the raw rows, as for a parsed file.
+    The entries contain data only, they are read with allow_pickle=False.
+    The key of an entry is a hash of the absolute path, size and modification time of the file.
+
+    When the total size of the cache exceeds ``maxSize`` bytes, the least recently used entries are evicted.
+
+    The cache directory can be shared by several processes: the entries are written into a temporary file and renamed.
+    """
+
+    SUFFIX = ".npz"
+
+    def __init__(self, cacheDir, maxSize=256*1024**2, agilepyLogger=None):
+        self.cacheDir = Path(cacheDir)
+        self.cacheDir.mkdir(parents=True, exist_ok=True)
+        self.maxSize = maxSize
+        self.logger = agilepyLogger
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def getDefaultCacheDir():
+        """
+        It returns the $AGILEPY_CACHE_DIR/sources directory, or ~/.cache/agilepy/sources if $AGILEPY_CACHE_DIR is not set.
+        """
+        cacheDir = os.environ.get("AGILEPY_CACHE_DIR", Path.home().joinpath(".cache", "agilepy"))
+        return Path(cacheDir).joinpath("sources")
+
+    def getKey(self, filePath):
+        filePath = Path(filePath).absolute()
+        stat = os.stat(filePath)
+        fingerprint = [str(filePath), stat.st_size, stat.st_mtime_ns]
+        return hashlib.sha256(json.dumps(fingerprint).encode()).hexdigest()
+
+    def getEntryPath(self, filePath):
+        return self.cacheDir.joinpath(self.getKey(filePath) + SourcesCache.SUFFIX)
+
+    def load(self, filePath):
+        """
+        Returns:
+            The SourcesTable of the file, or None if the file is not in the cache.
+        """
+        fileKey = SpatialIndex.getFileKey(filePath)
+        entryPath = self.getEntryPath(filePath)
+
+        if not entryPath.exists():
+            return None
+
+        try:
+            with np.load(entryPath, allow_pickle=False) as entry:
+                rowsFormat = str(entry["format"])
+                rowsData = entry["rows_data"].tobytes()
+                rowsOffsets = entry["rows_offsets"]
+                rows = [rowsData[start:stop].decode("utf8") for start, stop in zip(rowsOffsets[:-1], rowsOffsets[1:])]
+                if rowsFormat == "xml":
+                    rows, parseRow = [fromstring(row) for row in rows], Source.parseSourceXMLFormat
+                else:
+                    parseRow = Source.parseSourceTXTFormat
+                sourcesTable = SourcesTable(entry["names"], entry["glon"], entry["glat"], entry["flux"], entry["index"], rows, parseRow)
+            # the modification time of the entry is used by the LRU eviction policy
+            os.utime(entryPath)
+        except (OSError, EOFError, KeyError, ValueError, UnicodeDecodeError, SyntaxError) as e:
+            self._debug(f"The sources cache entry {entryPath} cannot be read: {e}")
+            return None
+
+        sourcesTable.filePath = str(filePath)
+        sourcesTable.fileKey = fileKey
+
+        self._debug(f"Sources of {filePath} loaded from the cache {entryPath}")
+
+        return sourcesTable
+
+    def store(self, filePath, sourcesTable):
+        """
+        It writes the columns and the raw rows of the SourcesTable of a file into the cache.
+        """
+        entryPath = self.getEntryPath(filePath)
+
+        rowsFormat = "xml" if sourcesTable._parseRow == Source.parseSourceXMLFormat else "txt"
+
+        rows = [(tostring(row, encoding="unicode") if rowsFormat == "xml" else row).encode("utf8") for row in sourcesTable._rows]
+        rowsOffsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        rowsOffsets[1:] = np.cumsum([len(row) for row in rows])
+
+        with self.lock:
+            fd, tmpPath = tempfile.mkstemp(dir=self.cacheDir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as entry:
+                    np.savez(entry,
+                             format=np.array(rowsFormat),
+                             names=sourcesTable.names,
+                             glon=sourcesTable.glon,
+                             glat=sourcesTable.glat,
+                             flux=sourcesTable.flux,
+                             index=sourcesTable.index,
+                             rows_data=np.frombuffer(b"".join(rows), dtype=np.uint8),
+                             rows_offsets=rowsOffsets)
+                os.replace(tmpPath, entryPath)
+            except BaseException:
+                Path(tmpPath).unlink(missing_ok=True)
+                raise
+
+            self._evict(entryPath)
+
+        self._debug(f"Sources of {filePath} stored in the cache {entryPath}")
+
+    def read(self, filePath):
+        """
+        It returns the SourcesTable of a file, from the cache or parsing the file (and storing it into the cache).
+        """
+        sourcesTable = self.load(filePath)
+
+        if sourcesTable is not None:
+            return sourcesTable
+
+        sourcesTable = SourcesTable.fromFile(filePath)
+
+        try:
+            self.store(filePath, sourcesTable)
+        except OSError as e:
+            self._debug(f"The sources of {filePath} cannot be stored in the cache: {e}")
+
+        return sourcesTable
+
+    def getEntries(self):
+        """
+        It returns the (path, modification time, size) of the entries of the cache.
+        """
+        entries = []
+        for entryPath in self.cacheDir.glob("*" + SourcesCache.SUFFIX):
+            try:
+                stat = entryPath.stat()
+            except OSError:
+                continue
+            entries.append((entryPath, stat.st_mtime_ns, stat.st_size))
+        return entries
+
+    def _evict(self, keep):
+        entries = sorted(self.getEntries(), key=lambda entry: entry[1])
+        totalSize = sum(size for _, _, size in entries)
+
+        for entryPath, _, size in entries:
+            if totalSize <= self.maxSize:
+                break
+            # the entry just stored is never evicted
+            if entryPath == keep:
+                continue
+            entryPath.unlink(missing_ok=True)
+            totalSize -= size
+            self._debug(f"The sources cache entry {entryPath} has been evicted")
+
+    def _debug(self, message):
+        if self.logger is not None:
+            self.logger.debug(message)
@@ -25,12 +25,13 @@
 #You should have received a copy of the GNU General Public License
 #along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import hashlib
 import numpy as np
+from copy import copy, deepcopy
 from pathlib import Path
 from inspect import signature
 from os.path import splitext
 from os import listdir
-from copy import deepcopy
 from datetime import datetime
 
 from functools import singledispatch
@@ -40,15 +41,18 @@ from xml.dom import minidom
 from agilepy.core.Parameters import Parameters
 from agilepy.core.source.Source import Source as SourceR
 from agilepy.core.source.MultiAnalysis import MultiAnalysis
+from agilepy.core.source.SourcesSnapshot import SourcesSnapshot
+from agilepy.core.SourceFileParser import SourceFileParser
+from agilepy.core.SourcesTable import SourcesTable
+from agilepy.core.SourcesCache import SourcesCache
 
 from agilepy.core.CustomExceptions import   SourceModelFormatNotSupported, \
                                             FileSourceParsingError, \
                                             SourceNotFound, \
-                                            SourcesFileLoadingError, \
                                             SourcesAgileFormatParsingError, \
                                             SourceParamNotFoundError, \
                                             MultiOutputNotFoundError
-from agilepy.utils.BooleanExpressionParser import BooleanParser
+from agilepy.utils.BooleanExpressionParser import compileExpression
 from agilepy.utils.Utils import Utils
 from agilepy.utils.AstroUtils import AstroUtils
 
@@ -62,18 +66,76 @@ class SourcesLibrary:
 
         self.sourcesBKP = None
 
+        # path => (sha256, size, mtime) of the files written by writeToFile()
+        self._writtenFiles = {}
+
         self.outdirPath = Path(self.config.getConf("output","outdir")).joinpath("sources_library")
 
         self.outdirPath.mkdir(parents=True, exist_ok=True)
 
+        self.sourcesCache = None
+
+    def enableSourcesCache(self, cacheDir=None, maxSize=256*1024**2):
+        """
+        It enables the on-disk cache of the parsed sources files: loading the same file (e.g. the 2AGL catalog) again
+        skips the parsing. The cache is disabled by default.
+
+        Args:
+            cacheDir (str): the cache directory. It defaults to None: $AGILEPY_CACHE_DIR/sources (or ~/.cache/agilepy/sources) is used.
+            maxSize (int): the maximum size of the cache (bytes): the least recently used entries are evicted.
+
+        Returns:
+            The SourcesCache object.
+        """
+        if cacheDir is None:
+            cacheDir = SourcesCache.getDefaultCacheDir()
+
+        self.sourcesCache = SourcesCache(Utils._expandEnvVar(str(cacheDir)), maxSize, self.logger)
+
+        return self.sourcesCache
+
+    def disableSourcesCache(self):
+        """
+        It disables the cache of the parsed sources files. The cache directory is not removed.
+        """
+        self.sourcesCache = None
+
     def backupSL(self):
-        self.sourcesBKP = deepcopy(self.sources)
+        """
+        It takes a copy-on-write snapshot of the sources (see SourcesSnapshot): only the sources changed
+        before restoreSL() is called are copied.
+        """
+        if self.sourcesBKP is not None:
+            self.sourcesBKP.close()
+
+        self.sourcesBKP = SourcesSnapshot(self.sources)
 
     def restoreSL(self):
-        self.sources = self.sourcesBKP
+        """
+        It restores the sources (and their parameters) saved by backupSL().
+        """
+        if self.sourcesBKP is None:
+            self.logger.warning("restoreSL() called without a previous backupSL(): nothing to restore.")
+            return
+
+        self.sources = self.sourcesBKP.restore()
+        self.sourcesBKP = None
+
+    def getCopy(self):
+        """
+        It returns a copy of the sources library with its own copy of the sources. The configuration,
+        the logger and the sources cache are shared.
+        """
+        slCopy = copy(self)
+        slCopy.sources = deepcopy(self.sources)
+        slCopy.sourcesBKP = None
+        slCopy._writtenFiles = {}
+        return slCopy
 
     def destroy(self):
         self.sources = []
+        if self.sourcesBKP is not None:
+            self.sourcesBKP.close()
         self.sourcesBKP = None
         self.outdirPath = None
 
@@ -108,9 +170,16 @@ class SourcesLibrary:
             scaleFlux = True
             self.logger.warning( f"The input energy range ({uEmin},{uEmax}) is different to the CAT2 energy range ({catEmin},{catEmax}). A scaling of the sources flux will be performed.")
 
-        return self.loadSourcesFromFile(catPath, rangeDist, scaleFlux=scaleFlux, catEmin=catEmin, catEmax=catEmax, show=show)
+        return self.loadSourcesFromFile(catPath, rangeDist, scaleFlux=scaleFlux, catEmin=catEmin, catEmax=catEmax, show=show, useSpatialIndex=True)
 
-    def loadSourcesFromFile(self, filePath, rangeDist=(0, float("inf")), scaleFlux=False, catEmin=None, catEmax=None, show=False):
+    def loadSourcesFromFile(self, filePath, rangeDist=(0, float("inf")), scaleFlux=False, catEmin=None, catEmax=None, show=False, useSpatialIndex=False):
+        """
+        Load sources from a .txt, .multi or .xml file, discarding the sources whose distance from the map center
+        is out of rangeDist and the sources already loaded.
+
+        If useSpatialIndex is True, the distance is computed only for the sources returned by a cone search
+        on the spatial index of the positions of the file, built once per content of the file (see SpatialIndex).
+        """
 
         filePath = Utils._expandEnvVar(filePath)
 
@@ -122,24 +191,18 @@ class SourcesLibrary:
 
             raise SourceModelFormatNotSupported("Format of {} not supported. Supported formats: {}".format(filePath, ' '.join(supportFormats)))
 
-        if fileExtension == ".xml":
-            newSources = self._loadFromSourcesXml(filePath)
-
-        elif fileExtension == ".txt" or fileExtension == ".multi":
-            newSources = self._loadFromSourcesTxt(filePath)
-
-        if newSources is None:
-            self.logger.critical( "Errors during %s parsing (%s)", filePath, fileExtension)
-            raise SourcesFileLoadingError("Errors during {} parsing ({})".format(filePath, fileExtension))
+        sourcesTable = self._readSourcesTable(filePath)
 
         mapCenterL = float(self.config.getOptionValue("glon"))
         mapCenterB = float(self.config.getOptionValue("glat"))
 
-        for newSource in newSources: newSource.setDistanceFromMapCenter(mapCenterL, mapCenterB)
+        rows = None
+        if useSpatialIndex and rangeDist[1] < 180:
+            rows = sourcesTable.getRowsWithin(mapCenterL, mapCenterB, rangeDist[1])
 
-        filteredSources = [source for source in self._filterByDistance(newSources, rangeDist)]
+        sourcesTable.computeDistances(mapCenterL, mapCenterB, rows)
 
-        filteredSources = [source for source in self._discardIfAlreadyExist(filteredSources)]
+        selected = sourcesTable.getDistanceMask(rangeDist) & ~sourcesTable.getNamesMask(self.getSourcesNames())
 
         uEmin = np.matrix(self.config.getOptionValue("energybins")).min()
         uEmax = np.matrix(self.config.getOptionValue("energybins")).max()
@@ -147,11 +210,9 @@ class SourcesLibrary:
         if scaleFlux:
             if catEmax is None or catEmin is None:
                 raise ValueError("catEmax and catEmin must be provided if scaleFlux is True.")
-            scaledSources = []
-            for source in filteredSources:
-                scaledSources.append(self._scaleSourcesFlux(source, uEmin, uEmax, catEmin, catEmax))
-            filteredSources = scaledSources
+            sourcesTable.scaleFlux(uEmin, uEmax, catEmin, catEmax)
 
+        filteredSources = sourcesTable.getSources(selected)
 
         if show:
             for s in filteredSources:
@@ -165,6 +226,28 @@ class SourcesLibrary:
 
         return filteredSources
 
+    def coneSearch(self, filePath, centers, radius):
+        """
+        It searches the sources of a .txt, .multi or .xml file within 'radius' degrees from each of
+        the (glon, glat) centers. The sources are not loaded into the library.
+
+        The spatial index of the file is built once per content of the file and kept in memory (see SpatialIndex).
+
+        Returns:
+            A list with the names of the sources found for each center.
+        """
+        sourcesTable = self._readSourcesTable(Utils._expandEnvVar(filePath))
+
+        found = []
+
+        for (glon, glat), rows in zip(centers, sourcesTable.getRowsWithinMany(centers, radius)):
+
+            dist = sourcesTable.computeDistances(glon, glat, rows)[rows]
+
+            found.append([str(name) for name in sourcesTable.names[rows[(dist >= 0) & (dist <= radius)]]])
+
+        return found
+
     def convertCatalogToXml(self, catalogFilepath):
 
         catalogFilepath = Utils._expandEnvVar(catalogFilepath)
@@ -205,14 +288,40 @@ class SourcesLibrary:
             sourceLibraryToWrite = self._convertToRegFormat(sources)
             outputFilePath = outputFilePath.with_suffix('.reg')
 
+        digest = hashlib.sha256(sourceLibraryToWrite.encode()).hexdigest()
+
+        if self._isAlreadyWritten(outputFilePath, digest):
+            self.logger.debug(f"File {outputFilePath} has the same content, it has not been written again")
+            return str(outputFilePath)
+
         with open(outputFilePath, "w") as sourceLibraryFile:
 
             sourceLibraryFile.write(sourceLibraryToWrite)
 
+        stat = outputFilePath.stat()
+        self._writtenFiles[str(outputFilePath)] = (digest, stat.st_size, stat.st_mtime_ns)
+
         self.logger.info("File %s has been produced", outputFilePath)
 
         return str(outputFilePath)
 
+    def _isAlreadyWritten(self, filePath, digest):
+        """
+        It returns True if filePath has been written with the content of the given digest
+        and it has not been modified since.
+        """
+        written = self._writtenFiles.get(str(filePath))
+
+        if written is None:
+            return False
+
+        try:
+            stat = Path(filePath).stat()
+        except OSError:
+            return False
+
+        return written == (digest, stat.st_size, stat.st_mtime_ns)
+
     def getSources(self):
         """
         This method ... blabla...
@@ -227,15 +336,21 @@ class SourcesLibrary:
 
     def selectSources(self, selection, show=False):
 
-        userSelectionParamsNames = SourcesLibrary._extractSelectionParams(selection)
+        if isinstance(selection, str):
 
-        selected = []
+            selected = self._selectSourcesByExpression(selection)
 
-        for source in self.sources:
+        else:
 
-            if self._selectSource(selection, source, userSelectionParamsNames):
+            userSelectionParamsNames = SourcesLibrary._extractSelectionParams(selection)
 
-                selected.append(source)
+            selected = []
+
+            for source in self.sources:
+
+                if self._selectSource(selection, source, userSelectionParamsNames):
+
+                    selected.append(source)
 
         if show:
             for s in selected:
@@ -302,183 +417,41 @@ class SourcesLibrary:
 
     def parseSourceFile(self, sourceFilePath):
         """
-        Static method
+        It parses the output file of AG_multi.
 
         returns: a MultiAnalysis object
         """
         self.logger.debug(f"Parsing output file of AG_multi: {sourceFilePath}")
 
-        with open(sourceFilePath, 'r') as sf:
-            lines = sf.readlines()
-
-        body = [line for line in lines if line[0] != "!"]
-
-        if len(body) != 17:
-            raise FileSourceParsingError("The number of body lines of the %s source file is not 17."%(sourceFilePath))
-
-        allValues = []
-
-        for lin_num,line in enumerate(body):
-
-            values = line.split(" ")
-
-            values = [v.strip() for v in values if v!='']
-
-            if lin_num == 0:
-                values = [v for v in values if v!='[' and v!=']' and v!=',']
-
-            elif lin_num == 5:
-                fluxperchannel = values[-1].split(",")
-                values = values[:-1]
-                values = [*values, fluxperchannel]
-                values = [-1 if (value=='-nan' or value=='nan' or value=='null') else value for value in values]
-            elif lin_num == 8:
-                galcoeffs  = line.split(" ")[0].split(",")
-                galcoeffserr = [g.strip() for g in line.split(" ")[1].split(",")]
-                values = [galcoeffs, galcoeffserr]
-
-            elif lin_num == 9:
-                galzerocoeffs  = line.split(" ")[0].split(",")
-                galzerocoeffserr = [g.strip() for g in line.split(" ")[1].split(",")]
-                values = [galzerocoeffs, galzerocoeffserr]
-
-            elif lin_num == 10:
-                isocoeffs  = line.split(" ")[0].split(",")
-                isocoeffserr = [g.strip() for g in line.split(" ")[1].split(",")]
-                values = [isocoeffs, isocoeffserr]
-
-            elif lin_num == 11:
-                isozerocoeffs  = line.split(" ")[0].split(",")
-                isozerocoeffserr = [g.strip() for g in line.split(" ")[1].split(",")]
-                values = [isozerocoeffs, isozerocoeffserr]
-
-            elif lin_num == 13:
-                energybins = line.split(" ")[0].split(",")
-                emins = [e.split("..")[0] for e in energybins]
-                emaxs = [e.split("..")[1] for e in energybins]
-                fovbinnumbers = line.split(" ")[1].split(",")
-                fovmin = [e.split("..")[0] for e in fovbinnumbers]
-                fovmax = [e.split("..")[1] for e in fovbinnumbers]
-                values = [emins, emaxs, fovmin, fovmax, *values[-5:]]
-
-
-            values = [v for v in values if v!='']
-
-            # print("LINE %d ELEMENTS %d"%(lin_num, len(values)))
-            allValues += values
-
-        if len(allValues) != 128:
-            self.logger.critical(f"The values extracted from {sourceFilePath} file are lesser then 128")
-            raise FileSourceParsingError("The values extracted from {} file are lesser then 128".format(sourceFilePath))
+        try:
+            parsed = SourceFileParser.parseFile(sourceFilePath)
+        except FileSourceParsingError as e:
+            self.logger.critical(str(e))
+            raise
 
         multiAnalysisResult = MultiAnalysis()
 
         multiAnalysisResult.setParameter("multiDate", {"value": datetime.now()})
 
-        multiAnalysisResult.setParameter("multiName", {"value": allValues[0]})
-
-        multiAnalysisResult.setParameter("multiFix", {"value": allValues[1]})
-        multiAnalysisResult.setParameter("multiindex", {"value": allValues[2]})
-        multiAnalysisResult.setParameter("multiULConfidenceLevel", {"value": allValues[3]})
-        multiAnalysisResult.setParameter("multiSrcLocConfLevel", {"value": allValues[4]})
+        for parameterName, value in parsed.items():
+            multiAnalysisResult.setParameter(parameterName, {"value": value})
 
-        multiAnalysisResult.setParameter("multiStartL", {"value": allValues[5]})
-        multiAnalysisResult.setParameter("multiStartB", {"value": allValues[6]})
-
-        multiAnalysisResult.setParameter("multiStartFlux", {"value": allValues[7]})
-        multiAnalysisResult.setParameter("multiTypefun", {"value": allValues[12]})
-        multiAnalysisResult.setParameter("multipar2", {"value": allValues[13]})
-        multiAnalysisResult.setParameter("multipar3", {"value": allValues[14]})
-        multiAnalysisResult.setParameter("multiGalmode2", {"value": allValues[15]})
-        multiAnalysisResult.setParameter("multiGalmode2fit", {"value": allValues[16]})
-        multiAnalysisResult.setParameter("multiIsomode2", {"value": allValues[17]})
-        multiAnalysisResult.setParameter("multiIsomode2fit", {"value": allValues[18]})
-        multiAnalysisResult.setParameter("multiEdpcor", {"value": allValues[19]})
-        multiAnalysisResult.setParameter("multiFluxcor", {"value": allValues[20]})
-        multiAnalysisResult.setParameter("multiIntegratorType", {"value": allValues[21]})
-        multiAnalysisResult.setParameter("multiExpratioEval", {"value": allValues[22]})
-        multiAnalysisResult.setParameter("multiExpratioMinthr", {"value": allValues[23]})
-        multiAnalysisResult.setParameter("multiExpratioMaxthr", {"value": allValues[24]})
-        multiAnalysisResult.setParameter("multiExpratioSize", {"value": allValues[25]})
-    
-
-        multiAnalysisResult.setParameter("multiSqrtTS", {"value": allValues[37]})
-
-        multiAnalysisResult.setParameter("multiFlux", {"value": allValues[53]})
-        multiAnalysisResult.setParameter("multiFluxErr", {"value": allValues[54]})
-        multiAnalysisResult.setParameter("multiFluxPosErr", {"value": allValues[55]})
-        multiAnalysisResult.setParameter("multiFluxNegErr", {"value": allValues[56]})
-
-        multiAnalysisResult.setParameter("multiUL", {"value": allValues[57]})
-
-        multiAnalysisResult.setParameter("multiExp", {"value": allValues[59]})
-
-
-        multiAnalysisResult.setParameter("multiErgLog", {"value": allValues[64]})
-        multiAnalysisResult.setParameter("multiErgLogErr", {"value": allValues[65]})
-        multiAnalysisResult.setParameter("multiErgLogUL", {"value": allValues[66]})
-
-        multiAnalysisResult.setParameter("multiLPeak", {"value": allValues[38]})
-        multiAnalysisResult.setParameter("multiBPeak", {"value": allValues[39]})
-        multiAnalysisResult.setParameter("multiDistFromStartPositionPeak", {"value": allValues[40]})
-
-        multiAnalysisResult.setParameter("multiL", {"value": allValues[41]})
-        multiAnalysisResult.setParameter("multiB", {"value": allValues[42]})
-        multiAnalysisResult.setParameter("multiDistFromStartPosition", {"value": allValues[43]})
-        multiAnalysisResult.setParameter("multir", {"value": allValues[44]})
-        multiAnalysisResult.setParameter("multia", {"value": allValues[45]})
-        multiAnalysisResult.setParameter("multib", {"value": allValues[46]})
-        multiAnalysisResult.setParameter("multiphi", {"value": allValues[47]})
+        return multiAnalysisResult
 
-        multiAnalysisResult.setParameter("multiCounts", {"value": allValues[48]})
-        multiAnalysisResult.setParameter("multiCountsErr", {"value": allValues[49]})
+    def parseSourceFiles(self, sourceFilesPaths, workers=1):
+        """
+        It parses many output files of AG_multi into a single table.
 
+        Args:
+            sourceFilesPaths (List[str]): the paths of the .source files.
+            workers (int): the number of processes parsing the files.
 
-        multiAnalysisResult.setParameter("multiIndex", {"value": allValues[69]})
-        multiAnalysisResult.setParameter("multiIndexErr", {"value": allValues[70]})
-        
-        multiAnalysisResult.setParameter("multiPar2", {"value": allValues[71]})
-        multiAnalysisResult.setParameter("multiPar2Err", {"value": allValues[72]})
-
-        multiAnalysisResult.setParameter("multiPar3", {"value": allValues[73]})
-        multiAnalysisResult.setParameter("multiPar3Err", {"value": allValues[74]})
-
-        multiAnalysisResult.setParameter("multiFitCts", {"value": allValues[75]})
-        multiAnalysisResult.setParameter("multiFitFitstatus0", {"value": allValues[76]})
-        multiAnalysisResult.setParameter("multiFitFcn0", {"value":  allValues[77]})
-        multiAnalysisResult.setParameter("multiFitEdm0", {"value": allValues[78]})
-        multiAnalysisResult.setParameter("multiFitNvpar0", {"value": allValues[79]})
-        multiAnalysisResult.setParameter("multiFitNparx0", {"value": allValues[80]})
-        multiAnalysisResult.setParameter("multiFitIter0", {"value": allValues[81]})
-        multiAnalysisResult.setParameter("multiFitFitstatus1", {"value": allValues[82]})
-        multiAnalysisResult.setParameter("multiFitFcn1", {"value": allValues[83]})
-        multiAnalysisResult.setParameter("multiFitEdm1", {"value": allValues[84]})
-        multiAnalysisResult.setParameter("multiFitNvpar1", {"value": allValues[85]})
-        multiAnalysisResult.setParameter("multiFitNparx1", {"value": allValues[86]})
-        multiAnalysisResult.setParameter("multiFitIter1", {"value": allValues[87]})
-        multiAnalysisResult.setParameter("multiFitLikelihood1", {"value": allValues[88]})
-
-        multiAnalysisResult.setParameter("multiGalCoeff", {"value": [eval(val) for val in allValues[89]]})
-        multiAnalysisResult.setParameter("multiGalErr", {"value": [eval(val) for val in allValues[90]]})
-        multiAnalysisResult.setParameter("multiIsoCoeff", {"value": [eval(val) for val in allValues[93]]})
-        multiAnalysisResult.setParameter("multiIsoErr", {"value": [eval(val) for val in allValues[94]]})
-
-        multiAnalysisResult.setParameter("startDataTT", {"value": allValues[99]})
-        multiAnalysisResult.setParameter("endDataTT", {"value": allValues[100]})
-
-
-        multiAnalysisResult.setParameter("multiEmin", {"value": allValues[103]})
-        multiAnalysisResult.setParameter("multiEmax", {"value": allValues[104]})
-        multiAnalysisResult.setParameter("multifovmin", {"value": allValues[105]})
-        multiAnalysisResult.setParameter("multifovmax", {"value": allValues[106]})
-        multiAnalysisResult.setParameter("multialbedo", {"value": allValues[107]})
-        multiAnalysisResult.setParameter("multibinsize", {"value": allValues[108]})
-        multiAnalysisResult.setParameter("multiexpstep", {"value": allValues[109]})
-        multiAnalysisResult.setParameter("multiphasecode", {"value": allValues[110]})
-
-        multiAnalysisResult.setParameter("multiExpRatio", {"value": allValues[111]})
+        Returns:
+            An astropy Table with one row for each .source file.
+        """
+        self.logger.debug(f"Parsing {len(sourceFilesPaths)} output files of AG_multi with {workers} workers")
 
-        return multiAnalysisResult
+        return SourceFileParser.parseFiles(sourceFilesPaths, workers=workers)
 
     def updateSourceWithMLEResults(self, multiAnalysisResult):
         
@@ -575,17 +548,16 @@ class SourcesLibrary:
 
     @_extractSelectionParams.register(str)
     def _(selectionString):
-        bp = BooleanParser(selectionString)
-        return bp.getVARTokens()
+        return list(compileExpression(selectionString)[0])
 
     @_extractSelectionParams.register(object)
     def _(selectionLambda):
         return list(signature(selectionLambda).parameters)
 
-    def _selectSource(self, selection, source, userSelectionParams):
-        
+    def _getSelectionValues(self, source, userSelectionParams):
+
         selectionParamsValues = []
-        
+
         for paramName in userSelectionParams:
             paramValue = source.getSelectionValue(paramName)
             if paramValue is not None:
@@ -594,6 +566,47 @@ class SourcesLibrary:
                 self.logger.warning(self, f"The selection parameter '{paramName}' cannot be used for source '{source.name}' since mle() has not been called yet! Skipping source..")
                 return None
 
+        return selectionParamsValues
+
+    def _selectSourcesByExpression(self, selectionString):
+        """
+        The selection string is compiled once (and cached) and it is evaluated as a numpy mask
+        over the columns of the selection parameters of all the sources.
+        """
+        userSelectionParams, predicate = compileExpression(selectionString)
+        userSelectionParams = list(dict.fromkeys(userSelectionParams))
+
+        candidates = []
+        rows = []
+
+        for source in self.sources:
+            selectionParamsValues = self._getSelectionValues(source, userSelectionParams)
+            if selectionParamsValues is not None:
+                candidates.append(source)
+                rows.append(selectionParamsValues)
+
+        if not candidates:
+            return []
+
+        columns = {paramName: np.asarray(column) for paramName, column in zip(userSelectionParams, zip(*rows))}
+
+        try:
+            mask = np.broadcast_to(predicate(columns), (len(candidates),))
+        except TypeError:
+            # values that cannot be compared as arrays: evaluate the predicate source by source
+            mask = [predicate(dict(zip(userSelectionParams, row))) for row in rows]
+
+        self.logger.debug( f"userSelectionParams: {userSelectionParams} selected: {int(np.count_nonzero(mask))}/{len(candidates)}")
+
+        return [source for source, selected in zip(candidates, mask) if selected]
+
+    def _selectSource(self, selection, source, userSelectionParams):
+
+        selectionParamsValues = self._getSelectionValues(source, userSelectionParams)
+
+        if selectionParamsValues is None:
+            return None
+
         self.logger.debug( f"userSelectionParams: {userSelectionParams} selectionParamsValues: {selectionParamsValues}")
 
         return SourcesLibrary.__selectSource(selection, source, userSelectionParams, selectionParamsValues)
@@ -604,14 +617,21 @@ class SourcesLibrary:
 
     @__selectSource.register(str)
     def _(selectionStr, source, userSelectionParamsMapping, selectionParamsValues):
-        bp = BooleanParser(selectionStr)
+        _, predicate = compileExpression(selectionStr)
         variable_dict = dict(zip(userSelectionParamsMapping, selectionParamsValues))
-        return bp.evaluate(variable_dict)
+        return bool(predicate(variable_dict))
 
     @__selectSource.register(object)
     def _(selectionLambda, source, userSelectionParamsMapping, selectionParamsValues):
         return selectionLambda(*selectionParamsValues)
 
+    def _readSourcesTable(self, filePath):
+
+        if self.sourcesCache is None:
+            return SourcesTable.fromFile(filePath)
+
+        return self.sourcesCache.read(filePath)
+
     def _loadFromSourcesXml(self, xmlFilePath):
 
         self.logger.debug( f"Parsing {xmlFilePath} ...")
@@ -662,134 +682,149 @@ class SourcesLibrary:
 
         for source in sources:
 
-            # get flux value
-            if source.get("multiDate")["value"]:
-                flux = source.get("multiFlux")["value"]
-            else:
-                flux = source.get("flux")["value"]
-
-            sourceStr += str(flux)+" "
-
-            # set l and b according to card #335
-            #
-
-            """
-            Multi parameter mapping
-            "flux" : "multiFlux",
-            "index" : "multiIndex",
-            "index1" : "multiIndex",
-            "cutoffEnergy" : "multiPar2",
-            "pivotEnergy" : "multiPar2",
-            "index2" : "multiPar3",
-            "curvature" : "multiPar3",
-            """
-            
-            multiL = source.get("multiL")["value"] 
-            multiB = source.get("multiB")["value"] 
-            multiLPeak = source.get("multiLPeak")["value"]
-            multiBPeak = source.get("multiBPeak")["value"]
-            index = source.get("multiIndex")["value"]
-            pos = source.get("pos")["value"]
-            startL = pos[0]
-            startB = pos[1]
-
-            glon = multiL
-            glat = multiB
-
-            self.logger.debug(f"Parameters: multiL={multiL}, multiB={multiB}, multiLPeak={multiLPeak}, multiBPeak={multiBPeak}, startL={startL}, startB={startB} ")
-
-            if glon == -1 or glat == -1 or position == "peak" or glon == None or glat == None:
-                glon = multiLPeak
-                glat = multiBPeak
-                self.logger.debug(f"Ellipse values not available, I got peak values")
-            
-            if glon == -1 or glat == -1 or position == "initial" or glon == None or glat == None:
-                glon = startL
-                glat = startB
-                self.logger.debug(f"Ellipse and peak values not available, I got initial values")
-           
-            sourceStr += str(glon) + " "
-            sourceStr += str(glat) + " "
-            
-            if index is not None:
-                sourceStr += str(index) + " "
-            else:
-                sourceStr += str(source.spectrum.getSpectralIndex()) + " "
+            # the text of a source is cached until one of its parameters is set
+            sourceLine = source.getCachedFormat(("txt", position))
 
-            sourceStr += SourcesLibrary._computeFixFlag(source, source.spectrum.getType())+" "
+            if sourceLine is None:
+                sourceLine = self._convertSourceToAgileFormat(source, position)
+                source.setCachedFormat(("txt", position), sourceLine)
 
-            sourceStr += "2 "
+            sourceStr += sourceLine
 
-            sourceStr += source.name + " "
+        return sourceStr
 
-            sourceStr += str(source.get("locationLimit")["value"]) + " "
+    def _convertSourceToAgileFormat(self, source, position):
 
-            if source.spectrum.getType() == "PowerLaw":
-                sourceStr += "0 0 0 "
+        sourceStr = ""
 
-            elif source.spectrum.getType() == "PLExpCutoff":
-                cutoffenergy = source.get("multiPar2")["value"] 
-                if cutoffenergy is None:
-                    cutoffenergy = source.get("cutoffEnergy")["value"]
-                sourceStr += "1 "+str(cutoffenergy)+" 0 "
+        # get flux value
+        if source.get("multiDate")["value"]:
+            flux = source.get("multiFlux")["value"]
+        else:
+            flux = source.get("flux")["value"]
 
-            elif source.spectrum.getType() == "PLSuperExpCutoff":
-                
-                cutoffenergy = source.get("multiPar2")["value"] 
-                if cutoffenergy is None:
-                    cutoffenergy = source.get("cutoffEnergy")["value"]
-                
-                index2 = source.get("multiPar3")["value"]
-                if index2 is None:
-                    index2 = source.get("index2")["value"]
-                
-                sourceStr += "2 "+str(cutoffenergy)+" "+str(index2)+" "
+        sourceStr += str(flux)+" "
 
-            elif source.spectrum.getType() == "LogParabola":
-                
-                pivotenergy = source.get("multiPar2")["value"] 
-                if pivotenergy is None:
-                    pivotenergy = source.get("pivotEnergy")["value"]
+        # set l and b according to card #335
+        #
 
-                curvature = source.get("multiPar3")["value"] 
-                if curvature is None:
-                    curvature = source.get("curvature")["value"]
-                sourceStr += "3 "+str(pivotenergy)+" "+str(curvature)+" "
+        """
+        Multi parameter mapping
+        "flux" : "multiFlux",
+        "index" : "multiIndex",
+        "index1" : "multiIndex",
+        "cutoffEnergy" : "multiPar2",
+        "pivotEnergy" : "multiPar2",
+        "index2" : "multiPar3",
+        "curvature" : "multiPar3",
+        """
+        
+        multiL = source.get("multiL")["value"] 
+        multiB = source.get("multiB")["value"] 
+        multiLPeak = source.get("multiLPeak")["value"]
+        multiBPeak = source.get("multiBPeak")["value"]
+        index = source.get("multiIndex")["value"]
+        pos = source.get("pos")["value"]
+        startL = pos[0]
+        startB = pos[1]
+
+        glon = multiL
+        glat = multiB
+
+        self.logger.debug(f"Parameters: multiL={multiL}, multiB={multiB}, multiLPeak={multiLPeak}, multiBPeak={multiBPeak}, startL={startL}, startB={startB} ")
+
+        if glon == -1 or glat == -1 or position == "peak" or glon == None or glat == None:
+            glon = multiLPeak
+            glat = multiBPeak
+            self.logger.debug(f"Ellipse values not available, I got peak values")
+        
+        if glon == -1 or glat == -1 or position == "initial" or glon == None or glat == None:
+            glon = startL
+            glat = startB
+            self.logger.debug(f"Ellipse and peak values not available, I got initial values")
+       
+        sourceStr += str(glon) + " "
+        sourceStr += str(glat) + " "
+        
+        if index is not None:
+            sourceStr += str(index) + " "
+        else:
+            sourceStr += str(source.spectrum.getSpectralIndex()) + " "
 
-            else:
-                raise ValueError("Spectrum type not supported!")
+        sourceStr += SourcesLibrary._computeFixFlag(source, source.spectrum.getType())+" "
 
-            # Adding index limit min and max values
-            if source.spectrum.getType() == "PLSuperExpCutoff":
-                sourceStr += str(source.get("index1")["min"]) + " " + \
-                             str(source.get("index1")["max"]) + " "
-            else:
-                sourceStr += str(source.get("index")["min"]) + " " + \
-                             str(source.get("index")["max"]) + " "
+        sourceStr += "2 "
 
-            # Adding par2 and par3 limit min and max values
-            if source.spectrum.getType() == "PowerLaw":
-                sourceStr += "20 10000 0 100"
+        sourceStr += source.name + " "
 
-            elif source.spectrum.getType() == "PLExpCutoff":
-                sourceStr += str(source.get("cutoffEnergy")["min"]) +" " \
-                           + str(source.get("cutoffEnergy")["max"]) +" "\
-                           + " 0 100"
+        sourceStr += str(source.get("locationLimit")["value"]) + " "
 
-            elif source.spectrum.getType() == "PLSuperExpCutoff":
-                sourceStr += str(source.get("cutoffEnergy")["min"]) +" "\
-                           + str(source.get("cutoffEnergy")["max"]) +" "\
-                           + str(source.get("index2")["min"]) +" "\
-                           + str(source.get("index2")["max"])
+        if source.spectrum.getType() == "PowerLaw":
+            sourceStr += "0 0 0 "
 
-            else:
-                sourceStr += str(source.get("pivotEnergy")["min"]) +" "\
-                           + str(source.get("pivotEnergy")["max"]) +" "\
-                           + str(source.get("curvature")["min"]) +" "\
-                           + str(source.get("curvature")["max"])
+        elif source.spectrum.getType() == "PLExpCutoff":
+            cutoffenergy = source.get("multiPar2")["value"] 
+            if cutoffenergy is None:
+                cutoffenergy = source.get("cutoffEnergy")["value"]
+            sourceStr += "1 "+str(cutoffenergy)+" 0 "
 
+        elif source.spectrum.getType() == "PLSuperExpCutoff":
+            
+            cutoffenergy = source.get("multiPar2")["value"] 
+            if cutoffenergy is None:
+                cutoffenergy = source.get("cutoffEnergy")["value"]
+            
+            index2 = source.get("multiPar3")["value"]
+            if index2 is None:
+                index2 = source.get("index2")["value"]
+            
+            sourceStr += "2 "+str(cutoffenergy)+" "+str(index2)+" "
 
-            sourceStr += "\n"
+        elif source.spectrum.getType() == "LogParabola":
+            
+            pivotenergy = source.get("multiPar2")["value"] 
+            if pivotenergy is None:
+                pivotenergy = source.get("pivotEnergy")["value"]
+
+            curvature = source.get("multiPar3")["value"] 
+            if curvature is None:
+                curvature = source.get("curvature")["value"]
+            sourceStr += "3 "+str(pivotenergy)+" "+str(curvature)+" "
+
+        else:
+            raise ValueError("Spectrum type not supported!")
+
+        # Adding index limit min and max values
+        if source.spectrum.getType() == "PLSuperExpCutoff":
+            sourceStr += str(source.get("index1")["min"]) + " " + \
+                         str(source.get("index1")["max"]) + " "
+        else:
+            sourceStr += str(source.get("index")["min"]) + " " + \
+                         str(source.get("index")["max"]) + " "
+
+        # Adding par2 and par3 limit min and max values
+        if source.spectrum.getType() == "PowerLaw":
+            sourceStr += "20 10000 0 100"
+
+        elif source.spectrum.getType() == "PLExpCutoff":
+            sourceStr += str(source.get("cutoffEnergy")["min"]) +" " \
+                       + str(source.get("cutoffEnergy")["max"]) +" "\
+                       + " 0 100"
+
+        elif source.spectrum.getType() == "PLSuperExpCutoff":
+            sourceStr += str(source.get("cutoffEnergy")["min"]) +" "\
+                       + str(source.get("cutoffEnergy")["max"]) +" "\
+                       + str(source.get("index2")["min"]) +" "\
+                       + str(source.get("index2")["max"])
+
+        else:
+            sourceStr += str(source.get("pivotEnergy")["min"]) +" "\
+                       + str(source.get("pivotEnergy")["max"]) +" "\
+                       + str(source.get("curvature")["min"]) +" "\
+                       + str(source.get("curvature")["max"])
+
+
+        sourceStr += "\n"
 
         return sourceStr
 
@@ -805,12 +840,8 @@ class SourcesLibrary:
 
             spectrum_tag = Element("spectrum", {"type": source.spectrum.getType()})
 
-            for parameterDict in source.spectrum.getAttributes():
-                parameterDict.pop("err", None)
-                parameterDict.pop("datatype", None)
-                parameterDict.pop("um", None)
-                for key,val in parameterDict.items():
-                    parameterDict[key] = str(val)
+            for parameter in source.spectrum.getAttributes():
+                parameterDict = {key: str(val) for key,val in parameter.items() if key not in ["err", "datatype", "um"]}
                 param_tag = Element("parameter", parameterDict)
                 spectrum_tag.append(param_tag)
 
@@ -819,11 +850,7 @@ class SourcesLibrary:
             spatial_model_tag = Element("spatialModel", { "type": source.spatialModel.getType(), \
                                                           "location_limit": str(source.get("locationLimit")["value"]) })
 
-            posParam = source.get("pos")
-            posParam.pop("datatype", None)
-            posParam.pop("um", None)
-            for key,val in posParam.items():
-                    posParam[key] = str(val)
+            posParam = {key: str(val) for key,val in source.get("pos").items() if key not in ["datatype", "um"]}
 
             param_tag = Element("parameter", posParam)
             spatial_model_tag.append(param_tag)
@@ -925,28 +952,3 @@ class SourcesLibrary:
 
         return str(fixflag)
 
-    def _discardIfAlreadyExist(self, sources):
-        for source in sources:
-            if not self.doesSourceAlreadyExist(source.name):
-                yield source
-
-    def _filterByDistance(self, sources, rangeDist):
-        for source in sources:
-            distance = source.get("dist")["value"]
-            if distance >= rangeDist[0] and distance <= rangeDist[1]:
-                yield source
-
-    def _scaleSourcesFlux(self, source, emin, emax, catEmin, catEmax):
-
-        si = source.spectrum.getSpectralIndex()
-        fl = source.spectrum.getVal("flux")
-        c = catEmin
-        d = catEmax
-        a = emin
-        b = emax
-
-        p1 = fl * (si-1) / ( c ** (1-si) - d ** (1-si) )
-        f1 = (p1 / (si-1)) * ( a ** (1-si) - b ** (1-si) )
-        source.set("flux", {"value": f1})
-
-        return source
@@ -0,0 +1,309 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from ast import literal_eval
+from os.path import splitext
+from xml.etree.ElementTree import parse
+
+from agilepy.core.source.Source import Source
+from agilepy.core.SpatialIndex import SpatialIndex
+from agilepy.utils.AstroUtils import AstroUtils
+from agilepy.core.CustomExceptions import SourceModelFormatNotSupported, \
+                                          SourcesAgileFormatParsingError, \
+                                          XMLParseError
+
+class SourcesTable:
+    """
+    A struct-of-arrays view of the sources of a sources file (or catalog).
+
+    The name, position, flux and spectral index of every source are kept in numpy arrays, with a name to row
+    hash index, so that distances, flux scaling and filtering are computed on whole columns. Cone searches
+    use a spatial index of the positions (see SpatialIndex).
+    The Source objects are built lazily, the first time a row is requested, from the raw row of the file.
+    """
+
+    def __init__(self, names, glon, glat, flux, index, rows, parseRow):
+        """
+        Args:
+            names (List[str]): the names of the sources.
+            glon (List[float]): the galactic longitude of the sources.
+            glat (List[float]): the galactic latitude of the sources.
+            flux (List[float]): the flux of the sources.
+            index (List[float]): the spectral index of the sources.
+            rows (List): the raw rows (text lines or xml elements) the Source objects are built from.
+            parseRow (callable): the function that builds a Source object from a raw row.
+        """
+        self.names = np.asarray(names, dtype=str)
+        self.glon = np.asarray(glon, dtype=np.float64)
+        self.glat = np.asarray(glat, dtype=np.float64)
+        self.flux = np.asarray(flux, dtype=np.float64)
+        self.index = np.asarray(index, dtype=np.float64)
+        self.dist = np.full(len(self.names), np.nan)
+
+        self.nameIndex = {}
+        for row, name in enumerate(self.names):
+            self.nameIndex.setdefault(str(name), row)
+
+        self._rows = rows
+        self._parseRow = parseRow
+        self._sources = [None] * len(self.names)
+        self._fluxScaled = False
+
+        self.filePath = None
+        # the (path, size, modification time) of the file when it has been read (see SpatialIndex.getFileKey)
+        self.fileKey = None
+        self._spatialIndex = None
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def fromFile(filePath):
+        """
+        It reads a sources file in the .txt, .multi or .xml format.
+
+        Returns:
+            A SourcesTable object.
+        """
+        _, fileExtension = splitext(filePath)
+
+        fileKey = SpatialIndex.getFileKey(filePath) if fileExtension in (".xml", ".txt", ".multi") else None
+
+        if fileExtension == ".xml":
+            sourcesTable = SourcesTable.fromXmlFile(filePath)
+
+        elif fileExtension == ".txt" or fileExtension == ".multi":
+            sourcesTable = SourcesTable.fromTxtFile(filePath)
+
+        else:
+            raise SourceModelFormatNotSupported("Format of {} not supported. Supported formats: .txt .xml .multi".format(filePath))
+
+        sourcesTable.filePath = filePath
+        sourcesTable.fileKey = fileKey
+
+        return sourcesTable
+
+    @staticmethod
+    def fromTxtFile(txtFilePath):
+
+        names, glon, glat, flux, index, rows = [], [], [], [], [], []
+
+        with open(txtFilePath, "r") as txtFile:
+
+            for line in txtFile:
+
+                if line == "\n":
+                    continue
+
+                elements = [elem.strip() for elem in line.split(" ") if elem]
+
+                if len(elements) != 17:
+                    raise SourcesAgileFormatParsingError("The number of elements on the line {} is not 17, but {}".format(line, len(elements)))
+
+                flux.append(float(elements[0]))
+                glon.append(float(elements[1]))
+                glat.append(float(elements[2]))
+                index.append(float(elements[3]))
+                names.append(elements[6])
+                rows.append(line)
+
+        return SourcesTable(names, glon, glat, flux, index, rows, Source.parseSourceTXTFormat)
+
+    @staticmethod
+    def fromXmlFile(xmlFilePath):
+
+        names, glon, glat, flux, index, rows = [], [], [], [], [], []
+
+        for sourceRoot in parse(xmlFilePath).getroot():
+
+            if sourceRoot.tag != "source":
+                raise XMLParseError(f"Tag <source> expected, '{sourceRoot.tag}' found.")
+
+            parameters = {parameter.attrib.get("name"): parameter.attrib.get("value") for parameter in sourceRoot.iter("parameter")}
+
+            pos = SourcesTable._toPosition(parameters.get("pos"))
+
+            names.append(sourceRoot.attrib.get("name"))
+            glon.append(pos[0])
+            glat.append(pos[1])
+            flux.append(SourcesTable._toFloat(parameters.get("flux")))
+            index.append(SourcesTable._toFloat(parameters.get("index1", parameters.get("index"))))
+            rows.append(sourceRoot)
+
+        return SourcesTable(names, glon, glat, flux, index, rows, Source.parseSourceXMLFormat)
+
+    def computeDistances(self, mapCenterL, mapCenterB, rows=None):
+        """
+        It computes the angular distance of the sources from the map center (see AstroUtils.distance_array):
+        -2 is returned for coordinates out of range.
+
+        Args:
+            mapCenterL (float): the galactic longitude of the map center.
+            mapCenterB (float): the galactic latitude of the map center.
+            rows (np.ndarray): if not None, the distance is computed only for these rows, the others are set to nan.
+
+        Returns:
+            The array of the distances.
+        """
+        if rows is None:
+            self.dist = AstroUtils.distance_array(self.glon, self.glat, mapCenterL, mapCenterB)
+        else:
+            self.dist = np.full(len(self.names), np.nan)
+            self.dist[rows] = AstroUtils.distance_array(self.glon[rows], self.glat[rows], mapCenterL, mapCenterB)
+
+        return self.dist
+
+    def getSpatialIndex(self):
+        """
+        It returns the spatial index of the positions of the sources. When the table has been read from a file,
+        the index is shared by all the tables read from the same content of the file (see SpatialIndex.forFile).
+        """
+        if self._spatialIndex is None:
+            if self.fileKey is not None:
+                self._spatialIndex = SpatialIndex.forFile(self.fileKey, self.glon, self.glat)
+            else:
+                self._spatialIndex = SpatialIndex(self.glon, self.glat)
+
+        return self._spatialIndex
+
+    def getRowsWithin(self, mapCenterL, mapCenterB, radius):
+        """
+        It returns the rows that can be within 'radius' degrees from the map center, using the spatial index.
+        The rows whose position cannot be indexed are always returned (their distance is -2).
+        The boundary must be checked on the exact distances (see computeDistances).
+        """
+        return self.getRowsWithinMany([(mapCenterL, mapCenterB)], radius)[0]
+
+    def getRowsWithinMany(self, centers, radius):
+        """
+        It runs getRowsWithin for each (glon, glat) center of 'centers'.
+
+        Returns:
+            A list of arrays of rows, one for each center.
+        """
+        allRows = np.arange(len(self))
+
+        if radius >= 180:
+            return [allRows for _ in centers]
+
+        spatialIndex = self.getSpatialIndex()
+
+        notIndexed = np.setdiff1d(allRows, spatialIndex.rows, assume_unique=True)
+
+        results = []
+        found = spatialIndex.queryMany(centers, radius)
+        for (glon, glat), rows in zip(centers, found):
+            if 0 <= glon <= 360 and -90 <= glat <= 90:
+                results.append(np.union1d(rows, notIndexed))
+            else:
+                results.append(allRows)
+        return results
+
+    def scaleFlux(self, emin, emax, catEmin, catEmax):
+        """
+        It scales the flux of every source from the catalog energy range (catEmin, catEmax) to (emin, emax),
+        assuming a power law spectrum with the spectral index of the source.
+        """
+        si = self.index
+        p1 = self.flux * (si-1) / ( catEmin ** (1-si) - catEmax ** (1-si) )
+        self.flux = (p1 / (si-1)) * ( emin ** (1-si) - emax ** (1-si) )
+        self._fluxScaled = True
+
+        for row, source in enumerate(self._sources):
+            if source is not None:
+                source.set("flux", {"value": float(self.flux[row])})
+
+    def getDistanceMask(self, rangeDist):
+        """
+        Returns:
+            The boolean mask of the sources whose distance is within rangeDist (extremes included).
+        """
+        return (self.dist >= rangeDist[0]) & (self.dist <= rangeDist[1])
+
+    def getNamesMask(self, names):
+        """
+        Returns:
+            The boolean mask of the sources whose name is in names.
+        """
+        names = list(names)
+        if not names:
+            return np.zeros(len(self.names), dtype=bool)
+        return np.isin(self.names, names)
+
+    def getRow(self, sourceName):
+        """
+        Returns:
+            The row of the first source named sourceName, or None.
+        """
+        return self.nameIndex.get(sourceName)
+
+    def getSource(self, row):
+        """
+        It returns the Source object of a row, building it the first time it is requested.
+        The distance and the (scaled) flux computed on the columns are copied into the object.
+        """
+        source = self._sources[row]
+
+        if source is None:
+
+            source = self._parseRow(self._rows[row])
+
+            if not np.isnan(self.dist[row]):
+                source.spatialModel.dist["value"] = float(self.dist[row])
+
+            if self._fluxScaled:
+                source.set("flux", {"value": float(self.flux[row])})
+
+            self._sources[row] = source
+
+        return source
+
+    def getSources(self, rows=None):
+        """
+        It returns the Source objects of the rows (of every row, if rows is None).
+        """
+        if rows is None:
+            rows = range(len(self.names))
+        elif getattr(rows, "dtype", None) == bool:
+            rows = np.flatnonzero(rows)
+        return [self.getSource(int(row)) for row in rows]
+
+    @staticmethod
+    def _toFloat(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    @staticmethod
+    def _toPosition(value):
+        try:
+            glon, glat = literal_eval(value)
+            return float(glon), float(glat)
+        except (TypeError, ValueError, SyntaxError):
+            return np.nan, np.nan
@@ -0,0 +1,127 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import threading
+import numpy as np
+from pathlib import Path
+from collections import OrderedDict
+from scipy.spatial import cKDTree
+
+class SpatialIndex:
+    """
+    A KD-tree over the unit vectors of a set of galactic positions, answering cone searches
+    (the positions within an angular radius from one or many centers) without scanning all the positions.
+
+    Building the index costs more than a single scan of the positions: the index of a file is built once per content
+    of the file and kept in the memory of the process (see forFile), for the MAX_FILES most recently used files.
+    """
+
+    MAX_FILES = 16
+
+    _files = OrderedDict()
+    _filesLock = threading.Lock()
+
+    def __init__(self, glon, glat):
+        """
+        Args:
+            glon (np.ndarray): the galactic longitudes (deg).
+            glat (np.ndarray): the galactic latitudes (deg).
+
+        Positions out of the valid ranges (or nan) are not indexed.
+        """
+        glon = np.asarray(glon, dtype=np.float64)
+        glat = np.asarray(glat, dtype=np.float64)
+
+        self.size = len(glon)
+        self.rows = np.flatnonzero(SpatialIndex.isValid(glon, glat))
+        self.tree = cKDTree(SpatialIndex.toUnitVectors(glon[self.rows], glat[self.rows]))
+
+    @staticmethod
+    def getFileKey(filePath):
+        """
+        It returns the (absolute path, size, modification time) of a file, identifying its content.
+        """
+        stat = os.stat(filePath)
+        return (str(Path(filePath).absolute()), stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def forFile(fileKey, glon, glat):
+        """
+        It returns the index of the positions read from the file identified by fileKey (see getFileKey),
+        building it only if it is not in memory.
+        """
+        with SpatialIndex._filesLock:
+            spatialIndex = SpatialIndex._files.get(fileKey)
+            if spatialIndex is not None and spatialIndex.size == len(glon):
+                SpatialIndex._files.move_to_end(fileKey)
+                return spatialIndex
+
+        spatialIndex = SpatialIndex(glon, glat)
+
+        with SpatialIndex._filesLock:
+            SpatialIndex._files[fileKey] = spatialIndex
+            SpatialIndex._files.move_to_end(fileKey)
+            while len(SpatialIndex._files) > SpatialIndex.MAX_FILES:
+                SpatialIndex._files.popitem(last=False)
+
+        return spatialIndex
+
+    @staticmethod
+    def isValid(glon, glat):
+        return (glon >= 0) & (glon <= 360) & (glat >= -90) & (glat <= 90)
+
+    @staticmethod
+    def toUnitVectors(glon, glat):
+        l = np.radians(glon)
+        b = np.radians(glat)
+        return np.column_stack((np.cos(b) * np.cos(l), np.cos(b) * np.sin(l), np.sin(b)))
+
+    @staticmethod
+    def _chord(radius):
+        # the euclidean distance between two unit vectors at an angular distance of 'radius' degrees,
+        # slightly enlarged: the exact angular distance is checked by the caller
+        return 2 * np.sin(np.radians(min(radius, 180)) / 2) + 1e-9
+
+    def query(self, glon, glat, radius):
+        """
+        It returns the sorted rows of the indexed positions within 'radius' degrees (approximately,
+        the boundary must be checked on the exact distances) from (glon, glat).
+        """
+        return self.queryMany([(glon, glat)], radius)[0]
+
+    def queryMany(self, centers, radius):
+        """
+        It runs a cone search for each (glon, glat) center.
+
+        Returns:
+            A list with the sorted array of rows of each center.
+        """
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        vectors = SpatialIndex.toUnitVectors(centers[:, 0], centers[:, 1])
+        results = self.tree.query_ball_point(vectors, SpatialIndex._chord(radius))
+        return [np.sort(self.rows[np.asarray(found, dtype=np.int64)]) for found in results]
@@ -0,0 +1,125 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from agilepy.core.CustomExceptions import ScienceToolDependencyCycle
+
+class ToolScheduler:
+    """
+    This class runs a set of configured science tools respecting the dependencies between them.
+
+    A tool depends on another tool if one of its 'inputs' is one of the 'products' of the other tool.
+    Independent tools run concurrently and a tool is started as soon as all the tools producing its inputs
+    have completed. Inputs that are not produced by any scheduled tool (e.g. index files, calibration matrices)
+    are expected to already exist.
+
+    Usage:
+        scheduler = ToolScheduler(logger)
+        scheduler.addTool(ctsMapGenerator)
+        scheduler.addTool(expMapGenerator)
+        scheduler.addTool(gasMapGenerator)  # depends on expMapGenerator
+        ctsProducts, expProducts, gasProducts = scheduler.run()
+    """
+
+    def __init__(self, agilepyLogger, workers=None):
+        self.logger = agilepyLogger
+        self.workers = workers
+        self.tools = []
+
+    def addTool(self, tool):
+        """
+        It adds a configured tool (a ProcessWrapper object) to the scheduler.
+        """
+        self.tools.append(tool)
+        return tool
+
+    def getDependencies(self):
+        """
+        It returns a dictionary mapping each tool to the set of tools producing its inputs.
+
+        Raises:
+            ScienceToolDependencyCycle: if the dependencies between the tools contain a cycle.
+        """
+        producers = {}
+        for tool in self.tools:
+            for product in tool.products:
+                producers[str(product)] = tool
+
+        dependencies = {}
+        for tool in self.tools:
+            inputFiles = [str(inputFile) for inputFile in tool.inputs]
+            dependencies[tool] = set(producers[inputFile] for inputFile in inputFiles if inputFile in producers and producers[inputFile] is not tool)
+
+        # Kahn's algorithm: if some tool is never ready, there is a cycle
+        resolved = set()
+        remaining = list(self.tools)
+        while remaining:
+            ready = [tool for tool in remaining if dependencies[tool] <= resolved]
+            if not ready:
+                raise ScienceToolDependencyCycle(f"The dependencies between the tools {[tool.exeName for tool in remaining]} contain a cycle.")
+            for tool in ready:
+                resolved.add(tool)
+                remaining.remove(tool)
+
+        return dependencies
+
+    def run(self):
+        """
+        It calls every tool, as soon as its dependencies have completed.
+
+        Returns:
+            The list of the products of each tool, in the same order the tools have been added.
+
+        Raises:
+            ScienceToolDependencyCycle: if the dependencies between the tools contain a cycle.
+            Any exception raised by the tools. The tools that are already running are awaited, the others are not started.
+        """
+        dependencies = self.getDependencies()
+
+        results = {}
+        completed = set()
+        pending = list(self.tools)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+
+            while pending or running:
+
+                for tool in [tool for tool in pending if dependencies[tool] <= completed]:
+                    pending.remove(tool)
+                    self.logger.debug(f"Starting {tool.exeName}, depending on {[dep.exeName for dep in dependencies[tool]]}")
+                    running[executor.submit(tool.call)] = tool
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    tool = running.pop(future)
+                    results[tool] = future.result()
+                    completed.add(tool)
+
+        return [results[tool] for tool in self.tools]
@@ -25,11 +25,33 @@
 #You should have received a copy of the GNU General Public License
 #along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+from ast import literal_eval
+
 from agilepy.core.CustomExceptions import AttributeNotSupportedError
 from agilepy.core.source.SourceComponent import SourceComponent
+from agilepy.core.source.Parameter import Parameter
 
 class MultiAnalysis(SourceComponent):
 
+    __slots__ = (
+        "multiDate", "multiName", "multiSqrtTS", "multiFix", "multiindex", "multiULConfidenceLevel",
+        "multiSrcLocConfLevel", "multiFlux", "multiFluxErr", "multiFluxPosErr", "multiFluxNegErr",
+        "multiStartFlux", "multiTypefun", "multipar2", "multipar3", "multiGalmode2",
+        "multiGalmode2fit", "multiIsomode2", "multiIsomode2fit", "multiEdpcor", "multiFluxcor",
+        "multiIntegratorType", "multiExpratioEval", "multiExpratioMinthr", "multiExpratioMaxthr",
+        "multiExpratioSize", "multiUL", "multiExp", "multiErgLog", "multiErgLogErr",
+        "multiErgLogUL", "multiStartL", "multiStartB", "multiDist", "multiLPeak", "multiBPeak",
+        "multiDistFromStartPositionPeak", "multiL", "multiB", "multiDistFromStartPosition",
+        "multir", "multia", "multib", "multiphi", "multiCounts", "multiCountsErr", "multiIndex",
+        "multiIndexErr", "multiPar2", "multiPar2Err", "multiPar3", "multiPar3Err", "multiFitCts",
+        "multiFitFitstatus0", "multiFitFcn0", "multiFitEdm0", "multiFitNvpar0", "multiFitNparx0",
+        "multiFitIter0", "multiFitFitstatus1", "multiFitFcn1", "multiFitEdm1", "multiFitNvpar1",
+        "multiFitNparx1", "multiFitIter1", "multiFitLikelihood1", "multiGalCoeff", "multiGalErr",
+        "multiIsoCoeff", "multiIsoErr", "startDataTT", "endDataTT", "multiEmin", "multiEmax",
+        "multifovmin", "multifovmax", "multialbedo", "multibinsize", "multiexpstep",
+        "multiphasecode", "multiExpRatio"
+    )
+
     spectrumMultiMapping = {
         "flux" : "multiFlux",
         "index" : "multiIndex",
@@ -43,111 +65,111 @@ class MultiAnalysis(SourceComponent):
 
     def __init__(self):
 
-        self.multiDate = {"value": None, "datatype": "date", "um": ""}
-        self.multiName = {"value": None, "datatype": "str", "um": ""}
+        self.multiDate = Parameter(value=None, datatype="date", um="")
+        self.multiName = Parameter(value=None, datatype="str", um="")
 
-        self.multiSqrtTS = {"value": None, "datatype": "float", "um": ""}
+        self.multiSqrtTS = Parameter(value=None, datatype="float", um="")
 
-        self.multiFix = {"value": None, "datatype": "float", "um": ""}
-        self.multiindex = {"value": None, "datatype": "float", "um": ""}
-        self.multiULConfidenceLevel = {"value": None, "datatype": "float", "um": ""}
-        self.multiSrcLocConfLevel = {"value": None, "datatype": "float", "um": ""}
+        self.multiFix = Parameter(value=None, datatype="float", um="")
+        self.multiindex = Parameter(value=None, datatype="float", um="")
+        self.multiULConfidenceLevel = Parameter(value=None, datatype="float", um="")
+        self.multiSrcLocConfLevel = Parameter(value=None, datatype="float", um="")
 
-        self.multiFlux = {"value": None, "err": None, "datatype": "float", "um": "ph/cm2s"}
-        self.multiFluxErr = {"value": None, "datatype": "float", "um": ""}
-        self.multiFluxPosErr = {"value": None, "datatype": "float", "um": ""}
-        self.multiFluxNegErr = {"value": None, "datatype": "float", "um": ""}
+        self.multiFlux = Parameter(value=None, err=None, datatype="float", um="ph/cm2s")
+        self.multiFluxErr = Parameter(value=None, datatype="float", um="")
+        self.multiFluxPosErr = Parameter(value=None, datatype="float", um="")
+        self.multiFluxNegErr = Parameter(value=None, datatype="float", um="")
 
-        self.multiStartFlux = {"value": None, "datatype": "float", "um": ""}
-        self.multiTypefun = {"value": None, "datatype": "float", "um": ""}
-        self.multipar2 = {"value": None, "datatype": "float", "um": ""}
-        self.multipar3 = {"value": None, "datatype": "float", "um": ""}
-        self.multiGalmode2 = {"value": None, "datatype": "float", "um": ""}
-        self.multiGalmode2fit = {"value": None, "datatype": "float", "um": ""}
-        self.multiIsomode2 = {"value": None, "datatype": "float", "um": ""}
-        self.multiIsomode2fit = {"value": None, "datatype": "float", "um": ""}
-        self.multiEdpcor = {"value": None, "datatype": "float", "um": ""}
-        self.multiFluxcor = {"value": None, "datatype": "float", "um": ""}
-        self.multiIntegratorType = {"value": None, "datatype": "float", "um": ""}
-        self.multiExpratioEval = {"value": None, "datatype": "float", "um": ""}
-        self.multiExpratioMinthr = {"value": None, "datatype": "float", "um": ""}
-        self.multiExpratioMaxthr = {"value": None, "datatype": "float", "um": ""}
-        self.multiExpratioSize = {"value": None, "datatype": "float", "um": ""}
+        self.multiStartFlux = Parameter(value=None, datatype="float", um="")
+        self.multiTypefun = Parameter(value=None, datatype="float", um="")
+        self.multipar2 = Parameter(value=None, datatype="float", um="")
+        self.multipar3 = Parameter(value=None, datatype="float", um="")
+        self.multiGalmode2 = Parameter(value=None, datatype="float", um="")
+        self.multiGalmode2fit = Parameter(value=None, datatype="float", um="")
+        self.multiIsomode2 = Parameter(value=None, datatype="float", um="")
+        self.multiIsomode2fit = Parameter(value=None, datatype="float", um="")
+        self.multiEdpcor = Parameter(value=None, datatype="float", um="")
+        self.multiFluxcor = Parameter(value=None, datatype="float", um="")
+        self.multiIntegratorType = Parameter(value=None, datatype="float", um="")
+        self.multiExpratioEval = Parameter(value=None, datatype="float", um="")
+        self.multiExpratioMinthr = Parameter(value=None, datatype="float", um="")
+        self.multiExpratioMaxthr = Parameter(value=None, datatype="float", um="")
+        self.multiExpratioSize = Parameter(value=None, datatype="float", um="")
 
 
-        self.multiUL = {"value": None, "datatype": "float", "um": "ph/cm2s"}
+        self.multiUL = Parameter(value=None, datatype="float", um="ph/cm2s")
 
-        self.multiExp = {"value": None, "datatype": "float","um": "cm2s"}
+        self.multiExp = Parameter(value=None, datatype="float",um="cm2s")
 
 
-        self.multiErgLog = {"value": None, "err": None, "datatype": "float", "um": "erg/cm2s"}
-        self.multiErgLogErr = {"value": None, "datatype": "float", "um": ""}
-        self.multiErgLogUL = {"value": None, "datatype": "float", "um": ""}
+        self.multiErgLog = Parameter(value=None, err=None, datatype="float", um="erg/cm2s")
+        self.multiErgLogErr = Parameter(value=None, datatype="float", um="")
+        self.multiErgLogUL = Parameter(value=None, datatype="float", um="")
 
 
-        self.multiStartL = {"value": None, "datatype": "float", "um": ""}
-        self.multiStartB = {"value": None, "datatype": "float", "um": ""}
+        self.multiStartL = Parameter(value=None, datatype="float", um="")
+        self.multiStartB = Parameter(value=None, datatype="float", um="")
 
-        self.multiDist = {"value": None, "datatype": "float", "um": ""}
+        self.multiDist = Parameter(value=None, datatype="float", um="")
 
-        self.multiLPeak = {"value": None, "datatype": "float", "um": ""}
-        self.multiBPeak = {"value": None, "datatype": "float", "um": ""}
-        self.multiDistFromStartPositionPeak = {"value": None, "datatype": "float", "um": ""}
+        self.multiLPeak = Parameter(value=None, datatype="float", um="")
+        self.multiBPeak = Parameter(value=None, datatype="float", um="")
+        self.multiDistFromStartPositionPeak = Parameter(value=None, datatype="float", um="")
 
-        self.multiL = {"value": None, "datatype": "float", "um": ""}
-        self.multiB = {"value": None, "datatype": "float", "um": ""}
-        self.multiDistFromStartPosition = {"value": None, "datatype": "float", "um": ""}
-        self.multir = {"value": None, "datatype": "float", "um": ""}
-        self.multia = {"value": None, "datatype": "float", "um": ""}
-        self.multib = {"value": None, "datatype": "float", "um": ""}
-        self.multiphi = {"value": None, "datatype": "float", "um": ""}
+        self.multiL = Parameter(value=None, datatype="float", um="")
+        self.multiB = Parameter(value=None, datatype="float", um="")
+        self.multiDistFromStartPosition = Parameter(value=None, datatype="float", um="")
+        self.multir = Parameter(value=None, datatype="float", um="")
+        self.multia = Parameter(value=None, datatype="float", um="")
+        self.multib = Parameter(value=None, datatype="float", um="")
+        self.multiphi = Parameter(value=None, datatype="float", um="")
 
-        self.multiCounts = {"value": None, "err": None, "datatype": "float", "um": ""}
-        self.multiCountsErr = {"value": None, "datatype": "float", "um": ""}
+        self.multiCounts = Parameter(value=None, err=None, datatype="float", um="")
+        self.multiCountsErr = Parameter(value=None, datatype="float", um="")
         
-        self.multiIndex = {"value": None, "err": None, "datatype": "float", "um": ""}
-        self.multiIndexErr = {"value": None, "datatype": "float", "um": ""}
+        self.multiIndex = Parameter(value=None, err=None, datatype="float", um="")
+        self.multiIndexErr = Parameter(value=None, datatype="float", um="")
         
-        self.multiPar2 = {"value": None, "err": None, "datatype": "float", "um": ""}
-        self.multiPar2Err = {"value": None, "datatype": "float", "um": ""}
-
-        self.multiPar3 = {"value": None, "err": None, "datatype": "float", "um": ""}
-        self.multiPar3Err = {"value": None, "datatype": "float", "um": ""}
-
-        self.multiFitCts = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitFitstatus0 = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitFcn0 = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitEdm0 = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitNvpar0 = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitNparx0 = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitIter0 = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitFitstatus1 = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitFcn1 = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitEdm1 = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitNvpar1 = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitNparx1 = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitIter1 = {"value": None, "datatype": "float", "um": ""}
-        self.multiFitLikelihood1 = {"value": None, "datatype": "float", "um": ""}
+        self.multiPar2 = Parameter(value=None, err=None, datatype="float", um="")
+        self.multiPar2Err = Parameter(value=None, datatype="float", um="")
+
+        self.multiPar3 = Parameter(value=None, err=None, datatype="float", um="")
+        self.multiPar3Err = Parameter(value=None, datatype="float", um="")
+
+        self.multiFitCts = Parameter(value=None, datatype="float", um="")
+        self.multiFitFitstatus0 = Parameter(value=None, datatype="float", um="")
+        self.multiFitFcn0 = Parameter(value=None, datatype="float", um="")
+        self.multiFitEdm0 = Parameter(value=None, datatype="float", um="")
+        self.multiFitNvpar0 = Parameter(value=None, datatype="float", um="")
+        self.multiFitNparx0 = Parameter(value=None, datatype="float", um="")
+        self.multiFitIter0 = Parameter(value=None, datatype="float", um="")
+        self.multiFitFitstatus1 = Parameter(value=None, datatype="float", um="")
+        self.multiFitFcn1 = Parameter(value=None, datatype="float", um="")
+        self.multiFitEdm1 = Parameter(value=None, datatype="float", um="")
+        self.multiFitNvpar1 = Parameter(value=None, datatype="float", um="")
+        self.multiFitNparx1 = Parameter(value=None, datatype="float", um="")
+        self.multiFitIter1 = Parameter(value=None, datatype="float", um="")
+        self.multiFitLikelihood1 = Parameter(value=None, datatype="float", um="")
         
-        self.multiGalCoeff = {"value": None, "err": None, "datatype": "List<float>", "um": ""}
-        self.multiGalErr = {"value": None, "datatype": "List<float>", "um": ""}
+        self.multiGalCoeff = Parameter(value=None, err=None, datatype="List<float>", um="")
+        self.multiGalErr = Parameter(value=None, datatype="List<float>", um="")
 
-        self.multiIsoCoeff = {"value": None, "err": None, "datatype": "List<float>", "um": ""}
-        self.multiIsoErr = {"value": None, "datatype": "List<float>", "um": ""}
+        self.multiIsoCoeff = Parameter(value=None, err=None, datatype="List<float>", um="")
+        self.multiIsoErr = Parameter(value=None, datatype="List<float>", um="")
 
-        self.startDataTT = {"value": None, "err": None, "datatype": "float", "um": ""}
-        self.endDataTT = {"value": None, "datatype": "float", "um": ""}
+        self.startDataTT = Parameter(value=None, err=None, datatype="float", um="")
+        self.endDataTT = Parameter(value=None, datatype="float", um="")
 
-        self.multiEmin = {"value": None, "datatype": "List<float>", "um": ""}
-        self.multiEmax = {"value": None, "datatype": "List<float>", "um": ""}
-        self.multifovmin = {"value": None, "datatype": "List<float>", "um": ""}
-        self.multifovmax = {"value": None, "datatype": "List<float>", "um": ""}
-        self.multialbedo = {"value": None, "datatype": "float", "um": ""}
-        self.multibinsize = {"value": None, "datatype": "float", "um": ""}
-        self.multiexpstep = {"value": None, "datatype": "float", "um": ""}
-        self.multiphasecode = {"value": None, "datatype": "float", "um": ""}
+        self.multiEmin = Parameter(value=None, datatype="List<float>", um="")
+        self.multiEmax = Parameter(value=None, datatype="List<float>", um="")
+        self.multifovmin = Parameter(value=None, datatype="List<float>", um="")
+        self.multifovmax = Parameter(value=None, datatype="List<float>", um="")
+        self.multialbedo = Parameter(value=None, datatype="float", um="")
+        self.multibinsize = Parameter(value=None, datatype="float", um="")
+        self.multiexpstep = Parameter(value=None, datatype="float", um="")
+        self.multiphasecode = Parameter(value=None, datatype="float", um="")
 
-        self.multiExpRatio = {"value": None, "datatype": "float", "um": ""}
+        self.multiExpRatio = Parameter(value=None, datatype="float", um="")
 
     def setParameter(self, parameterName, dictionaryValues):
 
@@ -158,5 +180,5 @@ class MultiAnalysis(SourceComponent):
 
         parameter = getattr(self, parameterName)
         for key,val in dictionaryValues.items():
-            try: parameter[key] = eval(val)       
-            except: parameter[key] = val
+            try: parameter[key] = literal_eval(val) if isinstance(val, str) else val
+            except (ValueError, SyntaxError): parameter[key] = val
@@ -0,0 +1,78 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from collections.abc import MutableMapping
+
+class Parameter(MutableMapping):
+    """
+    A parameter of a source component (spectrum, spatial model or multi analysis).
+
+    It behaves like the dictionary it replaces (``param["value"]``, ``"free" in param``,
+    ``param.items()``) but its attributes are stored in slots, hence it has no
+    per-instance ``__dict__``. An attribute that has never been set is not part of
+    the mapping.
+    """
+    __slots__ = ("name", "value", "err", "free", "min", "max", "scale", "datatype", "um")
+
+    KEYS = frozenset(__slots__)
+
+    def __init__(self, **attributes):
+        for key, val in attributes.items():
+            self[key] = val
+
+    def __getitem__(self, key):
+        if key not in Parameter.KEYS:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, val):
+        if key not in Parameter.KEYS:
+            raise KeyError(f"The attribute '{key}' is not supported for object of type '{type(self)}'")
+        setattr(self, key, val)
+
+    def __delitem__(self, key):
+        if key not in Parameter.KEYS:
+            raise KeyError(key)
+        try:
+            delattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in Parameter.KEYS and hasattr(self, key)
+
+    def __iter__(self):
+        return (key for key in Parameter.__slots__ if hasattr(self, key))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
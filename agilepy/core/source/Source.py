@@ -30,6 +30,7 @@ from agilepy.utils.AstroUtils import AstroUtils
 from agilepy.core.source.Spectrum import Spectrum
 from agilepy.core.source.SpatialModel import SpatialModel
 from agilepy.core.source.MultiAnalysis import MultiAnalysis
+from agilepy.core.source.SourcesSnapshot import SourcesSnapshot
 
 from agilepy.core.CustomExceptions import SelectionParamNotSupported, \
                                           SourceParameterNotFound, \
@@ -48,6 +49,7 @@ class Source:
         self.spectrum = None
         self.spatialModel = None
         self.multiAnalysis = MultiAnalysis()
+        self._formatCache = {}
     
     def getName(self):
         """It gets the name for the source
@@ -71,8 +73,28 @@ class Source:
         """
         return self.spectrum.getFreeableParams() + self.spatialModel.getFreeableParams()
 
+    def getCachedFormat(self, formatKey):
+        """It returns the text of the source cached with setCachedFormat().
+
+        Args:
+            formatKey: the key of the format (e.g. the file format and the position used).
+
+        Returns:
+            The cached text or None if the source has changed since it was cached.
+        """
+        return self._formatCache.get(formatKey)
+
+    def setCachedFormat(self, formatKey, text):
+        self._formatCache[formatKey] = text
+
+    def _beforeChange(self):
+        SourcesSnapshot.beforeChange(self)
+        self._formatCache.clear()
+
     def setDistanceFromMapCenter(self, mapCenterL, mapCenterB):
 
+        self._beforeChange()
+
         if self.multiAnalysis.multiDate["value"] is not None:
             sourceL = self.multiAnalysis.multiL["value"]
             sourceB = self.multiAnalysis.multiB["value"]
@@ -84,7 +106,7 @@ class Source:
             sourceL = self.spatialModel.pos["value"][0]
             sourceB = self.spatialModel.pos["value"][1]
 
-        self.spatialModel.dist["value"] = AstroUtils.distance(sourceL, sourceB, mapCenterL, mapCenterB)
+        self.spatialModel.dist["value"] = float(AstroUtils.distance_array(sourceL, sourceB, mapCenterL, mapCenterB))
 
     def getSelectionValue(self, paramName):
 
@@ -119,7 +141,9 @@ class Source:
 
 
     def updateMultiAnalysis(self, multiAnalysisResult, mapCenterL, mapCenterB):
-        
+
+        self._beforeChange()
+
         # Swap last mle analysis results (if any) to spectrum and spatialModel        
         if self.multiAnalysis.multiDate["value"] is not None:
 
@@ -387,13 +411,13 @@ class PointSource(Source):
             >>> s.get("pos")
             >>> s.get("multiFlux")
         """
-        if self.spectrum is not None and parameterName in vars(self.spectrum):
+        if self.spectrum is not None and self.spectrum.hasParameter(parameterName):
             return getattr(self.spectrum, parameterName)
 
-        if self.spatialModel is not None and parameterName in vars(self.spatialModel):
+        if self.spatialModel is not None and self.spatialModel.hasParameter(parameterName):
             return getattr(self.spatialModel, parameterName)
 
-        if self.multiAnalysis is not None and parameterName in vars(self.multiAnalysis):
+        if self.multiAnalysis is not None and self.multiAnalysis.hasParameter(parameterName):
             return getattr(self.multiAnalysis, parameterName)
 
         raise SourceParameterNotFound(f"Cannot perform get(), {parameterName} is not found.")
@@ -432,13 +456,15 @@ class PointSource(Source):
         if type(attributeValueDict) != dict:
             raise ValueError("The input parameter 'attributeValueDict' must be a dictionary!")
 
-        if self.spectrum is not None and parameterName in vars(self.spectrum):
+        self._beforeChange()
+
+        if self.spectrum is not None and self.spectrum.hasParameter(parameterName):
             return self.spectrum.setParameter(parameterName, attributeValueDict)
 
-        if self.spatialModel is not None and parameterName in vars(self.spatialModel):
+        if self.spatialModel is not None and self.spatialModel.hasParameter(parameterName):
             return self.spatialModel.setParameter(parameterName, attributeValueDict)
 
-        if self.multiAnalysis is not None and parameterName in vars(self.multiAnalysis):
+        if self.multiAnalysis is not None and self.multiAnalysis.hasParameter(parameterName):
             return self.multiAnalysis.setParameter(parameterName, attributeValueDict)
 
         raise SourceParameterNotFound(f"Cannot perform set(), {parameterName} is not found.")
@@ -472,12 +498,15 @@ class PointSource(Source):
         return self.spectrum.getFreeParams() + self.spatialModel.getFreeParams()
 
     def setSpectrum(self, spectrumType):
+        self._beforeChange()
         self.spectrum = Spectrum.getSpectrum(spectrumType)
 
     def setSpatialModel(self, spatialModelType):
+        self._beforeChange()
         self.spatialModel = SpatialModel.getSpatialModel(spatialModelType)
 
     def setMultiAnalysis(self):
+        self._beforeChange()
         self.multiAnalysis = MultiAnalysis()
  
     def setFreeAttributeValueOf(self, parameterName, freeval):
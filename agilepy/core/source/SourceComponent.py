@@ -1,21 +1,33 @@
 class SourceComponent:
 
+    __slots__ = ()
+
+    # The names of the parameters, i.e. the slots declared along the class hierarchy
+    parameterNames = ()
+    _parameterNamesSet = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.parameterNames = cls.parameterNames + tuple(vars(cls).get("__slots__", ()))
+        cls._parameterNamesSet = frozenset(cls.parameterNames)
+
     def __init__(self):
         pass
 
+    def hasParameter(self, paramName):
+        return paramName in self._parameterNamesSet
+
     def getFreeParams(self):
         fp = []
-        attributes = vars(self)
-        for name, dictionary in attributes.items():
-            if "free" in dictionary and dictionary["free"]:
+        for name in self.parameterNames:
+            if getattr(getattr(self, name), "free", False):
                 fp.append(name)
         return fp
 
     def getFreeableParams(self):
         fp = []
-        attributes = vars(self)
-        for name, dictionary in attributes.items():
-            if "free" in dictionary:
+        for name in self.parameterNames:
+            if hasattr(getattr(self, name), "free"):
                 fp.append(name)
         return fp
 
@@ -24,9 +36,9 @@ class SourceComponent:
 
     def getVal(self, paramName, strr=False):
         if strr:
-            return str(getattr(self, paramName)["value"])
+            return str(getattr(self, paramName).value)
         else:
-            return getattr(self, paramName)["value"]
+            return getattr(self, paramName).value
 
     def getType(self):
-        return type(self).__name__        
\ No newline at end of file
+        return type(self).__name__
@@ -0,0 +1,100 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import weakref
+import threading
+from copy import deepcopy
+
+class SourcesSnapshot:
+    """
+    A copy-on-write snapshot of a list of sources.
+
+    Taking the snapshot copies only the list of the references to the sources. The state of a source is
+    deep-copied the first time the source is changed (see ``SourcesSnapshot.beforeChange``, called by the
+    Source methods that modify it), so restoring the snapshot costs as much as the sources changed in the meantime.
+
+    Only the changes made through the Source methods are tracked: writing into the parameters dictionaries
+    directly bypasses the snapshot.
+    """
+
+    _active = weakref.WeakSet()
+    _lock = threading.Lock()
+
+    def __init__(self, sources):
+        self.sources = list(sources)
+        self._sourcesIds = {id(source) for source in self.sources}
+        self._savedStates = {}
+
+        with SourcesSnapshot._lock:
+            SourcesSnapshot._active.add(self)
+
+    @staticmethod
+    def beforeChange(source):
+        """
+        It saves the state of the source into the active snapshots that contain it and have not saved it yet.
+        """
+        if not SourcesSnapshot._active:
+            return
+
+        with SourcesSnapshot._lock:
+            for snapshot in list(SourcesSnapshot._active):
+                snapshot._save(source)
+
+    def _save(self, source):
+        sourceId = id(source)
+        if sourceId in self._sourcesIds and sourceId not in self._savedStates:
+            self._savedStates[sourceId] = deepcopy(vars(source))
+
+    def getChangedSources(self):
+        """
+        It returns the sources of the snapshot that have been changed since the snapshot was taken.
+        """
+        return [source for source in self.sources if id(source) in self._savedStates]
+
+    def restore(self):
+        """
+        It restores the state of the changed sources and closes the snapshot.
+
+        Returns:
+            The list of the sources of the snapshot.
+        """
+        self.close()
+
+        for source in self.sources:
+            state = self._savedStates.pop(id(source), None)
+            if state is not None:
+                vars(source).clear()
+                vars(source).update(state)
+
+        return list(self.sources)
+
+    def close(self):
+        """
+        It stops tracking the changes of the sources.
+        """
+        with SourcesSnapshot._lock:
+            SourcesSnapshot._active.discard(self)
@@ -27,9 +27,12 @@
 
 from agilepy.core.CustomExceptions import AttributeNotSupportedError
 from agilepy.core.source.SourceComponent import SourceComponent
+from agilepy.core.source.Parameter import Parameter
 
 class SpatialModel(SourceComponent):
 
+    __slots__ = ()
+
     def __init__(self):
         pass
     
@@ -54,10 +57,12 @@ class SpatialModel(SourceComponent):
 
 class PointSource(SpatialModel):
 
+    __slots__ = ("pos", "dist", "locationLimit")
+
     def __init__(self):
-        self.pos =  {"name": "pos", "free": False, "value": None, "datatype": "Tuple<float,float>", "um": "(l,b)"}
-        self.dist =  {"name": "dist", "value": None, "datatype": "float", "um": "deg"}
-        self.locationLimit =  {"name": "locationLimit", "value": None, "datatype": "int", "um": ""}
+        self.pos =  Parameter(name="pos", free=False, value=None, datatype="Tuple<float,float>", um="(l,b)")
+        self.dist =  Parameter(name="dist", value=None, datatype="float", um="deg")
+        self.locationLimit =  Parameter(name="locationLimit", value=None, datatype="int", um="")
     
     def __str__(self):
         return f'\n - SpatialModel type: {type(self)}\n{self.pos["value"]}\n{self.dist["value"]}\n{self.locationLimit["value"]}'
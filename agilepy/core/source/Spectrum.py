@@ -27,10 +27,13 @@
 
 from abc import ABC, abstractmethod
 from agilepy.core.source.SourceComponent import SourceComponent
+from agilepy.core.source.Parameter import Parameter
 from agilepy.core.CustomExceptions import SpectrumTypeNotFoundError, AttributeNotSupportedError
 
 class Spectrum(ABC, SourceComponent):
 
+    __slots__ = ()
+
     def __init__(self):
         pass
     
@@ -78,9 +81,11 @@ class Spectrum(ABC, SourceComponent):
 
 class PowerLaw(Spectrum):
 
+    __slots__ = ("flux", "index")
+
     def __init__(self):
-        self.flux =  {"name": "flux", "free": False, "value": None, "err": None, "datatype": "float", "um" : "ph/cm2s"}
-        self.index = {"name": "index", "value": None, "err": None, "free": False, "min": 0.5, "max": 5, "scale": -1, "datatype": "float", "um" : ""}
+        self.flux =  Parameter(name="flux", free=False, value=None, err=None, datatype="float", um="ph/cm2s")
+        self.index = Parameter(name="index", value=None, err=None, free=False, min=0.5, max=5, scale=-1, datatype="float", um="")
 
     def getAttributes(self):
         return [self.flux, self.index]
@@ -90,10 +95,12 @@ class PowerLaw(Spectrum):
 
 class PLExpCutoff(Spectrum):
 
+    __slots__ = ("flux", "index", "cutoffEnergy")
+
     def __init__(self):
-        self.flux =  {"name": "flux", "free": False, "value": None, "err": None, "datatype": "float", "um" : "ph/cm2s"}
-        self.index = {"name": "index", "value": None, "err": None, "free": False, "min": 0.5, "max": 5, "scale": -1, "datatype": "float", "um" : ""}
-        self.cutoffEnergy = {"name": "cutoffEnergy", "value": None, "err": None, "free": False, "min": 20, "max": 10000, "scale": -1, "datatype": "float", "um" : ""}
+        self.flux =  Parameter(name="flux", free=False, value=None, err=None, datatype="float", um="ph/cm2s")
+        self.index = Parameter(name="index", value=None, err=None, free=False, min=0.5, max=5, scale=-1, datatype="float", um="")
+        self.cutoffEnergy = Parameter(name="cutoffEnergy", value=None, err=None, free=False, min=20, max=10000, scale=-1, datatype="float", um="")
 
     def getAttributes(self):
         return [self.flux, self.index, self.cutoffEnergy]
@@ -103,11 +110,13 @@ class PLExpCutoff(Spectrum):
 
 class PLSuperExpCutoff(Spectrum):
 
+    __slots__ = ("flux", "index1", "cutoffEnergy", "index2")
+
     def __init__(self):
-        self.flux =  {"name": "flux", "free": False, "value": None, "err": None, "datatype": "float", "um" : "ph/cm2s"}
-        self.index1 = {"name": "index1", "value": None, "err": None, "free": False, "min": 0.5, "max": 5, "scale": -1, "datatype": "float", "um" : ""}
-        self.cutoffEnergy = {"name": "cutoffEnergy", "value": None, "err": None, "free": False, "min": 20, "max": 10000, "scale": -1, "datatype": "float", "um" : ""}
-        self.index2 = {"name": "index2", "value": None, "err": None, "free": False, "min": 0, "max": 100, "scale": -1, "datatype": "float", "um" : ""}
+        self.flux =  Parameter(name="flux", free=False, value=None, err=None, datatype="float", um="ph/cm2s")
+        self.index1 = Parameter(name="index1", value=None, err=None, free=False, min=0.5, max=5, scale=-1, datatype="float", um="")
+        self.cutoffEnergy = Parameter(name="cutoffEnergy", value=None, err=None, free=False, min=20, max=10000, scale=-1, datatype="float", um="")
+        self.index2 = Parameter(name="index2", value=None, err=None, free=False, min=0, max=100, scale=-1, datatype="float", um="")
 
     def getAttributes(self):
         return [self.flux, self.index1, self.cutoffEnergy, self.index2]
@@ -116,11 +125,14 @@ class PLSuperExpCutoff(Spectrum):
         return self.index1["value"]
 
 class LogParabola(Spectrum):
+
+    __slots__ = ("flux", "index", "pivotEnergy", "curvature")
+
     def __init__(self):
-        self.flux = {"name": "flux", "free": False, "value": None, "err": None, "datatype": "float", "um" : "ph/cm2s"}
-        self.index = {"name": "index", "value": None, "err": None, "free": False, "min": 1, "max": 4, "scale": -1, "datatype": "float", "um" : ""}
-        self.pivotEnergy = {"name": "pivotEnergy", "value": None, "err": None, "free": False, "min": 500, "max": 3000, "scale": -1, "datatype": "float", "um" : ""}
-        self.curvature = {"name": "curvature", "value": None, "err": None, "free": False, "min": 0.1, "max": 3, "scale": -1, "datatype": "float", "um" : ""}
+        self.flux = Parameter(name="flux", free=False, value=None, err=None, datatype="float", um="ph/cm2s")
+        self.index = Parameter(name="index", value=None, err=None, free=False, min=1, max=4, scale=-1, datatype="float", um="")
+        self.pivotEnergy = Parameter(name="pivotEnergy", value=None, err=None, free=False, min=500, max=3000, scale=-1, datatype="float", um="")
+        self.curvature = Parameter(name="curvature", value=None, err=None, free=False, min=0.1, max=3, scale=-1, datatype="float", um="")
 
     def getAttributes(self):
         return [self.flux, self.index, self.pivotEnergy, self.curvature]
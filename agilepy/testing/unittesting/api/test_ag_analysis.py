@@ -29,9 +29,11 @@ import os
 import pytest
 from pathlib import Path
 from pytest import approx
+from astropy.table import Table
 
 from agilepy.api.AGAnalysis import AGAnalysis
 from agilepy.utils.AstroUtils import AstroUtils
+from agilepy.core.LightCurveManifest import LightCurveManifest
 from agilepy.core.CustomExceptions import (
     SourceModelFormatNotSupported, 
     MaplistIsNone, 
@@ -138,7 +140,35 @@ class TestAGAnalysis:
         self.assert_generated_maps_exist(ag.parseMaplistFile(maplistFilePath4))
 
         ag.destroy()
-        
+
+    @pytest.mark.testlogsdir("api/test_logs/test_generate_maps_workers")
+    @pytest.mark.testconfig("api/conf/agilepyconf.yaml")
+    @pytest.mark.testdatafiles(["api/conf/sourcesconf_1.txt"])
+    def test_generate_maps_workers(self, environ_test_logs_dir, config, testdatafiles):
+
+        ag = AGAnalysis(config, testdatafiles[0])
+
+        ag.setOptions(tmin=433857532, tmax=433858532, timetype="TT")
+
+        outDir = ag.getOption("outdir")
+
+        maplistFilePath0 = ag.generateMaps()
+        maplistFilePath1 = ag.generateMaps(workers=4)
+        self.assert_maplistfile_lines_number(maplistFilePath1, 4)
+        outDir1 = Path(outDir).joinpath("maps", "1")
+        self.assert_generated_maps_number(outDir1, 16)
+        self.assert_generated_maps_exist(ag.parseMaplistFile(maplistFilePath1))
+
+        # the rows are written in the same order of the serial run
+        serialRows = [[Path(f).name for f in row] for row in ag.parseMaplistFile(maplistFilePath0)]
+        parallelRows = [[Path(f).name for f in row] for row in ag.parseMaplistFile(maplistFilePath1)]
+        assert serialRows == parallelRows
+
+        with pytest.raises(ValueOutOfRange):
+            ag.generateMaps(workers=0)
+
+        ag.destroy()
+
     @pytest.mark.testlogsdir("api/test_logs/test_update_gal_iso")
     @pytest.mark.testconfig("api/conf/agilepyconf.yaml")
     @pytest.mark.testdatafiles(["api/conf/sourcesconf_1.txt"])
@@ -403,6 +433,55 @@ class TestAGAnalysis:
 
         ag.destroy()
 
+    @pytest.mark.testlogsdir("api/test_logs/test_lc_warm_start")
+    @pytest.mark.testconfig("api/conf/agilepyconf.yaml")
+    @pytest.mark.testdatafiles(["api/conf/sourcesconf_1.txt"])
+    def test_lc_warm_start(self, environ_test_logs_dir, config, testdatafiles):
+
+        ag = AGAnalysis(config,testdatafiles[0] )
+
+        ag.setOptions(energybins=[[100, 300]], fovbinnumber=1) # to reduce the computational time
+
+        ag.freeSources(lambda name: name == TestAGAnalysis.VELA , "flux", True)
+
+        catalogFlux = ag.sourcesLibrary.sources[0].getVal("flux")
+
+        lightCurveData = ag.lightCurveMLE(TestAGAnalysis.VELA , tmin=433900000, tmax=433940000, timetype="TT", binsize=20000, warmStart=True)
+
+        assert os.path.isfile(lightCurveData)
+        assert len(ag.lightCurveTable["mle"]) == 2
+
+        # the first bin starts from the catalog values
+        assert len(ag.lightCurveStats) == 2
+        assert not ag.lightCurveStats["warm_start"][0]
+        assert all(ag.lightCurveStats["time"] >= ag.lightCurveStats["mle_time"])
+
+        # the sources library is not modified
+        assert catalogFlux == ag.sourcesLibrary.sources[0].getVal("flux")
+        assert ag.sourcesLibrary.sources[0].getVal("multiDate") is None
+
+        ag.destroy()
+
+    @pytest.mark.testlogsdir("api/test_logs/test_warm_start_bounds")
+    @pytest.mark.testconfig("api/conf/agilepyconf.yaml")
+    @pytest.mark.testdatafiles(["api/conf/sourcesconf_1.txt", "api/data/testcase_2AGLJ0835-4514.source"])
+    def test_warm_start_bounds(self, environ_test_logs_dir, config, testdatafiles):
+
+        ag = AGAnalysis(config,testdatafiles[0] )
+
+        vela = ag.sourcesLibrary.sources[0]
+
+        multiAnalysisResult = ag.sourcesLibrary.parseSourceFile(str(testdatafiles[1]))
+        assert AGAnalysis._isValidWarmStart(vela, multiAnalysisResult)
+
+        for parameterName, value in [("multiFlux", 1e-3), ("multiFlux", float("nan")), ("multiIndex", 6),
+                                     ("multiLPeak", 250), ("multiFitFitstatus1", 1)]:
+            multiAnalysisResult = ag.sourcesLibrary.parseSourceFile(str(testdatafiles[1]))
+            multiAnalysisResult.setParameter(parameterName, {"value": value})
+            assert not AGAnalysis._isValidWarmStart(vela, multiAnalysisResult)
+
+        ag.destroy()
+
     """def test_simple_lc(self):
 
         ag = AGAnalysis(config,testdatafiles[0] )
@@ -421,6 +500,75 @@ class TestAGAnalysis:
 
         ag.destroy()"""
 
+    @pytest.mark.testlogsdir("api/test_logs/test_lc_resume")
+    @pytest.mark.testconfig("api/conf/agilepyconf.yaml")
+    @pytest.mark.testdatafiles(["api/conf/sourcesconf_1.txt"])
+    def test_lc_resume(self, environ_test_logs_dir, config, testdatafiles):
+
+        ag = AGAnalysis(config,testdatafiles[0] )
+
+        ag.setOptions(energybins=[[100, 300]], fovbinnumber=1) # to reduce the computational time
+
+        ag.freeSources(lambda name: name == TestAGAnalysis.VELA , "flux", True)
+
+        lightCurveData = ag.lightCurveMLE(TestAGAnalysis.VELA , tmin=433900000, tmax=433940000, timetype="TT", binsize=20000)
+        lcDir = Path(lightCurveData).parent
+        lines = Path(lightCurveData).read_text().splitlines()
+
+        # the second bin is lost
+        secondBinDir = [d for d in lcDir.iterdir() if d.name.startswith("1_bin_")][0]
+        for sourceFile in secondBinDir.joinpath("mle", "0").glob("*.source"):
+            sourceFile.unlink()
+
+        resumedLightCurveData = ag.lightCurveMLE(TestAGAnalysis.VELA , tmin=433900000, tmax=433940000, timetype="TT", binsize=20000, resume=True)
+
+        # the same directory is used and only the second bin is computed again
+        assert Path(resumedLightCurveData).parent == lcDir
+        assert Path(resumedLightCurveData).read_text().splitlines() == lines
+
+        manifest = LightCurveManifest.load(lcDir)
+        assert manifest.getBins(LightCurveManifest.DONE) == manifest.getBins()
+
+        # with different free parameters the analysis is not resumed
+        ag.freeSources(lambda name: name == TestAGAnalysis.VELA , "index", True)
+        changedLightCurveData = ag.lightCurveMLE(TestAGAnalysis.VELA , tmin=433900000, tmax=433940000, timetype="TT", binsize=20000, resume=True)
+        assert Path(changedLightCurveData).parent != lcDir
+        ag.freeSources(lambda name: name == TestAGAnalysis.VELA , "index", False)
+
+        # without resume a new directory is created
+        newLightCurveData = ag.lightCurveMLE(TestAGAnalysis.VELA , tmin=433900000, tmax=433940000, timetype="TT", binsize=20000)
+        assert Path(newLightCurveData).parent != lcDir
+
+        ag.destroy()
+
+    @pytest.mark.testlogsdir("api/test_logs/test_lc_workers")
+    @pytest.mark.testconfig("api/conf/agilepyconf.yaml")
+    @pytest.mark.testdatafiles(["api/conf/sourcesconf_1.txt"])
+    def test_lc_workers(self, environ_test_logs_dir, config, testdatafiles):
+
+        ag = AGAnalysis(config,testdatafiles[0] )
+
+        ag.setOptions(energybins=[[100, 300]], fovbinnumber=1) # to reduce the computational time
+
+        ag.freeSources(lambda name: name == TestAGAnalysis.VELA , "flux", True)
+
+        serialLightCurveData = ag.lightCurveMLE(TestAGAnalysis.VELA , tmin=433900000, tmax=433940000, timetype="TT", binsize=10000)
+        parallelLightCurveData = ag.lightCurveMLE(TestAGAnalysis.VELA , tmin=433900000, tmax=433940000, timetype="TT", binsize=10000, workers=3)
+
+        serialTable = Table.read(serialLightCurveData, format="ascii")
+        parallelTable = Table.read(parallelLightCurveData, format="ascii")
+
+        # the bins are in temporal order, as in the serial run
+        assert len(parallelTable) == 4
+        assert list(parallelTable["time_start_tt"]) == sorted(parallelTable["time_start_tt"])
+        assert list(parallelTable["time_start_tt"]) == list(serialTable["time_start_tt"])
+        assert list(parallelTable["flux"]) == list(serialTable["flux"])
+
+        with pytest.raises(ValueOutOfRange):
+            ag.lightCurveMLE(TestAGAnalysis.VELA , tmin=433900000, tmax=433940000, timetype="TT", binsize=10000, workers=0)
+
+        ag.destroy()
+
     @pytest.mark.testlogsdir("api/test_logs/test_gc")
     @pytest.mark.testconfig("api/conf/agilepyconf.yaml")
     @pytest.mark.testdatafiles(["api/conf/sourcesconf_1.txt"])
@@ -543,6 +691,96 @@ class TestAGAnalysis:
         ag.destroy()
 
 
+    @pytest.mark.testlogsdir("api/test_logs/test_light_curve_rows")
+    @pytest.mark.testconfig("api/conf/agilepyconf.yaml")
+    @pytest.mark.testdatafiles(["api/conf/sourcesconf_1.txt", "api/data/testcase_2AGLJ0835-4514.source"])
+    def test_light_curve_rows(self, environ_test_logs_dir, config, testdatafiles, tmp_path):
+
+        ag = AGAnalysis(config,testdatafiles[0] )
+
+        sourceFile = str(testdatafiles[1])
+
+        rows = ag._getLightCurveRows("2AGLJ0835-4514", [sourceFile, sourceFile])
+        assert len(rows) == 2
+        assert len(rows[0]) == len(AGAnalysis.LC_MLE_COLUMNS)
+
+        assert ag._getLightCurveRows("2AGLJ0835-4514", [sourceFile.replace(".source", ".log")]) == []
+
+        # the table built in memory is the same table read from the light curve file
+        lcFilePath = tmp_path.joinpath("light_curve.txt")
+        with open(lcFilePath, "w") as lcf:
+            lcf.write(" ".join(AGAnalysis.LC_MLE_COLUMNS)+"\n")
+            for row in rows:
+                lcf.write(" ".join(map(str, row))+"\n")
+
+        fileTable = Table.read(lcFilePath, format="ascii")
+        columnNames = AGAnalysis._getUniqueColumnNames(AGAnalysis.LC_MLE_COLUMNS)
+        memoryTable = Table([AGAnalysis._toColumnArray(column) for column in zip(*rows)], names=columnNames)
+
+        assert memoryTable.colnames == fileTable.colnames
+        for columnName in columnNames:
+            assert memoryTable[columnName].dtype.kind == fileTable[columnName].dtype.kind
+            assert list(memoryTable[columnName]) == list(fileTable[columnName])
+
+        ag.destroy()
+
+    @pytest.mark.testlogsdir("api/test_logs/test_iter_lc")
+    @pytest.mark.testconfig("api/conf/agilepyconf.yaml")
+    @pytest.mark.testdatafiles(["api/conf/sourcesconf_1.txt"])
+    def test_iter_lc(self, environ_test_logs_dir, config, testdatafiles):
+
+        ag = AGAnalysis(config,testdatafiles[0] )
+
+        ag.setOptions(energybins=[[100, 300]], fovbinnumber=1) # to reduce the computational time
+
+        ag.freeSources(lambda name: name == TestAGAnalysis.VELA , "flux", True)
+
+        rows = []
+        for row in ag.iterLightCurveMLE(TestAGAnalysis.VELA , tmin=433900000, tmax=433940000, timetype="TT", binsize=20000):
+            rows.append(row)
+
+        assert len(rows) == 2
+        assert float(rows[0]["time_start_tt"]) < float(rows[1]["time_start_tt"])
+
+        with open(ag.lightCurveData["mle"], "r") as lcd:
+            assert len(lcd.readlines()) == 3 # 1 header + 2 temporal bins
+
+        lcTable = ag.lightCurveTable["mle"]
+        assert len(lcTable) == 2
+        assert list(lcTable["flux"]) == list(Table.read(ag.lightCurveData["mle"], format="ascii")["flux"])
+
+        ag.destroy()
+
+    @pytest.mark.testlogsdir("api/test_logs/test_iter_lc_stop")
+    @pytest.mark.testconfig("api/conf/agilepyconf.yaml")
+    @pytest.mark.testdatafiles(["api/conf/sourcesconf_1.txt"])
+    def test_iter_lc_stop(self, environ_test_logs_dir, config, testdatafiles):
+
+        ag = AGAnalysis(config,testdatafiles[0] )
+
+        ag.setOptions(energybins=[[100, 300]], fovbinnumber=1) # to reduce the computational time
+
+        ag.freeSources(lambda name: name == TestAGAnalysis.VELA , "flux", True)
+
+        lightCurve = ag.iterLightCurveMLE(TestAGAnalysis.VELA , tmin=433900000, tmax=433980000, timetype="TT", binsize=20000)
+
+        # the caller stops after the first row
+        next(lightCurve)
+        lightCurve.close()
+
+        lcRootDir = Path(ag.getOption("outdir")).joinpath("lc")
+        lcDir = lcRootDir.joinpath(str(max(int(name) for name in os.listdir(lcRootDir) if name.isdigit())))
+
+        # the bin running when the caller stops is completed, the next ones are left pending, to be resumed
+        manifest = LightCurveManifest.load(lcDir)
+        allBins = manifest.getBins()
+        assert len(allBins) == 4
+        assert manifest.getBins(LightCurveManifest.DONE) in (allBins[:1], allBins[:2])
+        assert manifest.getBins(LightCurveManifest.PENDING) == allBins[len(manifest.getBins(LightCurveManifest.DONE)):]
+        assert len([d for d in lcDir.iterdir() if "_bin_" in d.name]) == len(manifest.getBins(LightCurveManifest.DONE))
+
+        ag.destroy()
+
     @pytest.mark.testlogsdir("api/test_logs/test_fix_exponent")
     @pytest.mark.testconfig("api/conf/agilepyconf.yaml")
     @pytest.mark.testdatafiles(["api/conf/sourcesconf_1.txt"])
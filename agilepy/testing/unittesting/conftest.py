@@ -1,6 +1,8 @@
 import os
 import pytest
+import threading
 from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from shutil import rmtree
 from os.path import expandvars
 from agilepy.config.AgilepyConfig import AgilepyConfig 
@@ -179,6 +181,75 @@ def datacoveragepath(request):
     return datacoveragepath
 
 
+class SSDCStandInHandler(BaseHTTPRequestHandler):
+    """
+    It serves server.content(path) (bytes or None) supporting the HTTP Range requests.
+    The first response to any path in server.drop is interrupted halfway.
+    """
+    def do_GET(self):
+
+        rangeHeader = self.headers.get("Range")
+
+        with self.server.lock:
+            self.server.requests.append((self.path, rangeHeader))
+            drop = self.path in self.server.drop
+            self.server.drop.discard(self.path)
+
+        body = self.server.content(self.path)
+
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        start = int(rangeHeader[len("bytes="):].split("-")[0]) if rangeHeader else 0
+
+        if start >= len(body) and rangeHeader:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(body)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(206 if rangeHeader else 200)
+        if rangeHeader:
+            self.send_header("Content-Range", f"bytes {start}-{len(body)-1}/{len(body)}")
+        self.send_header("Content-Length", str(len(body) - start))
+        self.end_headers()
+
+        payload = body[start:]
+        if drop:
+            self.wfile.write(payload[:len(payload)//2])
+            self.close_connection = True
+        else:
+            self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(scope="function")
+def ssdcserver():
+    """
+    A local stand-in of the SSDC rest service: set server.content and server.drop, use server.url as baseUrl of AGRest.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SSDCStandInHandler)
+    server.daemon_threads = True
+    server.content = lambda path: None
+    server.drop = set()
+    server.requests = []
+    server.lock = threading.Lock()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
 ###### This part is for running tests that require a connection with SSDC datacenter
 
 def pytest_addoption(parser):
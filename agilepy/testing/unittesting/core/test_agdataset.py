@@ -25,19 +25,40 @@
 #You should have received a copy of the GNU General Public License
 #along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #from cgi import test
+import io
 import os
+import json
+import tarfile
 import pandas as pd
+from astropy.io import fits
 from shutil import rmtree
 from time import sleep
 import pytest
 from pathlib import Path
 from agilepy.core.AGDataset import AGDataset 
 from agilepy.core.AGDataset import DataStatus
+from agilepy.utils.AGRest import AGRest
 from agilepy.config.AgilepyConfig import AgilepyConfig
 from agilepy.utils.AstroUtils import AstroUtils
 from datetime import datetime
 from agilepy.core.CustomExceptions import NoCoverageDataError
 
+def ssdcContent(path):
+    """
+    The content served by the stand-in of the SSDC rest service: one EVT file and one LOG file for each requested slot.
+    """
+    if path.startswith("/GRIDList/"):
+        return json.dumps({"Response": {"statusCode": "OK", "message": None}, "AgileFiles": []}).encode()
+    _, _, chunkTmin, _ = path.split("/")
+    name = chunkTmin[:10].replace("-", "")
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tf:
+        for member in [f"std/{name}/ag{name}_STD0P_FM.EVT.gz", f"std/{name}/STD0P_LOG/ag-{name}_STD0P.LOG.gz"]:
+            tarInfo = tarfile.TarInfo(member)
+            tarInfo.size = len(name)
+            tf.addfile(tarInfo, io.BytesIO(name.encode()))
+    return buffer.getvalue()
+
 class TestAGDataset:
 
     @pytest.mark.ssdc
@@ -71,6 +92,170 @@ class TestAGDataset:
         with pytest.raises(NoCoverageDataError):
             downloaded = agdataset.downloadData(tmin, tmax, configObject.getOptionValue("datapath"), configObject.getOptionValue("evtfile"), configObject.getOptionValue("logfile"))
 
+
+    @pytest.mark.testlogsdir("core/test_logs/test_download_data_slots")
+    @pytest.mark.testdatafiles(["core/test_data/AGILE_test_datacoverage"])
+    def test_download_data_slots(self, logger, testdatafiles, ssdcserver, tmp_path):
+
+        ssdcserver.content = ssdcContent
+
+        agdataset = AGDataset(logger, testdatafiles[0], downloadWorkers=2, agrest=AGRest(logger, baseUrl=ssdcserver.url))
+
+        indexed = []
+        agdataset.generateIndex = lambda dataPath, filetype, pathToIndex: indexed.append(filetype)
+
+        tmin = 58051 # 2017-10-25T00:00:00
+        tmax = 58071 # 2017-11-14T00:00:00
+
+        assert agdataset.downloadData(tmin, tmax, tmp_path, tmp_path.joinpath("EVT.index"), tmp_path.joinpath("LOG.index")) == True
+
+        # one request for each EVT slot
+        gridFiles = sorted(path for path, _ in ssdcserver.requests if path.startswith("/GRIDFiles/"))
+        assert len(gridFiles) == 2
+        assert len(list(tmp_path.joinpath("EVT").iterdir())) == 2
+        assert len(list(tmp_path.joinpath("LOG").iterdir())) == 2
+        assert sorted(indexed) == ["EVT", "EVT", "LOG", "LOG"]
+        assert list(tmp_path.joinpath(".downloads").iterdir()) == []
+
+        # the query files are the same as the ones of a single request
+        agdataset.updateQFile(tmp_path.joinpath("missing_EVT.qfile"), tmin, tmax, tmp_path.joinpath("EVT_expected.qfile"))
+        agdataset.updateQFile(tmp_path.joinpath("missing_LOG.qfile"), tmin, tmax, tmp_path.joinpath("LOG_expected.qfile"))
+        assert tmp_path.joinpath("EVT.qfile").read_text() == tmp_path.joinpath("EVT_expected.qfile").read_text()
+        assert tmp_path.joinpath("LOG.qfile").read_text() == tmp_path.joinpath("LOG_expected.qfile").read_text()
+
+        # the data is not downloaded again
+        assert agdataset.downloadData(tmin, tmax, tmp_path, tmp_path.joinpath("EVT.index"), tmp_path.joinpath("LOG.index")) == False
+        assert len([path for path, _ in ssdcserver.requests if path.startswith("/GRIDFiles/")]) == 2
+
+    @pytest.mark.testlogsdir("core/test_logs/test_download_data_gaps")
+    @pytest.mark.testdatafiles(["core/test_data/AGILE_test_datacoverage"])
+    def test_download_data_gaps(self, logger, testdatafiles, ssdcserver, tmp_path):
+
+        ssdcserver.content = ssdcContent
+
+        agdataset = AGDataset(logger, testdatafiles[0], agrest=AGRest(logger, baseUrl=ssdcserver.url))
+        agdataset.generateIndex = lambda dataPath, filetype, pathToIndex: None
+
+        # one day of LOG data is missing
+        with open(tmp_path.joinpath("EVT.qfile"), "w") as qf:
+            qf.write("2017-10-15T00:00:00 2017-10-31T00:00:00\n2017-10-31T00:00:00 2017-11-15T00:00:00\n")
+        with open(tmp_path.joinpath("LOG.qfile"), "w") as qf:
+            qf.write("2017-10-20T00:00:00 2017-11-02T00:00:00\n2017-11-03T00:00:00 2017-11-20T00:00:00\n")
+
+        tmin = 58051 # 2017-10-25T00:00:00
+        tmax = 58071 # 2017-11-14T00:00:00
+
+        assert agdataset.computeMissingIntervals(tmin, tmax, tmp_path.joinpath("EVT.qfile")) == []
+        assert agdataset.computeMissingIntervals(tmin, tmax, tmp_path.joinpath("LOG.qfile")) == [(58059.0, 58060.0)]
+        assert agdataset.dataIsMissing(tmin, tmax, tmp_path.joinpath("LOG.qfile")) == DataStatus.MISSING
+
+        assert agdataset.downloadData(tmin, tmax, tmp_path, tmp_path.joinpath("EVT.index"), tmp_path.joinpath("LOG.index")) == True
+
+        # only the missing day has been requested and extracted
+        gridFiles = [path for path, _ in ssdcserver.requests if path.startswith("/GRIDFiles/")]
+        assert gridFiles == ["/GRIDFiles/2017-11-02T00:00:00.000/2017-11-03T00:00:00.000"]
+        assert not tmp_path.joinpath("EVT").exists() or list(tmp_path.joinpath("EVT").iterdir()) == []
+        assert [f.name for f in tmp_path.joinpath("LOG").iterdir()] == ["ag-20171102_STD0P.LOG.gz"]
+
+        with open(tmp_path.joinpath("LOG.qfile"), "r") as qf:
+            assert qf.readlines() == ["2017-10-20T00:00:00.000000 2017-11-20T00:00:00.000000\n"]
+
+        assert agdataset.computeMissingIntervals(tmin, tmax, tmp_path.joinpath("LOG.qfile")) == []
+        assert agdataset.downloadData(tmin, tmax, tmp_path, tmp_path.joinpath("EVT.index"), tmp_path.joinpath("LOG.index")) == False
+
+        # tmax is not covered by the end of an interval
+        assert agdataset.computeMissingIntervals(tmin, 58077, tmp_path.joinpath("LOG.qfile")) == [(58077, 58077)]
+
+
+    @pytest.mark.testlogsdir("core/test_logs/test_extract_data_types")
+    @pytest.mark.testdatafiles(["core/test_data/AGILE_test_datacoverage"])
+    def test_extract_data_types(self, logger, testdatafiles, tmp_path):
+
+        members = {
+            "std/0909301200_0910151200-86596/ag0909301200_0910151200_STD0P_FM.EVT.gz": b"evt1",
+            "std/0909301200_0910151200-86596/STD0P_LOG/ag-182087934_STD0P.LOG.gz": b"log1",
+            "std/0909301200_0910151200-86596/STD0P_LOG/ag-182174334_STD0P.LOG.gz": b"log2",
+            "std/0910151200_0910311200-86597/ag0910151200_0910311200_STD0P_FM.EVT.gz": b"evt2",
+        }
+        tarFilePath = tmp_path.joinpath("data.tar.gz")
+        with tarfile.open(tarFilePath, mode="w:gz") as tf:
+            tarInfo = tarfile.TarInfo("std/0909301200_0910151200-86596/STD0P_LOG")
+            tarInfo.type = tarfile.DIRTYPE
+            tf.addfile(tarInfo)
+            for name, content in members.items():
+                tarInfo = tarfile.TarInfo(name)
+                tarInfo.size = len(content)
+                tf.addfile(tarInfo, io.BytesIO(content))
+
+        dataPath = tmp_path.joinpath("data")
+        dataPath.joinpath("LOG").mkdir(parents=True)
+        dataPath.joinpath("LOG", "ag-182087934_STD0P.LOG.gz").write_bytes(b"present")
+
+        agdataset = AGDataset(logger, testdatafiles[0])
+
+        extractedFiles = agdataset.extractDataTypes(["EVT", "LOG"], tarFilePath, dataPath)
+
+        assert extractedFiles["EVT"] == [list(members)[0], list(members)[3]]
+        assert extractedFiles["LOG"] == [list(members)[2]]
+
+        assert sorted(f.name for f in dataPath.joinpath("EVT").iterdir()) == ["ag0909301200_0910151200_STD0P_FM.EVT.gz", "ag0910151200_0910311200_STD0P_FM.EVT.gz"]
+        assert sorted(f.name for f in dataPath.joinpath("LOG").iterdir()) == ["ag-182087934_STD0P.LOG.gz", "ag-182174334_STD0P.LOG.gz"]
+        assert dataPath.joinpath("EVT", "ag0910151200_0910311200_STD0P_FM.EVT.gz").read_bytes() == b"evt2"
+        # the files already present are not overwritten
+        assert dataPath.joinpath("LOG", "ag-182087934_STD0P.LOG.gz").read_bytes() == b"present"
+
+        assert agdataset.extractData("EVT", tarFilePath, dataPath) == []
+
+    @pytest.mark.testlogsdir("core/test_logs/test_generate_index_incremental")
+    @pytest.mark.testdatafiles(["core/test_data/AGILE_test_datacoverage"])
+    def test_generate_index_incremental(self, logger, testdatafiles, tmp_path):
+
+        logPath = tmp_path.joinpath("LOG")
+        logPath.mkdir()
+        indexPath = tmp_path.joinpath("LOG.index")
+
+        def writeLog(name, tstart, tstop, extension=False):
+            header = fits.Header([("TSTART", tstart), ("TSTOP", tstop)])
+            hdus = [fits.PrimaryHDU(), fits.BinTableHDU.from_columns([fits.Column(name="TIME", format="D", array=[tstart])], header=header)] if extension else [fits.PrimaryHDU(header=header)]
+            fits.HDUList(hdus).writeto(logPath.joinpath(name))
+
+        writeLog("ag-436363132_STD1Kal.LOG.gz", 436363132.0, 436449531.9)
+        writeLog("ag-436535932_STD1Kal.LOG.gz", 436535932.0, 436622331.9, extension=True)
+        writeLog("ag-436449532_STD1Kal.LOG.gz", 436449532.0, 436535931.9)
+        logPath.joinpath(".ag-436622332_STD1Kal.LOG.gz.tmp").write_bytes(b"")
+
+        with open(indexPath, "w") as f:
+            f.write(f"{logPath}/ag-436363132_STD1Kal.LOG.gz 436363132.000000 436449531.900000 LOG\n")
+            f.write(f"{logPath}/ag-436276732_STD1Kal.LOG.gz 436276732.000000 436363131.900000 LOG")
+
+        agdataset = AGDataset(logger, testdatafiles[0])
+
+        regenerated = []
+        agdataset.regenerateIndex = lambda dataPath, filetype, pathToIndex: regenerated.append(filetype)
+
+        agdataset.generateIndex(logPath, "LOG", indexPath)
+
+        assert regenerated == []
+        with open(indexPath) as f:
+            assert f.readlines() == [
+                f"{logPath}/ag-436363132_STD1Kal.LOG.gz 436363132.000000 436449531.900000 LOG\n",
+                f"{logPath}/ag-436449532_STD1Kal.LOG.gz 436449532.000000 436535931.900000 LOG\n",
+                f"{logPath}/ag-436535932_STD1Kal.LOG.gz 436535932.000000 436622331.900000 LOG\n"
+            ]
+
+        # the index is generated again if it is missing, refers to another directory or a header cannot be read
+        agdataset.generateIndex(logPath, "LOG", tmp_path.joinpath("missing.index"))
+        assert regenerated == ["LOG"]
+
+        agdataset.generateIndex(tmp_path, "LOG", indexPath)
+        assert regenerated == ["LOG", "LOG"]
+
+        logPath.joinpath("ag-436622332_STD1Kal.LOG.gz").write_bytes(b"not a fits file")
+        agdataset.generateIndex(logPath, "LOG", indexPath)
+        assert regenerated == ["LOG", "LOG", "LOG"]
+
+        agdataset.generateIndex(logPath, "LOG", indexPath, incremental=False)
+        assert regenerated == ["LOG", "LOG", "LOG", "LOG"]
         
     @pytest.mark.testconfig("core/conf/test_download_data_config.yaml")
     @pytest.mark.testdatafiles(["core/test_data/test_extract_data_EVT.qfile", "core/test_data/AGILE_test_datacoverage"])
@@ -267,11 +452,12 @@ class TestAGDataset:
         agdataset.updateQFile(queryEVTPath, tmin, tmax, queryEVTPathOut)
         agdataset.updateQFile(queryLOGPath, tmin, tmax, queryLOGPathOut)
 
+        # the slots are merged into the intervals of the query file
         with open(queryEVTPathOut, "r") as qf:
-           assert len(qf.readlines()) == 8
+           assert qf.readlines() == ["2019-12-31T00:00:00.000000 2020-04-30T00:00:00.000000\n"]
 
         with open(queryLOGPathOut, "r") as qf:
-           assert len(qf.readlines()) == 108
+           assert qf.readlines() == ["2020-01-01T00:00:00.000000 2020-04-17T00:00:00.000000\n"]
 
 
 
@@ -297,8 +483,9 @@ class TestAGDataset:
 
         agdataset.updateQFile(queryLOGPath, tmin, tmax, queryLOGPathOut)
 
+        # the slots are merged into the intervals of the query file
         with open(queryEVTPathOut, "r") as qf:
-           assert len(qf.readlines()) == 8
+           assert qf.readlines() == ["2019-12-31T00:00:00.000000 2020-04-30T00:00:00.000000\n"]
 
 
 
@@ -330,11 +517,12 @@ class TestAGDataset:
         agdataset.updateQFile(queryEVTPath, tmin, tmax, queryEVTPathOut)
         agdataset.updateQFile(queryLOGPath, tmin, tmax, queryLOGPathOut)
 
+        # the slots are merged into the intervals of the query file
         with open(queryEVTPathOut, "r") as qf:
-           assert len(qf.readlines()) == 8
+           assert qf.readlines() == ["2019-12-31T00:00:00.000000 2020-04-30T00:00:00.000000\n"]
 
         with open(queryLOGPathOut, "r") as qf:
-           assert len(qf.readlines()) == 109
+           assert qf.readlines() == ["2020-01-01T00:00:00.000000 2020-04-17T00:00:00.000000\n"]
 
     
 
@@ -0,0 +1,88 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+from datetime import datetime
+
+from agilepy.core.CoverageIndex import CoverageIndex
+
+def d(day, hour=0):
+    return datetime(2020, 1, day, hour)
+
+class TestCoverageIndex:
+
+    def test_queries(self):
+
+        assert CoverageIndex.mergeIntervals([(3, 4), (1, 2), (2, 3), (6, 8), (7, 7)]) == [(1, 4), (6, 8)]
+
+        index = CoverageIndex([(d(10), d(15)), (d(1), d(3)), (d(3), d(5)), (d(12), d(20)), (d(25), d(26))])
+
+        assert index.getIntervals() == [(d(1), d(5)), (d(10), d(20)), (d(25), d(26))]
+
+        assert index.getInterval(d(1)) == 0
+        assert index.getInterval(d(4, 23)) == 0
+        assert index.getInterval(d(5)) == -1
+        assert index.getInterval(d(15)) == 1
+        assert index.getInterval(d(26)) == -1
+
+        assert index.covers(d(1), d(4))
+        assert not index.covers(d(1), d(5))
+        assert not index.covers(d(4), d(11))
+        assert index.covers(d(10), d(10))
+
+        assert index.gaps(d(2), d(4)) == []
+        assert index.gaps(d(2), d(5)) == [(d(5), d(5))]
+        assert index.gaps(d(2), d(28)) == [(d(5), d(10)), (d(20), d(25)), (d(26), d(28))]
+        assert index.gaps(d(6), d(8)) == [(d(6), d(8))]
+        assert CoverageIndex().gaps(d(6), d(8)) == [(d(6), d(8))]
+
+        union = index.union([(d(20), d(22)), (d(24), d(25)), (d(28), d(29))])
+        assert union.getIntervals() == [(d(1), d(5)), (d(10), d(22)), (d(24), d(26)), (d(28), d(29))]
+        assert index.getIntervals() == [(d(1), d(5)), (d(10), d(20)), (d(25), d(26))]
+
+    def test_load(self, tmp_path):
+
+        qfile = tmp_path.joinpath("EVT.qfile")
+        with open(qfile, "w") as f:
+            f.write("2020-01-15T00:00:00 2020-01-31T00:00:00\n2020-01-01T00:00:00 2020-01-15T00:00:00\n")
+
+        index = CoverageIndex.load(qfile)
+        assert index.getIntervals() == [(d(1), d(31))]
+
+        # the query file is read only once
+        assert CoverageIndex.load(qfile) is index
+
+        index.union([(d(31), datetime(2020, 2, 15))]).save(qfile)
+        with open(qfile) as f:
+            assert f.read() == "2020-01-01T00:00:00.000000 2020-02-15T00:00:00.000000\n"
+        assert CoverageIndex.load(qfile).getIntervals() == [(d(1), datetime(2020, 2, 15))]
+
+        # an external change of the query file is detected
+        with open(qfile, "w") as f:
+            f.write("2020-01-01T00:00:00 2020-01-02T00:00:00\n")
+        os.utime(qfile, ns=(0, 0))
+        assert CoverageIndex.load(qfile).getIntervals() == [(d(1), d(2))]
@@ -0,0 +1,88 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import pytest
+
+from agilepy.core.LightCurveManifest import LightCurveManifest
+
+class TestLightCurveManifest:
+
+    @pytest.mark.testlogsdir("core/test_logs/test_manifest_write_load")
+    def test_write_load(self, logger, tmp_path):
+
+        bins = [(0, 100.0, 200.0), (1, 200.0, 300.0), (2, 300.0, 350.0)]
+
+        manifest = LightCurveManifest(tmp_path, "VELA", 100, 400, 100, bins)
+        manifest.write()
+
+        manifest.setStatus(0, LightCurveManifest.DONE, [tmp_path.joinpath("0_bin_100.0_200.0", "mle", "0", "VELA.source")])
+        manifest.setStatus(1, LightCurveManifest.FAILED)
+
+        loaded = LightCurveManifest.load(tmp_path)
+
+        assert loaded.matches("VELA", 100, 400, 100)
+        assert not loaded.matches("VELA", 100, 400, 50)
+        assert not loaded.matches("CRAB", 100, 400, 100)
+
+        assert loaded.getBins() == bins
+        assert loaded.getBins(LightCurveManifest.DONE) == [(0, 100.0, 200.0)]
+        assert loaded.getBins(LightCurveManifest.FAILED) == [(1, 200.0, 300.0)]
+        assert loaded.getBins(LightCurveManifest.PENDING) == [(2, 300.0, 350.0)]
+        assert loaded.getProducts(0) == [str(tmp_path.joinpath("0_bin_100.0_200.0", "mle", "0", "VELA.source"))]
+
+        # no temporary files are left
+        assert [f.name for f in tmp_path.iterdir()] == [LightCurveManifest.FILENAME]
+
+    @pytest.mark.testlogsdir("core/test_logs/test_manifest_not_valid")
+    def test_not_valid(self, logger, tmp_path):
+
+        assert LightCurveManifest.load(tmp_path) is None
+
+        tmp_path.joinpath(LightCurveManifest.FILENAME).write_text('{"sourceName": "VELA", "bins"')
+        assert LightCurveManifest.load(tmp_path) is None
+
+        tmp_path.joinpath(LightCurveManifest.FILENAME).write_text(json.dumps({"sourceName": "VELA"}))
+        assert LightCurveManifest.load(tmp_path) is None
+
+    @pytest.mark.testlogsdir("core/test_logs/test_manifest_fingerprint")
+    def test_fingerprint(self, logger, tmp_path):
+
+        bins = [(0, 100.0, 200.0)]
+
+        LightCurveManifest(tmp_path, "VELA", 100, 200, 100, bins, "abc").write()
+
+        loaded = LightCurveManifest.load(tmp_path)
+
+        assert loaded.fingerprint == "abc"
+        assert loaded.matches("VELA", 100, 200, 100, "abc")
+        assert not loaded.matches("VELA", 100, 200, 100, "def")
+
+        # a manifest written without a fingerprint does not match any analysis options
+        LightCurveManifest(tmp_path, "VELA", 100, 200, 100, bins).write()
+
+        assert not LightCurveManifest.load(tmp_path).matches("VELA", 100, 200, 100, "abc")
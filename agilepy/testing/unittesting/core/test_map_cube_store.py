@@ -0,0 +1,160 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import sys
+import shutil
+import pytest
+import subprocess
+import numpy as np
+from pathlib import Path
+from astropy.io import fits
+
+from agilepy.config.AgilepyConfig import AgilepyConfig
+from agilepy.core.MapCubeStore import MapCubeStore
+from agilepy.core.ScienceTools import CtsMapGenerator
+
+class CopyMapTool:
+    """
+    A stand-in of AG_ctsmapgen and AG_expmapgen copying a test map into the product of the piece, if it does not exist.
+    """
+    testDataDir = Path(__file__).parent.joinpath("test_data")
+
+    def __init__(self, toolClass, exeName, generated):
+        self.exeName = exeName
+        self.extension = "cts.gz" if toolClass is CtsMapGenerator else "exp.gz"
+        self.generated = generated
+        self.inputs = []
+
+    def configureTool(self, config):
+        self.product = Path(config.getOptionValue("outdir")).joinpath(f"{config.getOptionValue('filenameprefix')}.{self.extension}")
+        self.products = {str(self.product): None}
+
+    def call(self):
+        if not self.product.exists():
+            self.product.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy(self.testDataDir.joinpath(f"testcase_EMIN00100_EMAX00300_01.{self.extension}"), self.product)
+            self.generated.append(self.product)
+        return [str(self.product)]
+
+class TestMapCubeStore:
+
+    @pytest.mark.testlogsdir("core/test_logs/test_get_pieces")
+    def test_get_pieces(self, logger, tmp_path):
+
+        store = MapCubeStore(tmp_path, chunkSize=100, agilepyLogger=logger)
+
+        assert store.getPieces(150, 420) == [(150, 200, False), (200, 300, True), (300, 400, True), (400, 420, False)]
+        assert store.getPieces(200, 400) == [(200, 300, True), (300, 400, True)]
+        assert store.getPieces(120, 180) == [(120, 180, False)]
+        assert store.getPieces(150, 250) == [(150, 250, False)]
+
+        assert store.canStack(150, 420)
+        assert not store.canStack(150, 250)
+
+    @pytest.mark.testlogsdir("core/test_logs/test_lock_signature_dir")
+    def test_lock_signature_dir(self, logger, tmp_path):
+
+        store = MapCubeStore(tmp_path, chunkSize=100, agilepyLogger=logger)
+
+        lockPath = tmp_path.joinpath(MapCubeStore.LOCK_FILENAME)
+
+        # another process tries to lock the directory without waiting
+        tryLock = [sys.executable, "-c", f"import fcntl; f = open({str(lockPath)!r}, 'a'); fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)"]
+
+        with store._lockSignatureDir(tmp_path):
+            assert subprocess.run(tryLock, stderr=subprocess.DEVNULL).returncode != 0
+
+        assert subprocess.run(tryLock).returncode == 0
+
+    @pytest.mark.testlogsdir("core/test_logs/test_index_changed")
+    def test_index_changed(self, logger, tmp_path, monkeypatch):
+
+        # the indexes of the configuration, in a temporary $AGILE
+        monkeypatch.setenv("AGILE", str(tmp_path))
+        monkeypatch.setenv("TEST_LOGS_DIR", str(tmp_path.joinpath("logs")))
+        datasetDir = tmp_path.joinpath("agilepy-test-data", "test_dataset_6.0")
+        for indexType in ("EVT", "LOG"):
+            datasetDir.joinpath(indexType).mkdir(parents=True)
+            datasetDir.joinpath(indexType, f"{indexType}.index").write_text(f"/data/{indexType}.fits 100 200 {indexType}\n")
+
+        config = AgilepyConfig()
+        config.loadBaseConfigurations(Path(__file__).parent.joinpath("conf", "agilepyconf.yaml"))
+        config.loadConfigurationsForClass("AGAnalysis")
+        config.setOptions(tmin=100, tmax=300, timetype="TT")
+
+        generated = []
+        store = MapCubeStore(tmp_path.joinpath("store"), chunkSize=100, agilepyLogger=logger,
+                             createTool=lambda toolClass, exeName: CopyMapTool(toolClass, exeName, generated))
+
+        store.stackMaps(config, str(tmp_path.joinpath("sum.cts.gz")), str(tmp_path.joinpath("sum.exp.gz")))
+        assert len(generated) == 4
+
+        # the chunks are reused while the indexes do not change
+        store.stackMaps(config, str(tmp_path.joinpath("sum.cts.gz")), str(tmp_path.joinpath("sum.exp.gz")))
+        assert len(generated) == 4
+
+        # e.g. downloadData() adds the data of the last chunk
+        with open(datasetDir.joinpath("EVT", "EVT.index"), "a") as index:
+            index.write("/data/EVT2.fits 200 300 EVT\n")
+
+        store.stackMaps(config, str(tmp_path.joinpath("sum.cts.gz")), str(tmp_path.joinpath("sum.exp.gz")))
+        assert len(generated) == 8
+        assert set(generated[4:]).isdisjoint(generated[:4])
+
+    @pytest.mark.testlogsdir("core/test_logs/test_sum_maps")
+    def test_sum_maps(self, logger, tmp_path):
+
+        testDataDir = Path(__file__).parent.joinpath("test_data")
+
+        for extension in ["cts.gz", "exp.gz"]:
+
+            mapPath = str(testDataDir.joinpath(f"testcase_EMIN00100_EMAX00300_01.{extension}"))
+            outfilePath = str(tmp_path.joinpath(f"sum.{extension}"))
+
+            with fits.open(mapPath) as hdul:
+                data = np.array(hdul[0].data, dtype=np.float64)
+                header = hdul[0].header.copy()
+
+            # a second piece, following the first one
+            nextMapPath = str(tmp_path.joinpath(f"next.{extension}"))
+            nextHeader = header.copy()
+            nextHeader["TSTART"] = header["TSTOP"]
+            nextHeader["TSTOP"] = header["TSTOP"] + 1000
+            with fits.open(mapPath) as hdul:
+                hdul[0].header["TSTART"] = nextHeader["TSTART"]
+                hdul[0].header["TSTOP"] = nextHeader["TSTOP"]
+                hdul.writeto(nextMapPath)
+
+            MapCubeStore.sumMaps([mapPath, nextMapPath], outfilePath)
+
+            with fits.open(outfilePath) as hdul:
+                assert np.allclose(hdul[0].data, 2 * data)
+                assert hdul[0].header["TSTART"] == header["TSTART"]
+                assert hdul[0].header["TSTOP"] == header["TSTOP"] + 1000
+                if extension == "cts.gz":
+                    assert hdul[0].data.dtype.kind in "iu"
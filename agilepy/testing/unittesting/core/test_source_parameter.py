@@ -0,0 +1,73 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from agilepy.core.source.Parameter import Parameter
+from agilepy.core.source.Spectrum import Spectrum
+from agilepy.core.source.MultiAnalysis import MultiAnalysis
+
+class TestSourceParameter:
+
+    def test_mapping_interface(self):
+
+        param = Parameter(name="index", value=None, free=False, min=0.5)
+
+        assert {"name": "index", "value": None, "free": False, "min": 0.5} == param
+        assert "free" in param
+        assert "err" not in param
+        assert "keys" not in param
+        assert 4 == len(param)
+
+        param["value"] = 2.1
+        param["err"] = 0.1
+        assert 2.1 == param["value"]
+        assert 0.1 == param.get("err")
+        assert param.get("max") is None
+
+        with pytest.raises(KeyError):
+            param["max"]
+
+        with pytest.raises(KeyError):
+            param["foo"] = 1
+
+    def test_components_have_no_dict(self):
+
+        spectrum = Spectrum.getSpectrum("PLSuperExpCutoff")
+        multi = MultiAnalysis()
+
+        assert not hasattr(spectrum, "__dict__")
+        assert not hasattr(multi, "__dict__")
+        assert not hasattr(spectrum.flux, "__dict__")
+
+        assert ("flux", "index1", "cutoffEnergy", "index2") == spectrum.parameterNames
+        assert multi.hasParameter("multiFlux")
+        assert not multi.hasParameter("setParameter")
+
+        spectrum.setParameter("index2", {"free": 1})
+        assert ["index2"] == spectrum.getFreeParams()
+        assert ["flux", "index1", "cutoffEnergy", "index2"] == spectrum.getFreeableParams()
@@ -0,0 +1,114 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import pytest
+import numpy as np
+from pathlib import Path
+
+from agilepy.core.SourcesCache import SourcesCache
+from agilepy.core.SourcesTable import SourcesTable
+
+class TestSourcesCache:
+
+    testDataDir = Path(__file__).absolute().parent.joinpath("test_data")
+
+    @pytest.mark.parametrize("fileName", ["sources.xml", "sources.txt"])
+    def test_read(self, tmp_path, fileName):
+
+        sourcesFile = tmp_path.joinpath(fileName)
+        shutil.copy(self.testDataDir.joinpath(fileName), sourcesFile)
+
+        cache = SourcesCache(tmp_path.joinpath("cache"))
+
+        assert cache.load(sourcesFile) is None
+
+        cold = cache.read(sourcesFile)
+        assert cache.getEntryPath(sourcesFile).exists()
+
+        warm = cache.load(sourcesFile)
+        assert warm is not None
+        assert str(sourcesFile) == warm.filePath
+        assert warm.getSpatialIndex() is cold.getSpatialIndex()
+
+        parsed = SourcesTable.fromFile(str(sourcesFile))
+
+        for table in [cold, warm]:
+            assert list(parsed.names) == list(table.names)
+            assert list(parsed.flux) == list(table.flux)
+            for row in range(len(parsed)):
+                assert str(parsed.getSource(row)) == str(table.getSource(row))
+
+        # the sources of two loads are distinct objects
+        assert cache.load(sourcesFile).getSource(0) is not warm.getSource(0)
+
+        # the entries contain data only
+        with np.load(cache.getEntryPath(sourcesFile), allow_pickle=False) as entry:
+            assert list(entry["names"]) == list(parsed.names)
+
+    def test_invalidation(self, tmp_path):
+
+        sourcesFile = tmp_path.joinpath("sources.txt")
+        shutil.copy(self.testDataDir.joinpath("sources.txt"), sourcesFile)
+
+        cache = SourcesCache(tmp_path.joinpath("cache"))
+        cache.read(sourcesFile)
+
+        with open(sourcesFile) as sf:
+            lines = [line for line in sf if line.strip()]
+        sourcesFile.write_text("".join(lines[:1]))
+        os.utime(sourcesFile, ns=(0, 0))
+
+        assert cache.load(sourcesFile) is None
+        assert 1 == len(cache.read(sourcesFile))
+        assert 2 == len(list(tmp_path.joinpath("cache").iterdir()))
+
+    def test_eviction(self, tmp_path):
+
+        sourcesFiles = []
+        for i in range(3):
+            sourcesFile = tmp_path.joinpath(f"sources{i}.txt")
+            shutil.copy(self.testDataDir.joinpath("sources.txt"), sourcesFile)
+            sourcesFiles.append(sourcesFile)
+
+        cache = SourcesCache(tmp_path.joinpath("cache"))
+        cache.read(sourcesFiles[0])
+        entrySize = cache.getEntries()[0][2]
+
+        # two entries at most
+        cache.maxSize = 2 * entrySize
+        cache.read(sourcesFiles[1])
+        os.utime(cache.getEntryPath(sourcesFiles[0]), (0, 0))
+        os.utime(cache.getEntryPath(sourcesFiles[1]), (1, 1))
+        # the least recently used entry is the first one: loading it makes it the most recent
+        cache.load(sourcesFiles[0])
+        cache.read(sourcesFiles[2])
+
+        assert cache.getEntryPath(sourcesFiles[0]).exists()
+        assert not cache.getEntryPath(sourcesFiles[1]).exists()
+        assert cache.getEntryPath(sourcesFiles[2]).exists()
@@ -38,7 +38,8 @@ from agilepy.core.source.Source import Source, PointSource
 from agilepy.core.CustomExceptions import SourceParamNotFoundError, \
                                           SpectrumTypeNotFoundError,  \
                                           SourceModelFormatNotSupported, \
-                                          MultiOutputNotFoundError
+                                          MultiOutputNotFoundError, \
+                                          FileSourceParsingError
 
 class TestSourcesLibrary:
 
@@ -220,6 +221,56 @@ class TestSourcesLibrary:
         assert None== res.multiDist["value"]
 
 
+    @pytest.mark.testlogsdir("core/test_logs/test_sources_library/source_files_parsing")
+    @pytest.mark.testconfig("core/conf/agilepyconf.yaml")
+    @pytest.mark.testdatafile("core/test_data/testcase_2AGLJ0835-4514.source")
+    @pytest.mark.testdatafile2("core/test_data/testcase_2AGLJ2021+3654.source")
+    def test_source_files_parsing(self, configObject, logger, testdata, testdata2):
+        sl = SourcesLibrary(configObject, logger)
+
+        table = sl.parseSourceFiles([testdata, testdata2, testdata])
+
+        assert 3 == len(table)
+        assert ["2AGLJ0835-4514", "2AGLJ2021+3654", "2AGLJ0835-4514"] == list(table["multiName"])
+        assert 9.07364e-06 == table["multiFlux"][0]
+        assert 2.17268 == table["multiSqrtTS"][0]
+        assert [100, 300, 100, 300] == list(table["multiEmin"][1])
+
+        for row, sourceFile in zip(table, [testdata, testdata2, testdata]):
+            res = sl.parseSourceFile(sourceFile)
+            assert row["multiFlux"] == res.getVal("multiFlux")
+            assert list(row["multiGalCoeff"]) == res.getVal("multiGalCoeff")
+            assert row["startDataTT"] == res.getVal("startDataTT")
+
+        parallelTable = sl.parseSourceFiles([testdata, testdata2, testdata], workers=2)
+        assert list(table["multiSqrtTS"]) == list(parallelTable["multiSqrtTS"])
+
+    @pytest.mark.testlogsdir("core/test_logs/test_sources_library/source_file_parsing_no_eval")
+    @pytest.mark.testconfig("core/conf/agilepyconf.yaml")
+    @pytest.mark.testdatafile("core/test_data/testcase_2AGLJ0835-4514.source")
+    def test_source_file_parsing_no_eval(self, configObject, logger, testdata, tmp_path):
+        sl = SourcesLibrary(configObject, logger)
+
+        with open(testdata) as f:
+            lines = f.readlines()
+        body = [i for i, line in enumerate(lines) if line[0] != "!"]
+        lines[body[1]] = "nan\n"
+        lines[body[0]] = lines[body[0]].replace("2AGLJ0835-4514", "__import__('os')", 1)
+
+        sourceFile = tmp_path.joinpath("nan.source")
+        sourceFile.write_text("".join(lines))
+
+        res = sl.parseSourceFile(sourceFile)
+        assert "__import__('os')" == res.getVal("multiName")
+        assert isinstance(res.getVal("multiSqrtTS"), float)
+        assert res.getVal("multiSqrtTS") != res.getVal("multiSqrtTS")
+
+        lines[body[1]] = "2.17268 1\n"
+        sourceFile.write_text("".join(lines))
+        with pytest.raises(FileSourceParsingError):
+            sl.parseSourceFile(sourceFile)
+
+
     @pytest.mark.testlogsdir("core/test_logs/test_sources_library/cat_no_scaling")
     @pytest.mark.testconfig("core/conf/agilepyconf.yaml")
     def test_load_source_from_catalog_without_scaling(self, configObject, logger):
@@ -401,6 +452,32 @@ class TestSourcesLibrary:
         assert "1.69737e-07 79.9247 0.661449 1.99734 0 2 CYGX3 0 0 0 0 0.5 5.0 20 10000 0 100"== lines[1].strip()
         assert "1.19303e-06 78.2375 2.12298 1.75823 3 2 _2AGLJ2021+4029 0 1 3307.63 0 0.5 5.0 20.0 10000.0  0 100"== lines[2].strip()
 
+    @pytest.mark.testlogsdir("core/test_logs/test_sources_library/write_txt_incremental")
+    @pytest.mark.testconfig("core/conf/agilepyconf.yaml")
+    @pytest.mark.testdatafile("core/test_data/sourcesconf_for_write_to_file_txt.txt")
+    def test_write_to_file_txt_incremental(self, configObject, logger, testdata):
+        sl = SourcesLibrary(configObject, logger)
+
+        sl.loadSourcesFromFile(testdata)
+
+        outputFile = Path(sl.writeToFile("write_to_file_incremental", fileformat="txt"))
+        mtime = outputFile.stat().st_mtime_ns
+
+        # same content: the file is not written again
+        assert str(outputFile) == sl.writeToFile("write_to_file_incremental", fileformat="txt")
+        assert mtime == outputFile.stat().st_mtime_ns
+
+        # the cached text of the source is invalidated by set()
+        sl.sources[1].setFreeAttributeValueOf("flux", True)
+
+        outputFile = Path(sl.writeToFile("write_to_file_incremental", fileformat="txt"))
+
+        with open(outputFile) as of:
+            lines = of.readlines()
+
+        assert "1.57017e-07 80.3286 1.12047 2.16619 0 2 _2AGLJ2032+4135 0 0 0 0 0.5 5.0 20 10000 0 100"== lines[0].strip()
+        assert "1.69737e-07 79.9247 0.661449 1.99734 1 2 CYGX3 0 0 0 0 0.5 5.0 20 10000 0 100"== lines[1].strip()
+
 
     @pytest.mark.testlogsdir("core/test_logs/test_sources_library/add_source")
     @pytest.mark.testconfig("core/conf/agilepyconf.yaml")
@@ -483,7 +560,7 @@ class TestSourcesLibrary:
     @pytest.mark.testlogsdir("core/test_logs/test_sources_library/backup_restore")
     @pytest.mark.testconfig("core/conf/agilepyconf.yaml")
     @pytest.mark.testdatafile("core/test_data/sources_2.xml")    
-    def test_backup_restore(self, config, configObject, logger, testdata):
+    def test_backup_restore(self, config, configObject, logger, testdata, monkeypatch):
         sl = SourcesLibrary(configObject, logger)
 
         configObject = AgilepyConfig()
@@ -512,4 +589,12 @@ class TestSourcesLibrary:
         sl.restoreSL()
 
         assert 2== len(sl.sources)
- 
\ No newline at end of file
+
+        # nothing to restore: the sources are not changed
+        warnings = []
+        monkeypatch.setattr(sl.logger, "warning", lambda msg, *args: warnings.append(msg))
+
+        sl.restoreSL()
+
+        assert 2== len(sl.sources)
+        assert ["restoreSL() called without a previous backupSL(): nothing to restore."] == warnings
@@ -0,0 +1,84 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+from pathlib import Path
+
+from agilepy.core.SourcesTable import SourcesTable
+from agilepy.core.source.SourcesSnapshot import SourcesSnapshot
+
+class TestSourcesSnapshot:
+
+    testDataDir = Path(__file__).absolute().parent.joinpath("test_data")
+
+    def getState(self, sources):
+        return [(s.name, str(s), [dict(p) for p in s.spectrum.getAttributes() + s.spatialModel.getAttributes()]) for s in sources]
+
+    def test_restore(self):
+
+        sources = SourcesTable.fromFile(str(self.testDataDir.joinpath("sources.xml"))).getSources()
+        for source in sources:
+            source.setDistanceFromMapCenter(80, 0)
+
+        state = self.getState(sources)
+
+        snapshot = SourcesSnapshot(sources)
+
+        sources[0].setFreeAttributeValueOf("flux", False)
+        sources[1].set("index", {"value": 3, "free": 1})
+        sources[2].setDistanceFromMapCenter(10, 10)
+
+        assert [sources[0], sources[1], sources[2]] == snapshot.getChangedSources()
+        assert state != self.getState(sources)
+
+        restored = snapshot.restore()
+
+        assert state == self.getState(restored)
+        assert all(a is b for a, b in zip(sources, restored))
+
+        # a closed snapshot does not track the changes anymore
+        sources[3].set("flux", {"value": 1})
+        assert [] == snapshot.getChangedSources()
+
+    def test_only_first_change_is_saved(self):
+
+        sources = SourcesTable.fromFile(str(self.testDataDir.joinpath("sources.txt"))).getSources()
+
+        flux = sources[0].spectrum.getVal("flux")
+
+        snapshot = SourcesSnapshot(sources[:1])
+
+        sources[0].set("flux", {"value": 1})
+        sources[0].set("flux", {"value": 2})
+        sources[1].set("flux", {"value": 3})
+
+        assert [sources[0]] == snapshot.getChangedSources()
+
+        snapshot.restore()
+
+        assert flux == sources[0].spectrum.getVal("flux")
+        assert 3 == sources[1].spectrum.getVal("flux")
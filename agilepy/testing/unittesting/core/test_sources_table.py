@@ -0,0 +1,92 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+import numpy as np
+from pathlib import Path
+
+from agilepy.core.SourcesTable import SourcesTable
+from agilepy.utils.AstroUtils import AstroUtils
+from agilepy.core.CustomExceptions import SourceModelFormatNotSupported
+
+class TestSourcesTable:
+
+    testDataDir = Path(__file__).absolute().parent.joinpath("test_data")
+
+    @pytest.mark.parametrize("fileName", ["sources.xml", "sources.txt"])
+    def test_columns(self, fileName):
+
+        table = SourcesTable.fromFile(str(self.testDataDir.joinpath(fileName)))
+
+        sources = [table._parseRow(row) for row in table._rows]
+
+        assert len(sources) == len(table)
+        assert [s.name for s in sources] == list(table.names)
+        assert [s.spectrum.getVal("flux") for s in sources] == list(table.flux)
+        assert [s.spectrum.getSpectralIndex() for s in sources] == list(table.index)
+        assert [s.get("pos")["value"][0] for s in sources] == list(table.glon)
+
+        assert table.getRow(sources[-1].name) == len(table) - 1
+        assert table.getRow("idontexist") is None
+
+    def test_distances_and_lazy_sources(self):
+
+        table = SourcesTable.fromFile(str(self.testDataDir.joinpath("sources.xml")))
+
+        dist = table.computeDistances(80, 0)
+        for l, b, d in zip(table.glon, table.glat, dist):
+            assert AstroUtils.distance(l, b, 80, 0) == pytest.approx(d, abs=1e-9)
+
+        assert [-2] * len(table) == list(table.computeDistances(400, 0))
+
+        table.computeDistances(80, 0)
+        selected = table.getDistanceMask((0, 50)) & ~table.getNamesMask(["2AGLJ2202+4214"])
+
+        sources = table.getSources(selected)
+
+        assert ["2AGLJ0007+7308"] == [s.name for s in sources]
+        assert table._sources.count(None) == len(table) - 1
+        assert sources[0].get("dist")["value"] == table.dist[table.getRow("2AGLJ0007+7308")]
+        assert table.getSource(table.getRow("2AGLJ0007+7308")) is sources[0]
+
+    def test_scale_flux(self):
+
+        table = SourcesTable.fromFile(str(self.testDataDir.joinpath("sources.txt")))
+
+        source = table.getSource(0)
+        fl, si = table.flux[0], table.index[0]
+
+        table.scaleFlux(10, 1000, 100, 10000)
+
+        p1 = fl * (si-1) / ( 100 ** (1-si) - 10000 ** (1-si) )
+        assert (p1 / (si-1)) * ( 10 ** (1-si) - 1000 ** (1-si) ) == pytest.approx(source.spectrum.getVal("flux"))
+        assert table.flux[1] == table.getSource(1).spectrum.getVal("flux")
+
+    def test_format_not_supported(self):
+
+        with pytest.raises(SourceModelFormatNotSupported):
+            SourcesTable.fromFile(str(self.testDataDir.joinpath("sourceconf.wrongext")))
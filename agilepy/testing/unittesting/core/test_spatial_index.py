@@ -0,0 +1,83 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import shutil
+import pytest
+import numpy as np
+from pathlib import Path
+
+from agilepy.core.SpatialIndex import SpatialIndex
+from agilepy.core.SourcesTable import SourcesTable
+
+class TestSpatialIndex:
+
+    testDataDir = Path(__file__).absolute().parent.joinpath("test_data")
+
+    def test_query(self):
+
+        rng = np.random.default_rng(0)
+        glon = rng.uniform(0, 360, 2000)
+        glat = np.degrees(np.arcsin(rng.uniform(-1, 1, 2000)))
+        glon[0] = 400
+        glat[1] = np.nan
+
+        spatialIndex = SpatialIndex(glon, glat)
+
+        assert 1998 == len(spatialIndex.rows)
+
+        centers = [(0, 0), (359.5, 10), (80, 89.9), (263.6, -2.8)]
+        table = SourcesTable([str(i) for i in range(2000)], glon, glat, glon, glon, [None] * 2000, None)
+
+        for (l, b), rows in zip(centers, spatialIndex.queryMany(centers, 10)):
+            dist = table.computeDistances(l, b)
+            expected = np.flatnonzero((dist >= 0) & (dist <= 10))
+            assert set(expected) <= set(rows)
+            assert np.all(dist[rows] <= 10 + 1e-6)
+
+    def test_in_memory(self, tmp_path):
+
+        catalogPath = tmp_path.joinpath("sources.txt")
+        shutil.copy(self.testDataDir.joinpath("sources.txt"), catalogPath)
+
+        table = SourcesTable.fromFile(str(catalogPath))
+
+        rows = table.getRowsWithin(78, 2, 5)
+        assert ["2AGLJ2021+4029", "2AGLJ2021+3654"] == list(table.names[rows])
+        assert table.getSpatialIndex() is table.getSpatialIndex()
+
+        # the index is built once per content of the file
+        assert SourcesTable.fromFile(str(catalogPath)).getSpatialIndex() is table.getSpatialIndex()
+
+        # nothing is written next to the catalog
+        assert [f.name for f in tmp_path.iterdir()] == ["sources.txt"]
+
+        # the index is built again when the catalog changes
+        with open(catalogPath, "a") as cat:
+            cat.write("\n")
+        changed = SourcesTable.fromFile(str(catalogPath))
+        assert changed.getSpatialIndex() is not table.getSpatialIndex()
+        assert list(rows) == list(changed.getRowsWithin(78, 2, 5))
@@ -0,0 +1,117 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+from time import time
+from pathlib import Path
+
+from agilepy.utils.ProcessWrapper import ProcessWrapper
+from agilepy.core.ToolScheduler import ToolScheduler
+from agilepy.core.CustomExceptions import ScienceToolDependencyCycle, ScienceToolErrorCodeReturned
+
+class CatTool(ProcessWrapper):
+    """
+    It waits 'sleep' seconds, then it writes its name and the content of its inputs into its product.
+    """
+    def __init__(self, exeName, agilepyLogger):
+        super().__init__(exeName, agilepyLogger)
+        self.isAgileTool = False
+
+    def getRequiredOptions(self):
+        return []
+
+    def configureTool(self, confDict=None, extraParams=None):
+        self.outputDir = extraParams["out_dir"]
+        outputFile = str(Path(self.outputDir).joinpath(extraParams["name"]))
+        self.inputs = extraParams["inputs"]
+        self.products = {
+            outputFile : ProcessWrapper.REQUIRED_PRODUCT
+        }
+        self.args = [extraParams["sleep"], "&&", "(", "echo", extraParams["name"], ";", "cat", *self.inputs, ")", ">", outputFile]
+
+class TestToolScheduler:
+
+    def getTool(self, logger, outDir, name, inputs=[], sleep=0):
+        tool = CatTool("sleep", logger)
+        tool.configureTool(extraParams={"out_dir": str(outDir), "name": name, "inputs": inputs, "sleep": sleep})
+        return tool
+
+    @pytest.mark.testlogsdir("core/test_logs/test_tool_scheduler_dependencies")
+    def test_dependencies(self, logger, tmp_path):
+
+        ctsTool = self.getTool(logger, tmp_path, "cts", sleep=0.5)
+        expTool = self.getTool(logger, tmp_path, "exp", sleep=0.5)
+        gasTool = self.getTool(logger, tmp_path, "gas", inputs=list(expTool.products))
+        intTool = self.getTool(logger, tmp_path, "int", inputs=list(expTool.products)+list(ctsTool.products))
+
+        scheduler = ToolScheduler(logger)
+        for tool in [intTool, gasTool, ctsTool, expTool]:
+            scheduler.addTool(tool)
+
+        dependencies = scheduler.getDependencies()
+        assert dependencies[ctsTool] == set()
+        assert dependencies[expTool] == set()
+        assert dependencies[gasTool] == {expTool}
+        assert dependencies[intTool] == {expTool, ctsTool}
+
+        start = time()
+        intProducts, gasProducts, ctsProducts, expProducts = scheduler.run()
+        # cts and exp run concurrently
+        assert time() - start < 0.95
+
+        assert Path(gasProducts[0]).read_text().split() == ["gas", "exp"]
+        assert Path(intProducts[0]).read_text().split() == ["int", "exp", "cts"]
+
+    @pytest.mark.testlogsdir("core/test_logs/test_tool_scheduler_cycle")
+    def test_cycle(self, logger, tmp_path):
+
+        met = self.getTool(logger, tmp_path, "met", inputs=[str(tmp_path.joinpath("ccl"))])
+        ccl = self.getTool(logger, tmp_path, "ccl", inputs=list(met.products))
+
+        scheduler = ToolScheduler(logger)
+        scheduler.addTool(met)
+        scheduler.addTool(ccl)
+
+        with pytest.raises(ScienceToolDependencyCycle):
+            scheduler.run()
+
+        assert not tmp_path.joinpath("met").exists()
+
+    @pytest.mark.testlogsdir("core/test_logs/test_tool_scheduler_failure")
+    def test_failure(self, logger, tmp_path):
+
+        cwt2 = self.getTool(logger, tmp_path, "cwt2", inputs=[str(tmp_path.joinpath("missing"))])
+        met = self.getTool(logger, tmp_path, "met", inputs=list(cwt2.products))
+
+        scheduler = ToolScheduler(logger)
+        scheduler.addTool(cwt2)
+        scheduler.addTool(met)
+
+        with pytest.raises(ScienceToolErrorCodeReturned):
+            scheduler.run()
+
+        assert not tmp_path.joinpath("met").exists()
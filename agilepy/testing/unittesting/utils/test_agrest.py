@@ -33,6 +33,38 @@ from agilepy.core.CustomExceptions import SSDCRestErrorDownload
 
 class TestAGRest():
 
+    @pytest.mark.testlogsdir("utils/test_logs/test_download_file_resume")
+    def test_download_file_resume(self, logger, ssdcserver, tmp_path):
+
+        body = os.urandom(300000)
+        ssdcserver.content = lambda path: body if path == "/GRIDFiles/a/b" else None
+        ssdcserver.drop = {"/GRIDFiles/a/b"}
+
+        agrest = AGRest(logger, baseUrl=ssdcserver.url)
+        outpath = tmp_path.joinpath("data.tar.gz")
+
+        assert agrest.downloadFile(f"{ssdcserver.url}/GRIDFiles/a/b", outpath, chunkSize=1024) == str(outpath)
+
+        assert outpath.read_bytes() == body
+        assert not outpath.with_name("data.tar.gz.part").exists()
+
+        # the second request resumes the interrupted one
+        assert len(ssdcserver.requests) == 2
+        assert ssdcserver.requests[0][1] is None
+        offset = int(ssdcserver.requests[1][1][len("bytes="):-1])
+        assert 0 < offset <= len(body) // 2
+
+        # a complete .part file is not downloaded again
+        outpath.with_name("data.tar.gz.part").write_bytes(body)
+        outpath.unlink()
+        agrest.downloadFile(f"{ssdcserver.url}/GRIDFiles/a/b", outpath)
+        assert outpath.read_bytes() == body
+        assert ssdcserver.requests[-1][1] == f"bytes={len(body)}-"
+
+        with pytest.raises(SSDCRestErrorDownload):
+            agrest.downloadFile(f"{ssdcserver.url}/GRIDFiles/c/d", tmp_path.joinpath("missing.tar.gz"))
+
+
     """
     def test_request_data(logger):
         tmin = 55513.0005
@@ -0,0 +1,61 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+import numpy as np
+
+from agilepy.utils.BooleanExpressionParser import BooleanParser, compileExpression
+
+class TestBooleanExpressionParser:
+
+    expression = '(name == "2AGLJ2021+3654" AND flux > 1e-7) OR sqrtts >= 10'
+
+    def test_compiled_expression(self):
+
+        variables, predicate = compileExpression(self.expression)
+
+        assert ("name", "flux", "sqrtts") == variables
+        assert compileExpression(self.expression)[1] is predicate
+
+        parser = BooleanParser(self.expression)
+        for values in [("2AGLJ2021+3654", 2e-7, 0), ("2AGLJ2021+3654", 2e-8, 0), ("2AGLJ0835-4514", 2e-8, 10)]:
+            variable_dict = dict(zip(variables, values))
+            assert parser.evaluate(variable_dict) == bool(predicate(variable_dict))
+
+    def test_compiled_expression_mask(self):
+
+        variables, predicate = compileExpression(self.expression)
+
+        columns = {
+            "name": np.array(["2AGLJ2021+3654", "2AGLJ2021+3654", "2AGLJ0835-4514", "2AGLJ0835-4514"]),
+            "flux": np.array([2e-7, 2e-8, 2e-8, 2e-7]),
+            "sqrtts": np.array([0, 0, 10, 5])
+        }
+
+        mask = predicate(columns)
+
+        assert [True, False, True, False] == list(mask)
@@ -0,0 +1,205 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import json
+import pytest
+import threading
+from time import sleep
+from pathlib import Path
+
+from agilepy.utils.ProcessWrapper import ProcessWrapper
+from agilepy.utils.Executors import SerialExecutor, LocalPoolExecutor, JobQueueExecutor, JobQueueWorker
+from agilepy.core.CustomExceptions import ScienceToolErrorCodeReturned, ScienceToolExecutionTimeout
+
+class WriteTool(ProcessWrapper):
+    """
+    It writes its name and the PID of the shell executing it into its product.
+    """
+    def __init__(self, exeName, agilepyLogger):
+        super().__init__(exeName, agilepyLogger)
+        self.isAgileTool = False
+
+    def getRequiredOptions(self):
+        return []
+
+    def configureTool(self, confDict=None, extraParams=None):
+        self.outputDir = extraParams["out_dir"]
+        outputFile = str(Path(self.outputDir).joinpath(extraParams["name"]))
+        self.products = {
+            outputFile : ProcessWrapper.REQUIRED_PRODUCT
+        }
+        self.args = [extraParams["name"], "$$", ">", outputFile, "&&", "echo", "done"]
+
+class TestExecutors:
+
+    def getTool(self, logger, outDir, name, executor, exeName="echo"):
+        tool = WriteTool(exeName, logger)
+        tool.configureTool(extraParams={"out_dir": str(outDir), "name": name})
+        tool.executor = executor
+        return tool
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_serial_executor")
+    def test_serial_executor(self, logger, tmp_path):
+
+        products = self.getTool(logger, tmp_path, "cts", SerialExecutor()).call()
+        assert Path(products[0]).read_text().split()[0] == "cts"
+
+        with pytest.raises(ScienceToolErrorCodeReturned):
+            self.getTool(logger, tmp_path, "exp", SerialExecutor(), exeName="false").call()
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_local_pool_executor")
+    def test_local_pool_executor(self, logger, tmp_path):
+
+        executor = LocalPoolExecutor(maxWorkers=2)
+
+        try:
+            tools = [self.getTool(logger, tmp_path, f"map{i}", executor) for i in range(4)]
+            for i, tool in enumerate(tools):
+                products = tool.call()
+                assert Path(products[0]).read_text().split()[0] == f"map{i}"
+                assert tool.lastExecution["exit_code"] == 0
+
+            with pytest.raises(ScienceToolErrorCodeReturned):
+                self.getTool(logger, tmp_path, "fail", executor, exeName="false").call()
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_job_queue_executor")
+    def test_job_queue_executor(self, logger, tmp_path):
+
+        queueDir = tmp_path.joinpath("queue")
+        executor = JobQueueExecutor(queueDir, pollInterval=0.05)
+
+        # a local stand-in of a worker daemon running on another node
+        worker = JobQueueWorker(queueDir, logger, pollInterval=0.05, tmpDir=tmp_path.joinpath("tmp"))
+        workerThread = threading.Thread(target=worker.run, kwargs={"maxJobs": 2})
+        workerThread.start()
+
+        try:
+            products = self.getTool(logger, tmp_path, "gas", executor).call()
+            assert Path(products[0]).read_text().split()[0] == "gas"
+
+            with pytest.raises(ScienceToolErrorCodeReturned):
+                self.getTool(logger, tmp_path, "fail", executor, exeName="false").call()
+        finally:
+            workerThread.join(timeout=10)
+
+        assert not workerThread.is_alive()
+        for subDir in (JobQueueExecutor.PENDING, JobQueueExecutor.RUNNING, JobQueueExecutor.DONE):
+            assert os.listdir(queueDir.joinpath(subDir)) == []
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_job_queue_timeout")
+    def test_job_queue_timeout(self, logger, tmp_path):
+
+        queueDir = tmp_path.joinpath("queue")
+        executor = JobQueueExecutor(queueDir, pollInterval=0.05, timeout=0.2)
+
+        # no worker is running
+        with pytest.raises(ScienceToolExecutionTimeout):
+            self.getTool(logger, tmp_path, "int", executor).call()
+
+        assert os.listdir(queueDir.joinpath(JobQueueExecutor.PENDING)) == []
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_job_queue_stale_job")
+    def test_job_queue_stale_job(self, logger, tmp_path, monkeypatch):
+
+        queueDir = tmp_path.joinpath("queue")
+        executor = JobQueueExecutor(queueDir, pollInterval=0.05, timeout=10, leaseTimeout=0.3, pickupTimeout=0.2, maxRequeues=1)
+
+        warnings = []
+        monkeypatch.setattr(logger, "warning", lambda msg, *args: warnings.append(msg))
+
+        # a worker dying after taking the job, twice
+        worker = JobQueueWorker(queueDir, logger, pollInterval=0.05, tmpDir=tmp_path.joinpath("tmp"))
+        def claimWithoutRunning():
+            for _ in range(2):
+                while worker.claimJob() is None:
+                    sleep(0.05)
+        workerThread = threading.Thread(target=claimWithoutRunning)
+
+        tool = self.getTool(logger, tmp_path, "stale", executor)
+
+        # the job is taken after the pickup timeout
+        threading.Timer(0.5, workerThread.start).start()
+
+        with pytest.raises(ScienceToolErrorCodeReturned, match="heartbeats"):
+            tool.call()
+
+        workerThread.join(timeout=10)
+
+        assert "has not been taken by any worker" in warnings[0]
+        assert "submitted again" in warnings[1]
+        for subDir in (JobQueueExecutor.PENDING, JobQueueExecutor.RUNNING, JobQueueExecutor.DONE):
+            assert os.listdir(queueDir.joinpath(subDir)) == []
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_job_queue_heartbeat")
+    def test_job_queue_heartbeat(self, logger, tmp_path):
+
+        queueDir = tmp_path.joinpath("queue")
+        executor = JobQueueExecutor(queueDir, pollInterval=0.05, leaseTimeout=0.5, maxRequeues=0)
+
+        # a job lasting longer than the lease timeout is not stale while its worker is alive
+        worker = JobQueueWorker(queueDir, logger, pollInterval=0.05, tmpDir=tmp_path.joinpath("tmp"), heartbeatInterval=0.1)
+        workerThread = threading.Thread(target=worker.run, kwargs={"maxJobs": 1})
+        workerThread.start()
+
+        try:
+            assert executor.execute(self.getTool(logger, tmp_path, "slow", executor), "sleep 1.5 && echo slow").strip() == "slow"
+        finally:
+            workerThread.join(timeout=10)
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_job_queue_job")
+    def test_job_queue_job(self, logger, tmp_path, monkeypatch):
+
+        monkeypatch.setenv("AGILE", str(tmp_path))
+        tmp_path.joinpath("share").mkdir()
+        tmp_path.joinpath("share", "AG_test.par").write_text("par file")
+
+        queueDir = tmp_path.joinpath("queue")
+        executor = JobQueueExecutor(queueDir, pollInterval=0.05, timeout=0.2)
+
+        tool = self.getTool(logger, tmp_path, "job", executor, exeName="AG_test")
+        tool.isAgileTool = True
+        with pytest.raises(ScienceToolExecutionTimeout):
+            executor.execute(tool, "true")
+
+        # the job is serialized with everything a worker on another host needs
+        JobQueueExecutor.writeJson(queueDir.joinpath(JobQueueExecutor.PENDING, "0_job.json"), {
+            "id": "0_job", "exeName": "AG_test", "command": "echo $AGILE", "parFile": str(tmp_path.joinpath("share", "AG_test.par")),
+            "env": {"AGILE": "/agile/on/the/worker"}, "outputDir": str(tmp_path), "products": [], "submitted": ""
+        })
+
+        worker = JobQueueWorker(queueDir, logger, pollInterval=0.05, tmpDir=tmp_path.joinpath("tmp"))
+        assert worker.runOnce()
+        assert not worker.runOnce()
+
+        with open(queueDir.joinpath(JobQueueExecutor.DONE, "0_job.json")) as rf:
+            result = json.load(rf)
+        assert result["exit_code"] == 0
+        assert result["stdout"].strip() == "/agile/on/the/worker"
+        assert list(tmp_path.joinpath("tmp").iterdir()) == []
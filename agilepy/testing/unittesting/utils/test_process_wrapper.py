@@ -0,0 +1,191 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import pytest
+import asyncio
+from pathlib import Path
+
+from agilepy.utils.RunLog import RunLog
+from agilepy.utils.ProcessWrapper import ProcessWrapper
+from agilepy.core.CustomExceptions import ScienceToolErrorCodeReturned
+
+class EchoTool(ProcessWrapper):
+    """
+    It waits 'sleep' seconds, then it prints 'lines' lines and it writes its name into its product.
+    """
+    def __init__(self, exeName, agilepyLogger):
+        super().__init__(exeName, agilepyLogger)
+        self.isAgileTool = False
+
+    def getRequiredOptions(self):
+        return []
+
+    def configureTool(self, confDict=None, extraParams=None):
+        self.outputDir = extraParams["out_dir"]
+        outputFile = str(Path(self.outputDir).joinpath(extraParams["name"]))
+        self.products = {
+            outputFile : ProcessWrapper.REQUIRED_PRODUCT
+        }
+        self.args = [extraParams["sleep"], "&&", "seq", extraParams.get("lines", 1), "&&", "echo", extraParams["name"], ">", outputFile]
+
+class TestProcessWrapper:
+
+    def getTool(self, logger, outDir, name, sleep=0, lines=1):
+        tool = EchoTool("sleep", logger)
+        tool.configureTool(extraParams={"out_dir": str(outDir), "name": name, "sleep": sleep, "lines": lines})
+        return tool
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_call_async")
+    def test_call_async(self, logger, tmp_path):
+
+        maxConcurrentCalls = ProcessWrapper.maxConcurrentCalls
+        ProcessWrapper.setMaxConcurrentCalls(2)
+
+        try:
+            tools = [self.getTool(logger, tmp_path, f"tool{i}", sleep=0.5) for i in range(4)]
+
+            # each child writes the times it starts and ends sleeping
+            for i, tool in enumerate(tools):
+                stampsFile = str(tmp_path.joinpath(f"tool{i}.stamps"))
+                tool.exeName = "date"
+                tool.args = ["+%s.%N", ">", stampsFile, "&&", "sleep"] + tool.args + ["&&", "date", "+%s.%N", ">>", stampsFile]
+
+            async def runAll():
+                return await asyncio.gather(*[tool.call_async() for tool in tools])
+
+            allProducts = asyncio.run(runAll())
+
+            # two tools at a time: the maximum number of children running at the same time
+            events = []
+            for i in range(4):
+                start, end = map(float, tmp_path.joinpath(f"tool{i}.stamps").read_text().split())
+                events += [(start, 1), (end, -1)]
+            running = 0
+            maxRunning = 0
+            for _, change in sorted(events):
+                running += change
+                maxRunning = max(maxRunning, running)
+            assert maxRunning == 2
+
+            for i, products in enumerate(allProducts):
+                assert products == [str(tmp_path.joinpath(f"tool{i}"))]
+                assert Path(products[0]).read_text().strip() == f"tool{i}"
+        finally:
+            ProcessWrapper.setMaxConcurrentCalls(maxConcurrentCalls)
+
+    def test_run_process_exit_code(self):
+
+        assert ProcessWrapper.runProcess("exit 3")["exit_code"] == 3
+        # a killed process returns -signal, as Popen.returncode
+        assert ProcessWrapper.runProcess("kill -9 $$")["exit_code"] == -9
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_call_async_output")
+    def test_call_async_output(self, logger, tmp_path):
+
+        outputTailLines = ProcessWrapper.outputTailLines
+        ProcessWrapper.outputTailLines = 10
+
+        try:
+            tool = self.getTool(logger, tmp_path, "seq", lines=100)
+            stdout = asyncio.run(tool.executeCommandAsync(tool.exeName + " " + " ".join(map(str, tool.args))))
+            # only the last lines are kept
+            assert stdout.split() == [str(i) for i in range(91, 101)]
+
+            tool = self.getTool(logger, tmp_path, "fail")
+            with pytest.raises(ScienceToolErrorCodeReturned):
+                asyncio.run(tool.executeCommandAsync("ls /not/existing/path"))
+        finally:
+            ProcessWrapper.outputTailLines = outputTailLines
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_par_file_copy")
+    def test_par_file_copy(self, logger, tmp_path, monkeypatch):
+
+        tmp_path.joinpath("share").mkdir()
+        tmp_path.joinpath("share", "AG_test.par").write_text("par file")
+        monkeypatch.setenv("AGILE", str(tmp_path))
+
+        tool = self.getTool(logger, tmp_path, "AG_test")
+        tool.exeName = "AG_test"
+        tool.tmpDir = tmp_path.joinpath("tmp")
+        tool.isAgileTool = True
+
+        tempDir = tool._copyParFile()
+        assert tempDir.joinpath("AG_test.par").read_text() == "par file"
+
+        tool._removeTempDir(tempDir)
+        assert not tempDir.exists()
+
+        tool.exeName = "AG_missing"
+        with pytest.raises(ScienceToolErrorCodeReturned):
+            tool._copyParFile()
+        assert list(tool.tmpDir.iterdir()) == []
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_run_log")
+    def test_run_log(self, logger, tmp_path):
+
+        runLog = RunLog(tmp_path.joinpath(RunLog.FILENAME))
+
+        tool = self.getTool(logger, tmp_path, "cts", sleep=0.2)
+        tool.runLog = runLog
+        products = tool.call()
+
+        asyncTool = self.getTool(logger, tmp_path, "exp", sleep=0.1)
+        asyncTool.runLog = runLog
+        asyncio.run(asyncTool.call_async())
+
+        failingTool = self.getTool(logger, tmp_path, "gas", sleep="not_a_number")
+        failingTool.runLog = runLog
+        with pytest.raises(ScienceToolErrorCodeReturned):
+            failingTool.call()
+
+        records = runLog.read()
+        assert [record["tool"] for record in records] == ["sleep", "sleep", "sleep"]
+        assert [record["status"] for record in records] == ["done", "done", "failed"]
+
+        record = records[0]
+        assert record["wall_time"] >= 0.2
+        assert record["exit_code"] == 0
+        assert record["user_time"] >= 0 and record["sys_time"] >= 0
+        assert record["max_rss_kb"] > 0
+        assert record["products"] == {products[0]: os.path.getsize(products[0])}
+        assert len(record["args_hash"]) == 64
+
+        # the resources of an asynchronous call are not measured
+        assert records[1]["exit_code"] == 0
+        assert records[1]["user_time"] is None and records[1]["sys_time"] is None and records[1]["max_rss_kb"] is None
+
+        assert records[2]["exit_code"] != 0
+        assert records[2]["products"] == {}
+
+        assert runLog.getSlowest(1)[0]["args_hash"] == record["args_hash"]
+
+        summary = runLog.getSummary()
+        assert len(summary) == 1
+        assert summary[0]["calls"] == 3
+        assert summary[0]["failed"] == 1
+
@@ -0,0 +1,118 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import pytest
+from pathlib import Path
+
+from agilepy.utils.ProcessWrapper import ProcessWrapper
+from agilepy.utils.ProductCache import ProductCache
+
+class CountingTool(ProcessWrapper):
+    """
+    It copies its input into its product and it appends a line to a counter file every time it runs.
+    """
+    def __init__(self, exeName, agilepyLogger):
+        super().__init__(exeName, agilepyLogger)
+        self.isAgileTool = False
+
+    def getRequiredOptions(self):
+        return []
+
+    def configureTool(self, confDict=None, extraParams=None):
+        self.outputDir = extraParams["out_dir"]
+        outputFile = str(Path(self.outputDir).joinpath("product.txt"))
+        self.inputs = [extraParams["input_file"]]
+        self.products = {
+            outputFile : ProcessWrapper.REQUIRED_PRODUCT
+        }
+        self.args = [extraParams["counter_file"], "&&", "cat", extraParams["input_file"], ">", outputFile]
+
+class TestProductCache:
+
+    def getTool(self, logger, cache, outDir, inputFile, counterFile):
+        tool = CountingTool("echo run >>", logger)
+        tool.configureTool(extraParams={"out_dir": str(outDir), "input_file": str(inputFile), "counter_file": str(counterFile)})
+        tool.productCache = cache
+        return tool
+
+    def countRuns(self, counterFile):
+        return len(Path(counterFile).read_text().splitlines())
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_product_cache_hit")
+    def test_hit_and_miss(self, logger, tmp_path):
+
+        cache = ProductCache(tmp_path.joinpath("cache"), agilepyLogger=logger)
+        inputFile = tmp_path.joinpath("input.txt")
+        inputFile.write_text("sky map")
+        counterFile = tmp_path.joinpath("counter.txt")
+
+        products = self.getTool(logger, cache, tmp_path.joinpath("0"), inputFile, counterFile).call()
+        assert self.countRuns(counterFile) == 1
+
+        # same invocation, different output directory
+        products = self.getTool(logger, cache, tmp_path.joinpath("1"), inputFile, counterFile).call()
+        assert self.countRuns(counterFile) == 1
+        assert products == [str(tmp_path.joinpath("1", "product.txt"))]
+        assert Path(products[0]).read_text().strip() == "sky map"
+
+        # the input file changes
+        inputFile.write_text("another sky map")
+        products = self.getTool(logger, cache, tmp_path.joinpath("2"), inputFile, counterFile).call()
+        assert self.countRuns(counterFile) == 2
+        assert Path(products[0]).read_text().strip() == "another sky map"
+
+        statistics = cache.getStatistics()
+        assert statistics["hits"] == 1
+        assert statistics["misses"] == 2
+        assert statistics["stores"] == 2
+        assert statistics["entries"] == 2
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_product_cache_eviction")
+    def test_lru_eviction(self, logger, tmp_path):
+
+        cache = ProductCache(tmp_path.joinpath("cache"), maxSize=250, agilepyLogger=logger)
+        counterFile = tmp_path.joinpath("counter.txt")
+
+        tools = []
+        for i in range(3):
+            inputFile = tmp_path.joinpath(f"input{i}.txt")
+            inputFile.write_text(str(i)*100)
+            tools.append((inputFile, self.getTool(logger, cache, tmp_path.joinpath(f"{i}"), inputFile, counterFile)))
+
+        tools[0][1].call()
+        tools[1][1].call()
+        os.utime(cache.cacheDir.joinpath(cache.getKey(tools[0][1])), (0, 0))
+        os.utime(cache.cacheDir.joinpath(cache.getKey(tools[1][1])), (1, 1))
+        tools[2][1].call()
+
+        statistics = cache.getStatistics()
+        assert statistics["evictions"] == 1
+        assert statistics["entries"] == 2
+        assert statistics["size"] <= 250
+        assert not cache.cacheDir.joinpath(cache.getKey(tools[0][1])).exists()
+        assert cache.cacheDir.joinpath(cache.getKey(tools[1][1])).exists()
@@ -0,0 +1,72 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pytest
+
+from agilepy.utils.RunLog import RunLog
+
+class TestRunLog:
+
+    def getRecord(self, tool, wallTime, status="done"):
+        return {"tool": tool, "status": status, "wall_time": wallTime, "user_time": wallTime / 2, "sys_time": 0.0, "max_rss_kb": int(wallTime * 1000)}
+
+    @pytest.mark.testlogsdir("utils/test_logs/test_run_log_summary")
+    def test_summary(self, logger, tmp_path):
+
+        runLog = RunLog(tmp_path.joinpath("analysis", RunLog.FILENAME))
+
+        assert runLog.read() == []
+
+        runLog.append(self.getRecord("AG_ctsmapgen", 1.0))
+        runLog.append(self.getRecord("AG_expmapgen", 10.0))
+        runLog.append(self.getRecord("AG_expmapgen", 20.0))
+        runLog.append(self.getRecord("AG_multi", 5.0, status="failed"))
+        runLog.append(self.getRecord("AG_multi", 0.0, status="cached"))
+
+        # a line truncated by a killed analysis is skipped
+        with open(runLog.runLogFile, "a") as rl:
+            rl.write('{"tool": "AG_gasm')
+
+        assert len(runLog.read()) == 5
+
+        assert [record["wall_time"] for record in runLog.getSlowest(2)] == [20.0, 10.0]
+
+        summary = runLog.getSummary()
+        assert [toolSummary["tool"] for toolSummary in summary] == ["AG_expmapgen", "AG_multi", "AG_ctsmapgen"]
+
+        expSummary = summary[0]
+        assert expSummary["calls"] == 2
+        assert expSummary["wall_time"] == 30.0
+        assert expSummary["mean_wall_time"] == 15.0
+        assert expSummary["max_wall_time"] == 20.0
+        assert expSummary["cpu_time"] == 15.0
+        assert expSummary["max_rss_kb"] == 20000
+
+        assert summary[1]["failed"] == 1
+        assert summary[1]["cached"] == 1
+
+        assert len(runLog.getSummary(topN=1)) == 1
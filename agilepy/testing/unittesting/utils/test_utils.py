@@ -28,6 +28,7 @@
 import os
 import pytest
 import logging
+import numpy as np
 from time import sleep
 from pathlib import Path
 from datetime import datetime
@@ -175,6 +176,27 @@ class TestAgilepyUtils:
         # https://tools.ssdc.asi.it/conversionTools
         # https://heasarc.gsfc.nasa.gov/cgi-bin/Tools/xTime/xTime.pl?time_in_i=&time_in_c=&time_in_d=&time_in_j=&time_in_m=58871.45616898&time_in_sf=&time_in_wf=&time_in_sl=&time_in_sni=&time_in_snu=&time_in_s=&time_in_h=&time_in_sz=&time_in_ss=&time_in_sn=&timesys_in=u&timesys_out=u&apply_clock_offset=yes
     """
+    def test_astro_utils_distance_array(self):
+
+        l1 = np.array([263.55, 80, 400, 10, 0])
+        b1 = np.array([-2.78, 0, 0, 95, 89.9])
+        l2 = np.array([250, 80, 80, 10, 180])
+        b2 = np.array([30, 0, 0, 0, -89.9])
+
+        dist = AstroUtils.distance_array(l1, b1, l2, b2)
+
+        assert dist.shape == (5,)
+        for i in range(5):
+            assert AstroUtils.distance(l1[i], b1[i], l2[i], b2[i]) == pytest.approx(dist[i], abs=1e-9)
+        assert -2 == dist[2]
+        assert -2 == dist[3]
+
+        matrix = AstroUtils.distance_array(l1[:, None], b1[:, None], l2[None, :], b2[None, :])
+        assert matrix.shape == (5, 5)
+        assert AstroUtils.distance(l1[1], b1[1], l2[0], b2[0]) == pytest.approx(matrix[1, 0], abs=1e-9)
+
+        assert AstroUtils.distance(263.55, -2.78, 250, 30) == pytest.approx(float(AstroUtils.distance_array(263.55, -2.78, 250, 30)), abs=1e-9)
+
     def test_astro_utils_time_mjd_to_agile_seconds(self):
         sec_tolerance = 0.001
         tt = AstroUtils.time_mjd_to_agile_seconds(58871.45616898) # 506861812.99987227
@@ -14,16 +14,35 @@ from agilepy.core.CustomExceptions import SSDCRestErrorDownload
 
 class AGRest:
 
-    def __init__(self, logger):
-        self.logger = logger
-
-        self.retry_strategy = Retry(
-            total=5,
-            status_forcelist=[429, 500, 502, 503, 504],
-            method_whitelist=["HEAD", "GET", "OPTIONS"],
-            backoff_factor=3)
+    SSDC_URL = "https://tools.ssdc.asi.it/AgileData/rest"
 
-        self.adapter = HTTPAdapter(max_retries=self.retry_strategy)
+    def __init__(self, logger, baseUrl=SSDC_URL, poolSize=10, downloadAttempts=5):
+        """
+        Args:
+            logger: the logger.
+            baseUrl (str): the url of the SSDC rest service.
+            poolSize (int): the maximum number of connections kept open, i.e. of concurrent downloads.
+            downloadAttempts (int): the number of times an interrupted download is resumed before giving up.
+        """
+        self.logger = logger
+        self.baseUrl = baseUrl.rstrip("/")
+        self.downloadAttempts = downloadAttempts
+
+        retryMethods = ["HEAD", "GET", "OPTIONS"]
+        try:
+            self.retry_strategy = Retry(
+                total=5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=retryMethods,
+                backoff_factor=3)
+        except TypeError:
+            # urllib3 < 1.26
+            self.retry_strategy = Retry(
+                total=5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                method_whitelist=retryMethods,
+                backoff_factor=3)
+        self.adapter = HTTPAdapter(max_retries=self.retry_strategy, pool_connections=poolSize, pool_maxsize=poolSize)
         self.http = requests.Session()
         self.http.mount("https://", self.adapter)
         self.http.mount("http://", self.adapter)
@@ -39,7 +58,7 @@ class AGRest:
             tmax(dateformat fits type str)
         """
 
-        api_url = f"https://tools.ssdc.asi.it/AgileData/rest/publicdatacoverage"
+        api_url = f"{self.baseUrl}/publicdatacoverage"
 
         self.logger.info( f"Getting data coverage to SSDC server..")
 
@@ -85,7 +104,7 @@ class AGRest:
         tmin_utc = AstroUtils.time_mjd_to_fits(tmin)
         tmax_utc = AstroUtils.time_mjd_to_fits(tmax)
 
-        api_url = f"https://tools.ssdc.asi.it/AgileData/rest/GRIDList/{tmin_utc}/{tmax_utc}"
+        api_url = f"{self.baseUrl}/GRIDList/{tmin_utc}/{tmax_utc}"
 
         self.logger.info( f"Downloading filelist to download ({tmin},{tmax}) ({tmin_utc}, {tmax_utc}) from {api_url}..")
 
@@ -110,7 +129,7 @@ class AGRest:
 
         return json_data["AgileFiles"]
 
-    def gridFiles(self, tmin, tmax):
+    def gridFiles(self, tmin, tmax, outpath=None):
         """
         https://tools.ssdc.asi.it/AgileData/rest/GRIDFiles/2009-10-20T00:00:00/2009-11-10T00:00:00
 
@@ -124,27 +143,23 @@ class AGRest:
                 * 3 log files: 03/01/21, 04/01/21, 05/01/21
             * tmin=14/01/21 tmax=18/01/21
                 * 2 evt files: 01/01/21 to 15/01/21 and 15/01/21 to 31/01/21
-                * 5 log files: 14/01/21, 15/01/21, 16/01/21, 17/01/21, 18/01/21         
+                * 5 log files: 14/01/21, 15/01/21, 16/01/21, 17/01/21, 18/01/21
+
+        If outpath is given, an interrupted download of the same interval into the same outpath is resumed (see downloadFile()).
         """
         tmin_utc = AstroUtils.time_mjd_to_fits(tmin)
         tmax_utc = AstroUtils.time_mjd_to_fits(tmax)
 
-        api_url = f"https://tools.ssdc.asi.it/AgileData/rest/GRIDFiles/{tmin_utc}/{tmax_utc}"
+        api_url = f"{self.baseUrl}/GRIDFiles/{tmin_utc}/{tmax_utc}"
 
         self.logger.info( f"Downloading data ({tmin},{tmax}) from {api_url}..")
 
-        start = time() 
+        if outpath is None:
+            outpath = f"/tmp/agile_{str(uuid.uuid4())}.tar.gz"
 
-        response = self.http.get(api_url, stream=True)
-
-        if response.status_code != 200:
-            raise SSDCRestErrorDownload(f"HTTP error. Failed to fetch data from SSDC: {response.status_code} - {response.text}")
+        start = time() 
 
-        outpath = f"/tmp/agile_{str(uuid.uuid4())}.tar.gz"
-        with open(outpath, "wb") as f:
-            # Writing chunks for large downloads
-            for chunk in tqdm(response.iter_content(chunk_size=1024*1024*10)):
-                f.write(chunk)
+        self.downloadFile(api_url, outpath)
 
         end = time() - start
 
@@ -152,10 +167,88 @@ class AGRest:
 
         self.logger.info( f"Took {end} seconds. Downloaded {outpath_size} bytes.")
 
-        if not Path(outpath).is_file():
-            raise FileNotFoundError
-
         if outpath_size == 0:
             self.logger.warning( f"The downloaded data {outpath} is empty.")
 
-        return outpath
+        return str(outpath)
+
+    def downloadFile(self, api_url, outpath, chunkSize=1024*1024*10):
+        """
+        It downloads api_url into outpath. The data is written into outpath.part, which is renamed to outpath
+        when the download is completed: if the connection drops, the download is resumed (HTTP Range request)
+        from the end of the .part file, also by a later call with the same outpath.
+
+        Raises:
+            SSDCRestErrorDownload: if the server replies with an error or the download cannot be completed.
+        """
+        outpath = Path(outpath)
+        partPath = outpath.with_name(outpath.name + ".part")
+
+        for attempt in range(self.downloadAttempts):
+
+            offset = partPath.stat().st_size if partPath.is_file() else 0
+
+            headers = {"Range": f"bytes={offset}-"} if offset > 0 else {}
+
+            try:
+                with self.http.get(api_url, stream=True, headers=headers) as response:
+
+                    if response.status_code == 416 and AGRest._getTotalSize(response) == offset:
+                        # the .part file is already complete
+                        break
+
+                    if response.status_code == 416:
+                        self.logger.warning( f"The partial download {partPath} is not valid, downloading {api_url} again.")
+                        partPath.unlink()
+                        continue
+
+                    if response.status_code not in [200, 206]:
+                        raise SSDCRestErrorDownload(f"HTTP error. Failed to fetch data from SSDC: {response.status_code} - {response.text}")
+
+                    # the server may ignore the Range header and send the whole file
+                    if response.status_code == 200:
+                        offset = 0
+                    elif offset > 0:
+                        self.logger.info( f"Resuming the download of {api_url} from byte {offset}")
+
+                    with open(partPath, "ab" if offset > 0 else "wb") as f:
+                        for chunk in tqdm(response.iter_content(chunk_size=chunkSize), disable=None):
+                            f.write(chunk)
+
+                    expectedSize = AGRest._getTotalSize(response)
+
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                self.logger.warning( f"The download of {api_url} has been interrupted (attempt {attempt+1}/{self.downloadAttempts}): {e}")
+                continue
+
+            if expectedSize is None or partPath.stat().st_size == expectedSize:
+                break
+
+            self.logger.warning( f"The download of {api_url} is incomplete (attempt {attempt+1}/{self.downloadAttempts}): " \
+                                 f"{partPath.stat().st_size} of {expectedSize} bytes.")
+
+        else:
+            raise SSDCRestErrorDownload(f"Failed to download {api_url} after {self.downloadAttempts} attempts.")
+
+        os.replace(partPath, outpath)
+
+        return str(outpath)
+
+    @staticmethod
+    def _getTotalSize(response):
+        """
+        It returns the size of the whole file from the Content-Range (e.g. "bytes 100-199/200" or "bytes */200")
+        or the Content-Length header, None if it is unknown.
+        """
+        contentRange = response.headers.get("Content-Range")
+
+        if contentRange is not None:
+            total = contentRange.rsplit("/", 1)[-1]
+            return int(total) if total.isdigit() else None
+
+        contentLength = response.headers.get("Content-Length")
+
+        if response.status_code == 200 and contentLength is not None and contentLength.isdigit():
+            return int(contentLength)
+
+        return None
@@ -67,6 +67,43 @@ class AstroUtils:
             except Exception as e:
 
                 return math.sqrt(d1 * d1 + d2 * d2)
+
+    @staticmethod
+    def distance_array(l1, b1, l2, b2):
+        """
+        Computes the angular distance between galactic coordinates, element-wise. It is the array
+        version of AstroUtils.distance: the inputs are broadcast against each other (e.g. l1[:, None], b1[:, None]
+        against l2[None, :], b2[None, :] gives the matrix of the distances between two sets of coordinates).
+
+        Args:
+            l1 (float or np.ndarray): longitude of first coordinates
+            b1 (float or np.ndarray): latitude of first coordinates
+            l2 (float or np.ndarray): longitude of second coordinates
+            b2 (float or np.ndarray): latitude of second coordinates
+
+        Returns:
+            a np.ndarray with the angular distances, -2 where a coordinate is out of range.
+        """
+        l1, b1, l2, b2 = np.broadcast_arrays(*[np.asarray(c, dtype=np.float64) for c in (l1, b1, l2, b2)])
+
+        outOfRange = (l1 < 0) | (l1 > 360) | (l2 < 0) | (l2 > 360) | \
+                     (b1 < -90) | (b1 > 90) | (b2 < -90) | (b2 > 90)
+
+        d1 = b1 - b2
+        d2 = l1 - l2
+
+        b11 = np.pi / 2.0 - (b1 * np.pi / 180.0)
+        b21 = np.pi / 2.0 - (b2 * np.pi / 180.0)
+        m4 = np.cos(b11) * np.cos(b21) + np.sin(b11) * np.sin(b21) * np.cos(d2 * np.pi / 180.0)
+        m4 = np.minimum(m4, 1)
+
+        # acos is not defined below -1: the euclidean distance is returned instead, as AstroUtils.distance does
+        acosDefined = m4 >= -1
+
+        with np.errstate(invalid="ignore"):
+            dist = np.where(acosDefined, np.arccos(m4) * 180.0 / np.pi, np.sqrt(d1 * d1 + d2 * d2))
+
+        return np.where(outOfRange, -2.0, dist)
     
     @staticmethod
     def evaluate_erglog_from_flux(E, flux, E1, E2, alpha):
@@ -12,6 +12,12 @@
 #from boolparser import *
 #p = BooleanParser('<expression text>')
 #p.evaluate(variable_dict) # variable_dict is a dictionary providing values for variables that appear in <expression text>
+#f = p.compile()
+#f(variable_dict) # variable_dict values can also be numpy arrays, the result is then a boolean mask
+
+import operator
+import numpy as np
+from functools import lru_cache
 
 class TokenType:
 	NUM, STR, VAR, GT, GTE, LT, LTE, EQ, NEQ, LP, RP, AND, OR = range(13)
@@ -228,3 +234,50 @@ class BooleanParser:
 			return left or right
 		else:
 			raise Exception('Unexpected type ' + str(treeNode.tokenType))
+
+	def compile(self):
+		"""
+		It converts the expression tree into a chain of python closures, that can be called many times
+		without walking the tree again. The returned function accepts a dictionary of scalars or of numpy arrays
+		(the latter returns a boolean mask).
+		"""
+		return self.compileRecursive(self.root)
+
+	def compileRecursive(self, treeNode):
+
+		if treeNode.tokenType == TokenType.NUM or treeNode.tokenType == TokenType.STR:
+			value = treeNode.value
+			return lambda variable_dict: value
+
+		if treeNode.tokenType == TokenType.VAR:
+			name = treeNode.value
+			return lambda variable_dict: variable_dict.get(name)
+
+		if treeNode.tokenType not in COMPILED_OPERATORS:
+			raise Exception('Unexpected type ' + str(treeNode.tokenType))
+
+		op = COMPILED_OPERATORS[treeNode.tokenType]
+		left = self.compileRecursive(treeNode.left)
+		right = self.compileRecursive(treeNode.right)
+
+		return lambda variable_dict: op(left(variable_dict), right(variable_dict))
+
+
+COMPILED_OPERATORS = {
+	TokenType.GT: operator.gt,
+	TokenType.GTE: operator.ge,
+	TokenType.LT: operator.lt,
+	TokenType.LTE: operator.le,
+	TokenType.EQ: operator.eq,
+	TokenType.NEQ: operator.ne,
+	TokenType.AND: np.logical_and,
+	TokenType.OR: np.logical_or
+}
+
+@lru_cache(maxsize=256)
+def compileExpression(exp):
+	"""
+	It parses and compiles an expression once, returning the names of its variables and the compiled predicate.
+	"""
+	parser = BooleanParser(exp)
+	return tuple(parser.getVARTokens()), parser.compile()
@@ -0,0 +1,378 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import json
+import shutil
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from time import time, sleep, time_ns
+from uuid import uuid4
+from pathlib import Path
+from datetime import datetime
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+
+from agilepy.core.AgilepyLogger import AgilepyLogger
+from agilepy.utils.ProcessWrapper import ProcessWrapper
+from agilepy.core.CustomExceptions import ScienceToolExecutionTimeout
+
+class Executor(ABC):
+    """
+    The strategy used by the science tools (see ProcessWrapper.executor) to execute their commands.
+    An executor can be shared by several tools and analyses.
+    """
+
+    @abstractmethod
+    def execute(self, tool, command):
+        """
+        It executes the command of the tool.
+
+        Returns:
+            The stdout of the tool (see ProcessWrapper.handleExecution()).
+        """
+        pass
+
+    def shutdown(self):
+        """
+        It releases the resources of the executor.
+        """
+        pass
+
+class SerialExecutor(Executor):
+    """
+    It executes the commands in the calling thread, on the local host (the default behaviour of the science tools).
+    """
+
+    def execute(self, tool, command):
+        return tool.executeLocally(command)
+
+class LocalPoolExecutor(Executor):
+    """
+    It executes the commands in a pool of local processes: at most ``maxWorkers`` commands run at the same time,
+    whatever the number of analyses (or threads) sharing the executor.
+    """
+
+    def __init__(self, maxWorkers=None):
+        # the analyses can use threads: the worker processes are not forked from the analysis process
+        self.pool = ProcessPoolExecutor(max_workers=maxWorkers, mp_context=multiprocessing.get_context("forkserver"))
+
+    def execute(self, tool, command):
+        tempDir = tool._copyParFile()
+        try:
+            execution = self.pool.submit(ProcessWrapper.runProcess, command).result()
+        finally:
+            tool._removeTempDir(tempDir)
+        return tool.handleExecution(execution)
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+class JobQueueExecutor(Executor):
+    """
+    It writes the commands as jobs into a queue directory, where they are executed by JobQueueWorker daemons.
+    The daemons can run on other hosts sharing the filesystem with the analysis: the products are written
+    into the analysis output directory.
+
+    A job is a json file with the command, the par file of the tool, the AGILE environment variables and the expected products.
+    It moves from the 'pending' directory to the 'running' directory when a worker takes it; the worker writes the result
+    (exit code, stdout, stderr and resources usage) into the 'done' directory.
+
+    While a job is running, its worker touches the job file (heartbeat). If the job file is not touched for leaseTimeout
+    seconds the worker is considered dead: the job is moved back to the 'pending' directory (at most maxRequeues times)
+    and then it fails. A warning is logged if no worker takes a pending job within pickupTimeout seconds.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+
+    def __init__(self, queueDir, pollInterval=1.0, timeout=None, leaseTimeout=60.0, pickupTimeout=60.0, maxRequeues=1):
+        """
+        Args:
+            queueDir (str): the queue directory.
+            pollInterval (float, optional): the interval (seconds) between two checks of the job result. It defaults to 1.
+            timeout (float, optional): the maximum time (seconds) to wait for a job result. It defaults to None (no timeout).
+            leaseTimeout (float, optional): the time (seconds) without heartbeats after which a running job is stale. It defaults to 60.
+            pickupTimeout (float, optional): the time (seconds) after which a warning is logged if no worker has taken the job. It defaults to 60.
+            maxRequeues (int, optional): the number of times a stale job is moved back to the pending jobs before failing. It defaults to 1.
+        """
+        self.queueDir = Path(queueDir)
+        self.pollInterval = pollInterval
+        self.timeout = timeout
+        self.leaseTimeout = leaseTimeout
+        self.pickupTimeout = pickupTimeout
+        self.maxRequeues = maxRequeues
+        for subDir in (JobQueueExecutor.PENDING, JobQueueExecutor.RUNNING, JobQueueExecutor.DONE):
+            self.queueDir.joinpath(subDir).mkdir(parents=True, exist_ok=True)
+
+    def execute(self, tool, command):
+
+        # the job names are sorted by submission time
+        jobId = f"{time_ns()}_{uuid4().hex[:8]}"
+
+        job = {
+            "id": jobId,
+            "exeName": tool.exeName,
+            "command": command,
+            "parFile": os.path.join(os.environ["AGILE"], "share", tool.exeName+".par") if tool.isAgileTool else None,
+            "env": {var: os.environ[var] for var in ("AGILE", "PFILES") if var in os.environ},
+            "outputDir": str(tool.outputDir),
+            "products": [str(product) for product in tool.products],
+            "submitted": datetime.now().isoformat()
+        }
+
+        pendingPath = self.queueDir.joinpath(JobQueueExecutor.PENDING, jobId+".json")
+        runningPath = self.queueDir.joinpath(JobQueueExecutor.RUNNING, jobId+".json")
+        resultPath = self.queueDir.joinpath(JobQueueExecutor.DONE, jobId+".json")
+
+        JobQueueExecutor.writeJson(pendingPath, job)
+
+        tool.logger.debug(f"Job {jobId} submitted to {self.queueDir}")
+
+        startTime = time()
+        pendingSince = startTime
+        pickupWarned = False
+        requeues = 0
+        # the last modification time of the running job and the (local) time it has been seen changing:
+        # the clocks of the workers hosts are not compared with the local one
+        lease = None
+
+        while not resultPath.is_file():
+
+            now = time()
+
+            if self.timeout is not None and now - startTime > self.timeout:
+                try:
+                    # the job is withdrawn if no worker has taken it yet
+                    os.remove(pendingPath)
+                except FileNotFoundError:
+                    pass
+                raise ScienceToolExecutionTimeout(f"The job {jobId} ({tool.exeName}) has not been completed in {self.timeout} seconds")
+
+            try:
+                heartbeat = os.stat(runningPath).st_mtime_ns
+            except FileNotFoundError:
+                heartbeat = None
+                lease = None
+
+            if heartbeat is None:
+                if not pickupWarned and now - pendingSince > self.pickupTimeout and pendingPath.is_file():
+                    tool.logger.warning(f"The job {jobId} ({tool.exeName}) has not been taken by any worker in {self.pickupTimeout} seconds: is a JobQueueWorker serving {self.queueDir}?")
+                    pickupWarned = True
+
+            elif lease is None or lease[0] != heartbeat:
+                lease = (heartbeat, now)
+
+            elif now - lease[1] > self.leaseTimeout:
+                lease = None
+                if requeues < self.maxRequeues:
+                    try:
+                        os.rename(runningPath, pendingPath)
+                    except FileNotFoundError:
+                        # the job has just been completed
+                        continue
+                    requeues += 1
+                    pendingSince = now
+                    pickupWarned = False
+                    tool.logger.warning(f"The worker of the job {jobId} ({tool.exeName}) has not sent heartbeats for {self.leaseTimeout} seconds: the job is submitted again")
+                else:
+                    try:
+                        os.remove(runningPath)
+                    except FileNotFoundError:
+                        continue
+                    execution = {"exit_code": -1, "stdout": "", "stderr": f"The worker of the job {jobId} has not sent heartbeats for {self.leaseTimeout} seconds",
+                                 "user_time": None, "sys_time": None, "max_rss_kb": None}
+                    return tool.handleExecution(execution)
+
+            sleep(self.pollInterval)
+
+        with open(resultPath) as rf:
+            execution = json.load(rf)
+        os.remove(resultPath)
+
+        return tool.handleExecution(execution)
+
+    @staticmethod
+    def writeJson(path, content):
+        # written with a temporary (hidden) name and renamed: the workers never read a partial file
+        fd, tmpPath = tempfile.mkstemp(dir=Path(path).parent, prefix=".")
+        with os.fdopen(fd, "w") as f:
+            json.dump(content, f)
+        os.replace(tmpPath, path)
+
+class JobQueueWorker:
+    """
+    A daemon executing the jobs written by a JobQueueExecutor into a queue directory.
+    Several workers (also on different hosts) can serve the same queue.
+    """
+
+    def __init__(self, queueDir, agilepyLogger, pollInterval=1.0, tmpDir="/tmp/agilepy_tmp", heartbeatInterval=10.0):
+        self.queueDir = Path(queueDir)
+        self.logger = agilepyLogger
+        self.pollInterval = pollInterval
+        self.heartbeatInterval = heartbeatInterval
+        self.tmpDir = Path(tmpDir)
+        for subDir in (JobQueueExecutor.PENDING, JobQueueExecutor.RUNNING, JobQueueExecutor.DONE):
+            self.queueDir.joinpath(subDir).mkdir(parents=True, exist_ok=True)
+
+    def claimJob(self):
+        """
+        It moves the oldest pending job into the 'running' directory.
+
+        Returns:
+            The path of the claimed job or None if no job is pending.
+        """
+        pendingDir = self.queueDir.joinpath(JobQueueExecutor.PENDING)
+
+        for jobName in sorted(os.listdir(pendingDir)):
+
+            if jobName.startswith(".") or not jobName.endswith(".json"):
+                continue
+
+            runningPath = self.queueDir.joinpath(JobQueueExecutor.RUNNING, jobName)
+            try:
+                # the rename is atomic: a job is claimed by a single worker
+                os.rename(pendingDir.joinpath(jobName), runningPath)
+            except FileNotFoundError:
+                continue
+
+            # the rename keeps the modification time of the submission: the lease starts now
+            os.utime(runningPath)
+
+            return runningPath
+
+        return None
+
+    def runJob(self, jobPath):
+        """
+        It executes a claimed job and it writes its result.
+        """
+        with open(jobPath) as jf:
+            job = json.load(jf)
+
+        self.logger.info(f"Running job {job['id']} ({job['exeName']})")
+
+        self.tmpDir.mkdir(parents=True, exist_ok=True)
+        tempDir = tempfile.mkdtemp(dir=self.tmpDir)
+
+        stopHeartbeat = threading.Event()
+        heartbeatThread = threading.Thread(target=self._heartbeat, args=(jobPath, stopHeartbeat), daemon=True)
+        heartbeatThread.start()
+
+        try:
+            if job["parFile"] is not None:
+                shutil.copy(job["parFile"], tempDir)
+            execution = ProcessWrapper.runProcess(job["command"], env=job["env"])
+        except OSError as e:
+            execution = {"exit_code": -1, "stdout": "", "stderr": f"The worker cannot execute the job: {e}", "user_time": None, "sys_time": None, "max_rss_kb": None}
+        finally:
+            stopHeartbeat.set()
+            heartbeatThread.join()
+            shutil.rmtree(tempDir, ignore_errors=True)
+
+        execution["worker"] = os.uname().nodename
+
+        JobQueueExecutor.writeJson(self.queueDir.joinpath(JobQueueExecutor.DONE, job["id"]+".json"), execution)
+
+        try:
+            os.remove(jobPath)
+        except FileNotFoundError:
+            # the job has been considered stale and submitted again
+            pass
+
+        self.logger.info(f"Job {job['id']} completed with exit code {execution['exit_code']}")
+
+    def _heartbeat(self, jobPath, stopHeartbeat):
+        """
+        It touches the running job every heartbeatInterval seconds, until stopHeartbeat is set.
+        """
+        while not stopHeartbeat.wait(self.heartbeatInterval):
+            try:
+                os.utime(jobPath)
+            except FileNotFoundError:
+                return
+
+    def runOnce(self):
+        """
+        It executes one pending job, if any.
+
+        Returns:
+            True if a job has been executed, False otherwise.
+        """
+        jobPath = self.claimJob()
+
+        if jobPath is None:
+            return False
+
+        self.runJob(jobPath)
+
+        return True
+
+    def run(self, maxJobs=None, idleTimeout=None):
+        """
+        It executes the pending jobs until maxJobs jobs have been executed or no job has been submitted for idleTimeout seconds.
+        If both are None, it runs forever.
+
+        Returns:
+            The number of executed jobs.
+        """
+        jobs = 0
+        idleSince = time()
+
+        while maxJobs is None or jobs < maxJobs:
+
+            if self.runOnce():
+                jobs += 1
+                idleSince = time()
+
+            elif idleTimeout is not None and time() - idleSince > idleTimeout:
+                break
+
+            else:
+                sleep(self.pollInterval)
+
+        return jobs
+
+def main():
+    parser = argparse.ArgumentParser(description="Execute the science tools jobs of a JobQueueExecutor queue directory.")
+    parser.add_argument("queueDir", type=str, help="The queue directory")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="The interval (seconds) between two checks of the queue")
+    parser.add_argument("--max-jobs", type=int, default=None, help="Exit after executing this number of jobs")
+    parser.add_argument("--idle-timeout", type=float, default=None, help="Exit if no job is submitted for this number of seconds")
+    parser.add_argument("--heartbeat-interval", type=float, default=10.0, help="The interval (seconds) between two heartbeats of a running job")
+    parser.add_argument("--verbose", type=int, default=1, help="The log level: 0 (WARNING), 1 (INFO), 2 (DEBUG)")
+    args = parser.parse_args()
+
+    logger = AgilepyLogger.getDefaultLogger("JobQueueWorker", args.verbose)
+
+    JobQueueWorker(args.queueDir, logger, pollInterval=args.poll_interval, heartbeatInterval=args.heartbeat_interval).run(maxJobs=args.max_jobs, idleTimeout=args.idle_timeout)
+
+if __name__ == "__main__":
+    main()
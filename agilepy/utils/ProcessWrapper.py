@@ -26,10 +26,15 @@
 #along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
-import string
-import random
 import shutil
+import asyncio
+import hashlib
+import weakref
+import tempfile
 import subprocess
+from time import time
+from datetime import datetime
+from collections import deque
 from pathlib import Path
 from abc import ABC, abstractmethod
 
@@ -40,6 +45,13 @@ class ProcessWrapper(ABC):
     OPTIONAL_PRODUCT = 0
     REQUIRED_PRODUCT = 1
 
+    # the maximum number of science tools executed at the same time by call_async()
+    maxConcurrentCalls = os.cpu_count() or 1
+    _semaphores = weakref.WeakKeyDictionary()
+
+    # the number of stdout/stderr lines kept in memory by executeCommandAsync()
+    outputTailLines = 1000
+
     def __init__(self, exeName, agilepyLogger):
 
         self.logger = agilepyLogger
@@ -47,14 +59,20 @@ class ProcessWrapper(ABC):
         self.args = []
         self.outputDir = None
         self.products = {} 
+        self.inputs = []
         self.callCounter = 0
         self.isAgileTool = True
+        self.productCache = None
+        self.runLog = None
+        self.executor = None
+        self.lastExecution = None
         self.tmpDir = Path("/tmp/agilepy_tmp")
 
     @abstractmethod
     def configureTool(self, confDict, extraParams=None):
         """
         This method must initialize the 'args', 'products' and 'outputDir' attributes of the object.
+        It can also initialize the 'inputs' attribute with the files read by the tool (e.g. the products of other tools).
         """
         pass
 
@@ -96,6 +114,92 @@ class ProcessWrapper(ABC):
 
         self.logger.debug( "Science tool called!")
 
+        products = self._beforeCall()
+        if products is not None:
+            return products
+
+        # starting the tool
+        command = self.exeName + " " + " ".join(map(str, self.args))
+        self.logger.debug(f"Executing:\n\n {command}")
+
+        startTime = time()
+        status = "failed"
+        self.lastExecution = None
+
+        try:
+            if self.executor is not None:
+                toolstdout = self.executor.execute(self, command)
+            else:
+                toolstdout = self.executeLocally(command)
+
+            products = self._afterCall(toolstdout)
+            status = "done"
+        finally:
+            self._writeRunLog(startTime, status)
+
+        return products
+
+    async def call_async(self):
+        """
+        It runs the science tool as an asyncio subprocess: several tools can be executed concurrently
+        by the same event loop (e.g. with asyncio.gather()). The number of tools running at the same time
+        is limited by ProcessWrapper.maxConcurrentCalls.
+
+        Returns:
+            The products of the tool, as call().
+        """
+        self.logger.debug( "Science tool called (async)!")
+
+        products = self._beforeCall()
+        if products is not None:
+            return products
+
+        async with ProcessWrapper._getSemaphore():
+
+            tempDir = self._copyParFile()
+
+            command = self.exeName + " " + " ".join(map(str, self.args))
+            self.logger.debug(f"Executing:\n\n {command}")
+
+            startTime = time()
+            status = "failed"
+            self.lastExecution = None
+
+            try:
+                try:
+                    toolstdout = await self.executeCommandAsync(command)
+                finally:
+                    self._removeTempDir(tempDir)
+
+                products = self._afterCall(toolstdout)
+                status = "done"
+            finally:
+                self._writeRunLog(startTime, status)
+
+        return products
+
+    @staticmethod
+    def setMaxConcurrentCalls(maxConcurrentCalls):
+        """
+        It sets the maximum number of science tools executed at the same time by call_async().
+        """
+        if maxConcurrentCalls < 1:
+            raise ValueError(f"maxConcurrentCalls must be greater than 0 (got {maxConcurrentCalls})")
+        ProcessWrapper.maxConcurrentCalls = maxConcurrentCalls
+        ProcessWrapper._semaphores = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _getSemaphore():
+        # an asyncio semaphore can be used by a single event loop
+        loop = asyncio.get_running_loop()
+        if loop not in ProcessWrapper._semaphores:
+            ProcessWrapper._semaphores[loop] = asyncio.Semaphore(ProcessWrapper.maxConcurrentCalls)
+        return ProcessWrapper._semaphores[loop]
+
+    def _beforeCall(self):
+        """
+        It returns the products if the tool does not need to be executed, None otherwise.
+        """
         if not self.args:
             self.logger.warning( "The 'args' attribute has not been set! Please, call setArguments() before call()! ")
             return []
@@ -108,30 +212,42 @@ class ProcessWrapper(ABC):
 
         Path(self.outputDir).mkdir(parents=True, exist_ok=True)
 
-        if self.isAgileTool:
-            # copy par file
-            pfile_location = os.path.join(os.environ["AGILE"], "share")
-            pfile = os.path.join(pfile_location,self.exeName+".par")
+        startTime = time()
+        if self.productCache is not None and self.productCache.fetch(self):
+            self.logger.info(f"The {self.exeName} will not be called. Products restored from the cache {self.productCache.cacheDir}")
+            self.lastExecution = None
+            self._writeRunLog(startTime, "cached")
+            return [product if os.path.isfile(product) else None for product in self.products]
 
-            tempDir = self.tmpDir.joinpath(''.join(random.choice(string.ascii_lowercase) for i in range(5)))
-            tempDir.mkdir(parents=True, exist_ok=True)
-            #tempDir.mkdir(parents=True, exist_ok=True, mode=0o777)
-            #os.chmod(str(tempDir))
+        return None
 
-            command = f"cp {pfile} {str(tempDir)}"
+    def _copyParFile(self):
+        """
+        It copies the par file of the tool into a new temporary directory and it returns the directory.
+        """
+        if not self.isAgileTool:
+            return None
 
-            self.executeCommand(command, printStdout=False)
+        pfile = os.path.join(os.environ["AGILE"], "share", self.exeName+".par")
 
+        # a unique directory for each call: several tools can run concurrently
+        self.tmpDir.mkdir(parents=True, exist_ok=True)
+        tempDir = Path(tempfile.mkdtemp(dir=self.tmpDir))
 
-        # starting the tool
-        command = self.exeName + " " + " ".join(map(str, self.args))
-        self.logger.debug(f"Executing:\n\n {command}")
+        try:
+            shutil.copy(pfile, tempDir)
+        except OSError as e:
+            shutil.rmtree(str(tempDir), ignore_errors=True)
+            raise ScienceToolErrorCodeReturned(f"Cannot copy the par file {pfile}: {e}")
+
+        return tempDir
 
-        toolstdout = self.executeCommand(command)
+    def _removeTempDir(self, tempDir):
+        # remove temporary directory containing the par file copy
+        if tempDir is not None:
+            shutil.rmtree(str(tempDir), ignore_errors=True)
 
-        # remove temporary directory containing the par file copy 
-        if self.isAgileTool:
-            shutil.rmtree(str(tempDir))
+    def _afterCall(self, toolstdout):
 
         self.callCounter += 1
 
@@ -145,21 +261,162 @@ class ProcessWrapper(ABC):
                 products.append(product)
 
 
+        if self.productCache is not None:
+            self.productCache.store(self)
+
         self.logger.debug( f"Science tool {self.exeName} produced:\n {products}")
 
         return products
 
 
+    def executeLocally(self, command):
+        """
+        It executes the command of the tool on the local host, with a copy of the par file.
+
+        Returns:
+            The stdout of the tool.
+        """
+        tempDir = self._copyParFile()
+        try:
+            return self.executeCommand(command)
+        finally:
+            self._removeTempDir(tempDir)
+
     def executeCommand(self, command, printStdout=True):
 
         self.logger.debug( f"Executing command >>{command}")
 
-        completedProcess = subprocess.run(command, shell=True, capture_output=True, encoding="utf8")
+        return self.handleExecution(ProcessWrapper.runProcess(command), printStdout)
+
+    def handleExecution(self, execution, printStdout=True):
+        """
+        It records the result of an execution (see runProcess()) of the tool.
+
+        Returns:
+            The stdout of the tool.
+
+        Raises:
+            ScienceToolErrorCodeReturned: if the exit code is not 0.
+        """
+        self.lastExecution = {key: execution[key] for key in ("exit_code", "user_time", "sys_time", "max_rss_kb")}
 
-        if completedProcess.returncode != 0:
-            raise ScienceToolErrorCodeReturned("Non zero return status. \nstderr:" + completedProcess.stderr.strip())
+        if execution["exit_code"] != 0:
+            raise ScienceToolErrorCodeReturned("Non zero return status. \nstderr:" + execution["stderr"].strip())
 
         if printStdout:
-            self.logger.debug( "Science tool stdout:\n\n%s\n\n", completedProcess.stdout)
+            self.logger.debug( "Science tool stdout:\n\n%s\n\n", execution["stdout"])
+
+        return execution["stdout"]
+
+    @staticmethod
+    def runProcess(command, env=None):
+        """
+        It executes a shell command and it waits for its completion.
+
+        Args:
+            command (str): the command.
+            env (dict, optional): environment variables added to the environment of the current process.
 
-        return completedProcess.stdout
+        Returns:
+            A dictionary with the exit code, the stdout, the stderr, the user and system CPU time and the peak RSS (kB) of the command.
+        """
+        processEnv = None
+        if env:
+            processEnv = dict(os.environ)
+            processEnv.update(env)
+
+        # the output is redirected to temporary files (not pipes) so that the process can be waited
+        # with os.wait4(), which returns the resources used by the process and by its children
+        with tempfile.TemporaryFile(mode="w+", encoding="utf8") as stdoutFile, tempfile.TemporaryFile(mode="w+", encoding="utf8") as stderrFile:
+
+            process = subprocess.Popen(command, shell=True, stdout=stdoutFile, stderr=stderrFile, env=processEnv)
+
+            _, waitStatus, rusage = os.wait4(process.pid, 0)
+            process.returncode = ProcessWrapper.getExitCode(waitStatus)
+
+            stdoutFile.seek(0)
+            stderrFile.seek(0)
+
+            return {
+                "exit_code": process.returncode,
+                "stdout": stdoutFile.read(),
+                "stderr": stderrFile.read(),
+                "user_time": rusage.ru_utime,
+                "sys_time": rusage.ru_stime,
+                "max_rss_kb": rusage.ru_maxrss
+            }
+
+    @staticmethod
+    def getExitCode(waitStatus):
+        """
+        It decodes a wait status as Popen.returncode does: -N if the process has been killed by the signal N.
+        """
+        if os.WIFSIGNALED(waitStatus):
+            return -os.WTERMSIG(waitStatus)
+        return os.WEXITSTATUS(waitStatus)
+
+    async def executeCommandAsync(self, command, printStdout=True):
+        """
+        It executes the command as an asyncio subprocess. The stdout and stderr lines are logged while they are
+        produced; only the last ProcessWrapper.outputTailLines lines are kept in memory.
+
+        Returns:
+            The last lines of the stdout.
+        """
+        self.logger.debug( f"Executing command (async) >>{command}")
+
+        process = await asyncio.create_subprocess_shell(command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, limit=1024*1024)
+
+        stdoutTail = deque(maxlen=ProcessWrapper.outputTailLines)
+        stderrTail = deque(maxlen=ProcessWrapper.outputTailLines)
+
+        async def readStream(stream, tail, log):
+            async for line in stream:
+                line = line.decode("utf8", errors="replace").rstrip("\n")
+                tail.append(line)
+                if log:
+                    self.logger.debug( f"[{self.exeName}] {line}")
+
+        await asyncio.gather(readStream(process.stdout, stdoutTail, printStdout), readStream(process.stderr, stderrTail, printStdout))
+
+        returnCode = await process.wait()
+
+        # the asyncio child watcher reaps the process: its own resources are not available, and the
+        # resources of all the children (RUSAGE_CHILDREN) include the other calls running meanwhile
+        self.lastExecution = {
+            "exit_code": returnCode,
+            "user_time": None,
+            "sys_time": None,
+            "max_rss_kb": None
+        }
+
+        if returnCode != 0:
+            raise ScienceToolErrorCodeReturned("Non zero return status. \nstderr:" + "\n".join(stderrTail).strip())
+
+        return "\n".join(stdoutTail)
+
+    def _writeRunLog(self, startTime, status):
+
+        if self.runLog is None:
+            return
+
+        execution = self.lastExecution or {}
+
+        record = {
+            "start": datetime.fromtimestamp(startTime).isoformat(),
+            "tool": self.exeName,
+            "status": status,
+            "wall_time": time() - startTime,
+            "user_time": execution.get("user_time"),
+            "sys_time": execution.get("sys_time"),
+            "max_rss_kb": execution.get("max_rss_kb"),
+            "exit_code": execution.get("exit_code"),
+            "args_hash": hashlib.sha256(" ".join(map(str, self.args)).encode("utf8")).hexdigest(),
+            "output_dir": str(self.outputDir),
+            "products": {str(product): os.path.getsize(product) for product in self.products if os.path.isfile(product)}
+        }
+
+        try:
+            self.runLog.append(record)
+        except OSError as e:
+            self.logger.warning(f"Cannot write the run log {self.runLog.runLogFile}: {e}")
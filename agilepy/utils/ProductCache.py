@@ -0,0 +1,220 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+
+class ProductCache:
+    """
+    A content-addressed store of science tools products.
+
+    The key of a tool invocation is a hash of the tool name, of its arguments and of the name, size and
+    modification time of its input files. The paths of the products (and of the input files) are replaced
+    by placeholders before hashing, so the same invocation is recognized even if it writes into a different
+    output directory.
+
+    On a hit the cached products are hard-linked (or copied, if the cache is on another filesystem)
+    into the paths requested by the tool. When the total size of the cache exceeds ``maxSize`` bytes,
+    the least recently used entries are evicted.
+
+    The cache directory can be shared by several analyses and processes: new entries are written into
+    a temporary directory and renamed.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, cacheDir, maxSize=10*1024**3, agilepyLogger=None):
+        self.cacheDir = Path(cacheDir)
+        self.cacheDir.mkdir(parents=True, exist_ok=True)
+        self.maxSize = maxSize
+        self.logger = agilepyLogger
+        self.lock = threading.Lock()
+        self.statistics = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0
+        }
+
+    def getKey(self, tool):
+        """
+        It returns the hash identifying the invocation of a configured tool.
+        """
+        products = [str(product) for product in tool.products]
+        inputs = [str(inputFile) for inputFile in tool.inputs]
+
+        args = []
+        for arg in tool.args:
+            arg = str(arg)
+            if arg in products:
+                arg = f"<product{products.index(arg)}>"
+            elif arg in inputs:
+                arg = f"<input{inputs.index(arg)}>"
+            args.append(arg)
+
+        fingerprints = []
+        for inputFile in inputs:
+            if os.path.isfile(inputFile):
+                stat = os.stat(inputFile)
+                fingerprints.append([Path(inputFile).name, stat.st_size, stat.st_mtime_ns])
+            else:
+                fingerprints.append([inputFile, None, None])
+
+        content = json.dumps([tool.exeName, args, fingerprints])
+
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def fetch(self, tool):
+        """
+        It copies the cached products of the tool invocation into the paths requested by the tool.
+
+        Returns:
+            True if the products have been found in the cache, False otherwise.
+        """
+        key = self.getKey(tool)
+        entryDir = self.cacheDir.joinpath(key)
+
+        with self.lock:
+
+            manifestPath = entryDir.joinpath(ProductCache.MANIFEST)
+
+            if not manifestPath.is_file():
+                self.statistics["misses"] += 1
+                return False
+
+            with open(manifestPath, "r") as mf:
+                cachedProducts = json.load(mf)
+
+            for idx, product in enumerate(tool.products):
+                if str(idx) in cachedProducts:
+                    ProductCache._linkOrCopy(entryDir.joinpath(str(idx)), product)
+
+            # the modification time of the entry is used by the LRU eviction policy
+            os.utime(entryDir)
+
+            self.statistics["hits"] += 1
+
+        self._log(f"Cache hit for {tool.exeName} ({key})")
+
+        return True
+
+    def store(self, tool):
+        """
+        It adds the products of a completed tool invocation to the cache.
+        """
+        key = self.getKey(tool)
+        entryDir = self.cacheDir.joinpath(key)
+
+        with self.lock:
+
+            if entryDir.is_dir():
+                return
+
+            tmpDir = Path(tempfile.mkdtemp(dir=self.cacheDir, prefix=".tmp_"))
+
+            cachedProducts = {}
+            for idx, product in enumerate(tool.products):
+                if os.path.isfile(product):
+                    ProductCache._linkOrCopy(product, tmpDir.joinpath(str(idx)))
+                    cachedProducts[str(idx)] = Path(product).name
+
+            with open(tmpDir.joinpath(ProductCache.MANIFEST), "w") as mf:
+                json.dump(cachedProducts, mf)
+
+            try:
+                os.rename(tmpDir, entryDir)
+            except OSError:
+                # another process stored the same entry in the meantime
+                shutil.rmtree(tmpDir, ignore_errors=True)
+                return
+
+            self.statistics["stores"] += 1
+
+            self._evict()
+
+        self._log(f"Products of {tool.exeName} stored in the cache ({key})")
+
+    def getStatistics(self):
+        """
+        It returns the number of hits, misses, stores and evictions, together with the number of entries and the size (bytes) of the cache.
+        """
+        with self.lock:
+            entries = self._getEntries()
+            statistics = dict(self.statistics)
+            statistics["entries"] = len(entries)
+            statistics["size"] = sum(size for _, _, size in entries)
+        return statistics
+
+    def clear(self):
+        """
+        It removes every entry of the cache.
+        """
+        with self.lock:
+            for entryDir, _, _ in self._getEntries():
+                shutil.rmtree(entryDir, ignore_errors=True)
+
+    def _getEntries(self):
+        entries = []
+        for entryDir in self.cacheDir.iterdir():
+            if entryDir.name.startswith(".tmp_") or not entryDir.is_dir():
+                continue
+            size = sum(f.stat().st_size for f in entryDir.iterdir() if f.is_file())
+            entries.append((entryDir, entryDir.stat().st_mtime, size))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._getEntries(), key=lambda entry: entry[1])
+        totalSize = sum(size for _, _, size in entries)
+
+        # the most recent entry is never evicted
+        for entryDir, _, size in entries[:-1]:
+            if totalSize <= self.maxSize:
+                break
+            shutil.rmtree(entryDir, ignore_errors=True)
+            totalSize -= size
+            self.statistics["evictions"] += 1
+            self._log(f"Cache entry {entryDir.name} evicted")
+
+    def _log(self, message):
+        if self.logger:
+            self.logger.debug(message)
+
+    @staticmethod
+    def _linkOrCopy(src, dst):
+        dst = Path(dst)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        if dst.exists():
+            dst.unlink()
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
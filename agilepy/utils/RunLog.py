@@ -0,0 +1,117 @@
+# DESCRIPTION
+#       Agilepy software
+#
+# NOTICE
+#      Any information contained in this software
+#      is property of the AGILE TEAM and is strictly
+#      private and confidential.
+#      Copyright (C) 2005-2020 AGILE Team.
+#          Baroncelli Leonardo <leonardo.baroncelli@inaf.it>
+#          Addis Antonio <antonio.addis@inaf.it>
+#          Bulgarelli Andrea <andrea.bulgarelli@inaf.it>
+#          Parmiggiani Nicolò <nicolo.parmiggiani@inaf.it>
+#      All rights reserved.
+
+#This program is free software: you can redistribute it and/or modify
+#it under the terms of the GNU General Public License as published by
+#the Free Software Foundation, either version 3 of the License, or
+#(at your option) any later version.
+
+#This program is distributed in the hope that it will be useful,
+#but WITHOUT ANY WARRANTY; without even the implied warranty of
+#MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#GNU General Public License for more details.
+
+#You should have received a copy of the GNU General Public License
+#along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import threading
+from pathlib import Path
+
+class RunLog:
+    """
+    A structured log (JSON lines) of the science tools invocations of an analysis.
+
+    Each record describes a call of a science tool: the tool name, the status ("done", "failed" or "cached"),
+    the wall time, the user and system CPU time and the peak resident set size (kB) of the tool process,
+    the exit code, a hash of the arguments and the size of the products.
+    """
+
+    FILENAME = "run_log.jsonl"
+
+    def __init__(self, runLogFile):
+        self.runLogFile = Path(runLogFile)
+        self.runLogFile.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+
+    def append(self, record):
+        """
+        It appends a record to the run log.
+        """
+        line = json.dumps(record)
+
+        with self.lock:
+            with open(self.runLogFile, "a") as rl:
+                rl.write(line+"\n")
+
+    def read(self):
+        """
+        It returns the list of the records of the run log.
+        """
+        if not self.runLogFile.is_file():
+            return []
+
+        records = []
+
+        with open(self.runLogFile) as rl:
+            for line in rl:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # a line truncated by a killed analysis
+                    continue
+
+        return records
+
+    def getSlowest(self, topN=10):
+        """
+        It returns the topN records with the longest wall time.
+        """
+        return sorted(self.read(), key=lambda record: record["wall_time"], reverse=True)[:topN]
+
+    def getSummary(self, topN=None):
+        """
+        It aggregates the records by tool.
+
+        Returns:
+            A list of dictionaries (one for each tool, sorted by total wall time) with the number of calls, \
+            of failed calls and of cached calls, the total, mean and max wall time, the total CPU time and the max peak RSS (kB).
+        """
+        summary = {}
+
+        for record in self.read():
+
+            toolSummary = summary.setdefault(record["tool"], {
+                "tool": record["tool"],
+                "calls": 0,
+                "failed": 0,
+                "cached": 0,
+                "wall_time": 0.0,
+                "max_wall_time": 0.0,
+                "cpu_time": 0.0,
+                "max_rss_kb": 0
+            })
+
+            toolSummary["calls"] += 1
+            toolSummary["failed"] += record["status"] == "failed"
+            toolSummary["cached"] += record["status"] == "cached"
+            toolSummary["wall_time"] += record["wall_time"]
+            toolSummary["max_wall_time"] = max(toolSummary["max_wall_time"], record["wall_time"])
+            toolSummary["cpu_time"] += (record.get("user_time") or 0) + (record.get("sys_time") or 0)
+            toolSummary["max_rss_kb"] = max(toolSummary["max_rss_kb"], record.get("max_rss_kb") or 0)
+
+        for toolSummary in summary.values():
+            toolSummary["mean_wall_time"] = toolSummary["wall_time"] / toolSummary["calls"]
+
+        return sorted(summary.values(), key=lambda toolSummary: toolSummary["wall_time"], reverse=True)[:topN]
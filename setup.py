@@ -5,6 +5,7 @@ from setuptools import setup, find_packages
 entry_points = {
 	'console_scripts': [
 		'agilepy_spectra = agilepy.api.advanced.spectra.main:main',
+		'agilepy_job_worker = agilepy.utils.Executors:main',
     ]
 }
 